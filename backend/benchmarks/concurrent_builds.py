@@ -0,0 +1,67 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import chain_grammar, expression_grammar, statement_grammar
+
+from src.comp.afd import MODES
+from src.comp.parser import build_parser
+
+
+def grammars(cantidad):
+    generadores = (expression_grammar, chain_grammar, statement_grammar)
+    casos = []
+    for i in range(cantidad):
+        generador = generadores[i % len(generadores)]
+        tamano = 4 + i if generador is not chain_grammar else 40 + 10 * i
+        casos.append((generador(tamano), MODES[i % len(MODES)]))
+    return casos
+
+
+def signature(parser):
+    table = parser.table
+    return table.action_table, table.goto_table, table.conflicts, parser.afd.states_before_merge
+
+
+def build(caso):
+    contenido, mode = caso
+    return signature(build_parser(contenido, mode))
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Construcciones concurrentes en hilos frente a construcciones en serie")
+    argumentos.add_argument("--threads", type=int, default=8)
+    argumentos.add_argument("--grammars", type=int, default=24)
+    argumentos.add_argument("--rounds", type=int, default=5)
+    args = argumentos.parse_args()
+    
+    casos = grammars(args.grammars)
+    
+    inicio = time.perf_counter()
+    esperados = [build(caso) for caso in casos]
+    serie = time.perf_counter() - inicio
+    print(f"serie: {len(casos)} gramáticas en {serie:.3f} s")
+    
+    errores = 0
+    with ThreadPoolExecutor(args.threads) as pool:
+        for ronda in range(args.rounds):
+            inicio = time.perf_counter()
+            obtenidos = list(pool.map(build, casos))
+            duracion = time.perf_counter() - inicio
+            distintos = [i for i, (a, b) in enumerate(zip(esperados, obtenidos)) if a != b]
+            errores += len(distintos)
+            print(f"ronda {ronda + 1}: {args.threads} hilos en {duracion:.3f} s, "
+                  f"{len(distintos)} tablas distintas de la serie")
+    
+    if errores:
+        print(f"FALLO: {errores} construcciones concurrentes no coinciden con la serie")
+        sys.exit(1)
+    print("OK: todas las construcciones concurrentes coinciden con la serie")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
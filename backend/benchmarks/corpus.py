@@ -0,0 +1,249 @@
+EXPRESSIONS = """
+E -> E + T
+E -> E - T
+E -> T
+T -> T * F
+T -> T / F
+T -> F
+F -> ( E )
+F -> - F
+F -> id
+F -> num
+"""
+
+JSON = """
+J -> V
+V -> O
+V -> A
+V -> string
+V -> number
+V -> true
+V -> false
+V -> null
+O -> { }
+O -> { M }
+M -> M , P
+M -> P
+P -> string : V
+A -> [ ]
+A -> [ L ]
+L -> L , V
+L -> V
+"""
+
+C_SUBSET = """
+Program -> Funcs
+Funcs -> Funcs Func
+Funcs -> Func
+Func -> Type id ( Params ) Block
+Params -> ε
+Params -> ParamList
+ParamList -> ParamList , Param
+ParamList -> Param
+Param -> Type id
+Type -> int
+Type -> float
+Type -> char
+Type -> void
+Block -> { Stmts }
+Stmts -> Stmts Stmt
+Stmts -> ε
+Stmt -> Matched
+Stmt -> Open
+Matched -> if ( Expr ) Matched else Matched
+Matched -> while ( Expr ) Matched
+Matched -> Simple
+Open -> if ( Expr ) Stmt
+Open -> if ( Expr ) Matched else Open
+Open -> while ( Expr ) Open
+Simple -> Type id ;
+Simple -> Type id = Expr ;
+Simple -> id = Expr ;
+Simple -> id ( Args ) ;
+Simple -> return Expr ;
+Simple -> return ;
+Simple -> Block
+Expr -> Expr || And
+Expr -> And
+And -> And && Cmp
+And -> Cmp
+Cmp -> Sum < Sum
+Cmp -> Sum == Sum
+Cmp -> Sum
+Sum -> Sum + Term
+Sum -> Sum - Term
+Sum -> Term
+Term -> Term * Unary
+Term -> Term / Unary
+Term -> Unary
+Unary -> - Unary
+Unary -> ! Unary
+Unary -> Primary
+Primary -> id
+Primary -> num
+Primary -> ( Expr )
+Primary -> id ( Args )
+Args -> ε
+Args -> ArgList
+ArgList -> ArgList , Expr
+ArgList -> Expr
+"""
+
+CORPUS = {
+    "expressions": EXPRESSIONS,
+    "json": JSON,
+    "c-subset": C_SUBSET
+}
+
+
+def expression_grammar(niveles):
+    reglas = []
+    for i in range(niveles):
+        reglas.append(f"E{i} -> E{i} op{i} E{i + 1}")
+        reglas.append(f"E{i} -> E{i + 1}")
+    reglas.append(f"E{niveles} -> ( E0 )")
+    reglas.append(f"E{niveles} -> id")
+    return "\n".join(reglas)
+
+
+def chain_grammar(longitud):
+    reglas = [f"A{i} -> A{i + 1} x{i % 7}" for i in range(longitud)]
+    reglas.append(f"A{longitud} -> y")
+    return "\n".join(reglas)
+
+
+def statement_grammar(bloques):
+    reglas = ["P -> L", "L -> L S", "L -> S"]
+    for i in range(bloques):
+        reglas.append(f"S -> kw{i} ( E ) S")
+        reglas.append(f"S -> kw{i} ( E ) S else S")
+    reglas += ["S -> id = E ;", "S -> { L }", "E -> E + T", "E -> T", "T -> id", "T -> num"]
+    return "\n".join(reglas)
+
+
+def right_recursion_grammar(niveles):
+    reglas = []
+    for i in range(niveles):
+        reglas.append(f"E{i} -> E{i + 1} op{i} E{i}")
+        reglas.append(f"E{i} -> E{i + 1}")
+    reglas.append(f"E{niveles} -> ( E0 )")
+    reglas.append(f"E{niveles} -> id")
+    return "\n".join(reglas)
+
+
+def wide_grammar(anchura):
+    # Muchas alternativas para un mismo no terminal: la mitad empieza por una
+    # palabra clave propia y la otra mitad comparte el prefijo V.
+    reglas = ["L -> L I", "L -> I"]
+    for i in range(anchura):
+        reglas.append(f"I -> k{i} V ;")
+        reglas.append(f"I -> V op{i} V ;")
+    reglas += ["V -> V . id", "V -> id", "V -> num"]
+    return "\n".join(reglas)
+
+
+def epsilon_grammar(cantidad):
+    # Secuencias de no terminales anulables: FIRST y los lookaheads se
+    # propagan a través de todos ellos.
+    reglas = ["L -> L B", "L -> B", "B -> { " + " ".join(f"O{i}" for i in range(cantidad)) + " }"]
+    for i in range(cantidad):
+        reglas.append(f"O{i} -> o{i} O{i}")
+        reglas.append(f"O{i} -> ε")
+    return "\n".join(reglas)
+
+
+SYNTHETIC = {
+    "chain": chain_grammar,
+    "left-recursion": expression_grammar,
+    "right-recursion": right_recursion_grammar,
+    "wide": wide_grammar,
+    "epsilon": epsilon_grammar
+}
+
+
+def expression(rnd, tokens, operador, operando, anidar=0.0, profundidad=0, anidados=7):
+    # Expresión aleatoria de al menos `tokens` tokens: operandos separados por
+    # operador(rnd). Mientras quede profundidad, cada operando es, con
+    # probabilidad `anidar`, una subexpresión entre paréntesis de 1 a
+    # `anidados` tokens.
+    partes = []
+    while len(partes) < tokens:
+        if partes:
+            partes.append(operador(rnd))
+        if profundidad > 0 and rnd.random() < anidar:
+            subexpresion = expression(rnd, rnd.randint(1, anidados), operador, operando, anidar, profundidad - 1, anidados)
+            partes += ["("] + subexpresion + [")"]
+        else:
+            partes.append(operando(rnd))
+    return partes
+
+
+def sentence(grammar, tokens, rnd):
+    # Deriva una cadena de unos `tokens` terminales. Mientras sobra presupuesto
+    # se expande un no terminal cualquiera del árbol, casi siempre con una
+    # producción que alarga la cadena (siempre si es el último pendiente);
+    # después cada hoja pendiente toma una de las producciones que terminan
+    # antes.
+    simbolos = grammar.simbolos
+    producciones = grammar.producciones
+    num_no_terminales = grammar.num_no_terminales
+    infinito = float("inf")
+    minimo = [infinito] * num_no_terminales + [1] * (len(simbolos) - num_no_terminales)
+    altura = [infinito] * num_no_terminales + [0] * (len(simbolos) - num_no_terminales)
+    cambio = True
+    while cambio:
+        cambio = False
+        for lhs, rhs in producciones:
+            costo = (sum(minimo[s] for s in rhs), 1 + max((altura[s] for s in rhs), default=0))
+            if costo < (minimo[lhs], altura[lhs]):
+                minimo[lhs], altura[lhs] = costo
+                cambio = True
+    largo = [sum(minimo[s] for s in rhs) for _, rhs in producciones]
+    cierres = [[] for _ in range(num_no_terminales)]
+    for numero, (lhs, rhs) in enumerate(producciones):
+        if (largo[numero], 1 + max((altura[s] for s in rhs), default=0)) == (minimo[lhs], altura[lhs]):
+            cierres[lhs].append(numero)
+    
+    simbolo_de = [0]
+    hijos_de = [None]
+    frontera = [0]
+    total = minimo[0]
+    
+    def expandir(nodo, numero):
+        hijos = []
+        for simbolo in producciones[numero][1]:
+            hijo = len(simbolo_de)
+            simbolo_de.append(simbolo)
+            hijos_de.append(None)
+            hijos.append(hijo)
+            if simbolo < num_no_terminales:
+                frontera.append(hijo)
+        hijos_de[nodo] = hijos
+    
+    for _ in range(50 * tokens + 1000):
+        if not frontera or total >= tokens:
+            break
+        i = rnd.randrange(len(frontera))
+        frontera[i], frontera[-1] = frontera[-1], frontera[i]
+        nodo = frontera.pop()
+        simbolo = simbolo_de[nodo]
+        restante = tokens - total
+        validas = [p for p in grammar.producciones_de[simbolo] if largo[p] - minimo[simbolo] <= restante]
+        crecen = [p for p in validas if largo[p] > minimo[simbolo]]
+        numero = rnd.choice(crecen if crecen and (not frontera or rnd.random() < 0.7) else validas)
+        total += largo[numero] - minimo[simbolo]
+        expandir(nodo, numero)
+    while frontera:
+        nodo = frontera.pop()
+        expandir(nodo, rnd.choice(cierres[simbolo_de[nodo]]))
+    
+    salida = []
+    pila = [0]
+    while pila:
+        nodo = pila.pop()
+        hijos = hijos_de[nodo]
+        if hijos is None:
+            salida.append(simbolos[simbolo_de[nodo]])
+        else:
+            pila.extend(reversed(hijos))
+    return " ".join(salida)
\ No newline at end of file
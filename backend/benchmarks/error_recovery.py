@@ -0,0 +1,87 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import statement_grammar
+
+from src.comp.lexer import compile_lexer
+from src.comp.parser import build_parser
+
+LEXER_SPEC = r"""
+id = [A-Za-z_][A-Za-z0-9_]*
+num = [0-9]+
+"""
+
+ERRORS = (
+    lambda rnd: f"x{rnd.randrange(100)} = = {rnd.randrange(100)};",
+    lambda rnd: f"x{rnd.randrange(100)} = {rnd.randrange(100)} {rnd.randrange(100)};",
+    lambda rnd: f"x{rnd.randrange(100)} = v + ;"
+)
+
+
+def program(rnd, sentencias, errores, bloques):
+    lineas = []
+    for _ in range(sentencias):
+        if rnd.random() < 0.2:
+            lineas.append(f"kw{rnd.randrange(bloques)} (v{rnd.randrange(100)} + 1) y = {rnd.randrange(100)};")
+        else:
+            lineas.append(f"x{rnd.randrange(100)} = v{rnd.randrange(100)} + {rnd.randrange(100)};")
+    erroneas = sorted(rnd.sample(range(sentencias), errores))
+    for linea in erroneas:
+        lineas[linea] = rnd.choice(ERRORS)(rnd)
+    return lineas, [linea + 1 for linea in erroneas]
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Recuperación en modo pánico frente a corregir y reenviar error a error")
+    argumentos.add_argument("--statements", type=int, default=5000)
+    argumentos.add_argument("--errors", type=int, default=40)
+    argumentos.add_argument("--blocks", type=int, default=5)
+    argumentos.add_argument("--error-productions", action="store_true", help="añade S -> error ; a la gramática")
+    argumentos.add_argument("--mode", default="lalr1")
+    args = argumentos.parse_args()
+    
+    gramatica = statement_grammar(args.blocks)
+    if args.error_productions:
+        gramatica += "\nS -> error ;"
+    parser = build_parser(gramatica, args.mode)
+    lexer = compile_lexer(LEXER_SPEC, parser.get_grammar_data()["terminals"])
+    lineas, esperadas = program(random.Random(3), args.statements, args.errors, args.blocks)
+    
+    # Sin recuperación el usuario corrige el primer error y vuelve a enviar:
+    # un análisis completo por error más el final.
+    inicio = time.perf_counter()
+    pendientes = list(lineas)
+    correctas = program(random.Random(3), args.statements, 0, args.blocks)[0]
+    envios = 0
+    while True:
+        envios += 1
+        tabla = parser.parse_input("\n".join(pendientes), lexer, record=False, recover=False)
+        if tabla.accepted:
+            break
+        fallida = next(i for i, linea in enumerate(pendientes) if linea != correctas[i])
+        pendientes[fallida] = correctas[fallida]
+    reenvios = time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    tabla = parser.parse_input("\n".join(lineas), lexer, record=False, recover=True)
+    recuperacion = time.perf_counter() - inicio
+    
+    reportadas = {error.get("line") for error in tabla.errors}
+    perdidas = [linea for linea in esperadas if linea not in reportadas]
+    print(f"corregir y reenviar: {envios} análisis en {reenvios:.2f} s")
+    print(f"recuperación: 1 análisis en {recuperacion * 1000:.1f} ms, {len(tabla.errors)} errores "
+          f"({reenvios / recuperacion:.0f}x menos trabajo)")
+    
+    if perdidas or len(tabla.errors) > 2 * args.errors:
+        print(f"FALLO: {len(perdidas)} errores sin informar, {len(tabla.errors)} diagnósticos para {args.errors} errores")
+        sys.exit(1)
+    print(f"OK: los {args.errors} errores se informan en una sola pasada")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,73 @@
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import expression, expression_grammar
+
+from src.comp.codegen import write_module
+from src.comp.parser import build_parser
+from src.comp.transition_table import TransitionTable
+
+
+def load_module(path):
+    spec = importlib.util.spec_from_file_location("generated_parser_module", path)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Módulo de parser generado frente al bucle genérico de TransitionTable")
+    argumentos.add_argument("--levels", type=int, default=8)
+    argumentos.add_argument("--inputs", type=int, default=2000)
+    argumentos.add_argument("--mode", default="lalr1")
+    args = argumentos.parse_args()
+    
+    parser = build_parser(expression_grammar(args.levels), args.mode)
+    path = os.path.join(tempfile.mkdtemp(prefix="lr-codegen-"), "expr_parser.py")
+    write_module(parser, path)
+    
+    inicio = time.perf_counter()
+    modulo = load_module(path)
+    print(f"importación del módulo generado: {(time.perf_counter() - inicio) * 1000:.2f} ms "
+          f"({os.path.getsize(path) / 1024:.1f} KiB)")
+    
+    rnd = random.Random(7)
+    operador = lambda r: f"op{r.randrange(args.levels)}"
+    entradas = []
+    for _ in range(args.inputs):
+        tokens = []
+        for i in range(rnd.randint(1, 20)):
+            if i:
+                tokens.append(f"op{rnd.randrange(args.levels)}")
+            tokens += expression(rnd, 2 * rnd.randint(1, 4) - 1, operador, lambda r: "id", 0.2, 3)
+        entradas.append(" ".join(tokens))
+    tokens_totales = sum(len(entrada.split()) for entrada in entradas)
+    
+    inicio = time.perf_counter()
+    esperados = [TransitionTable(entrada, parser.table, record=False).get_summary() for entrada in entradas]
+    generico = time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    obtenidos = [modulo.parse(entrada) for entrada in entradas]
+    generado = time.perf_counter() - inicio
+    
+    print(f"TransitionTable: {tokens_totales / generico:,.0f} tokens/s")
+    print(f"módulo generado: {tokens_totales / generado:,.0f} tokens/s ({generico / generado:.1f}x)")
+    
+    distintos = sum(1 for a, b in zip(esperados, obtenidos) if a != b)
+    aceptadas = sum(1 for resultado in obtenidos if resultado["accepted"])
+    if distintos or aceptadas != len(entradas):
+        print(f"FALLO: {distintos} resultados distintos, {aceptadas}/{len(entradas)} aceptadas")
+        sys.exit(1)
+    print(f"OK: {len(entradas)} cadenas aceptadas con resultados idénticos")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,99 @@
+import argparse
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import statement_grammar
+from timing import timed
+
+from src.comp.glr import TREE_COUNT_LIMIT
+from src.comp.lexer import compile_lexer
+from src.comp.parser import build_parser
+
+LEXER_SPEC = r"""
+id = [A-Za-z_][A-Za-z0-9_]*
+num = [0-9]+
+"""
+
+AMBIGUOUS_GRAMMAR = """
+E -> E + E
+E -> E * E
+E -> ( E )
+E -> id
+"""
+
+
+def program(rnd, sentencias, bloques):
+    # Solo hay else en ifs sin anidar: el else colgante genera conflictos en la
+    # tabla pero esta entrada tiene una única derivación.
+    lineas = []
+    for _ in range(sentencias):
+        asignacion = f"x{rnd.randrange(100)} = v{rnd.randrange(100)} + {rnd.randrange(100)};"
+        r = rnd.random()
+        if r < 0.1:
+            lineas.append(f"kw{rnd.randrange(bloques)} (v{rnd.randrange(100)}) {asignacion} else {asignacion}")
+        elif r < 0.2:
+            lineas.append(f"kw{rnd.randrange(bloques)} (v{rnd.randrange(100)} + 1) {asignacion}")
+        else:
+            lineas.append(asignacion)
+    return "\n".join(lineas)
+
+
+def catalan(n):
+    return math.comb(2 * n, n) // (n + 1)
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description="GLR con pila en grafo frente al driver LR determinista")
+    argumentos.add_argument("--statements", type=int, default=20000)
+    argumentos.add_argument("--blocks", type=int, default=5)
+    argumentos.add_argument("--operands", type=int, nargs="+", default=[5, 10, 20, 40, 80])
+    argumentos.add_argument("--mode", default="lalr1")
+    args = argumentos.parse_args()
+    
+    errores = 0
+    
+    # Entrada casi determinista: el camino rápido debe mantener el coste
+    # cerca del driver LR que construye el árbol.
+    parser = build_parser(statement_grammar(args.blocks), args.mode)
+    lexer = compile_lexer(LEXER_SPEC, parser.get_grammar_data()["terminals"])
+    texto = program(random.Random(7), args.statements, args.blocks)
+    lr, tabla = timed(lambda: parser.parse_input(texto, lexer, record=False))
+    arbol, _ = timed(lambda: parser.parse_input(texto, lexer, record=False, build_tree=True))
+    glr, driver = timed(lambda: parser.parse_glr(texto, lexer))
+    resumen = driver.get_summary()
+    print(f"gramática de sentencias: {len(parser.table.conflicts)} conflictos, {args.statements} sentencias")
+    print(f"  LR:           {lr * 1000:.1f} ms")
+    print(f"  LR con árbol: {arbol * 1000:.1f} ms")
+    print(f"  GLR:          {glr * 1000:.1f} ms ({glr / arbol:.1f}x), {resumen['max_stacks']} pilas como máximo, "
+          f"{resumen['trees']} árbol(es)")
+    if not tabla.accepted or not driver.accepted or resumen["trees"] != 1:
+        errores += 1
+    
+    # Gramática ambigua: el número de árboles crece como Catalan(n - 1) pero
+    # el bosque compartido solo polinómicamente.
+    ambigua = build_parser(AMBIGUOUS_GRAMMAR, args.mode)
+    rnd = random.Random(9)
+    print(f"gramática ambigua: {len(ambigua.table.conflicts)} conflictos")
+    for operandos in args.operands:
+        entrada = " ".join(["id"] + [f"{rnd.choice('+*')} id" for _ in range(operandos - 1)])
+        duracion, driver = timed(lambda: ambigua.parse_glr(entrada))
+        resumen = driver.get_summary()
+        esperado = min(catalan(operandos - 1), TREE_COUNT_LIMIT)
+        arboles = f"≥{TREE_COUNT_LIMIT:.0e}" if resumen["trees"] == TREE_COUNT_LIMIT else resumen["trees"]
+        print(f"  {operandos} operandos: {duracion * 1000:.1f} ms, {resumen['forest_nodes']} nodos del bosque, "
+              f"{resumen['gss_nodes']} nodos de pila, {arboles} árboles")
+        if not driver.accepted or resumen["trees"] != esperado:
+            errores += 1
+    
+    if errores:
+        print(f"FALLO: {errores} análisis no aceptados o con un número de árboles inesperado")
+        sys.exit(1)
+    print("OK: GLR acepta las entradas y cuenta todas las derivaciones")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
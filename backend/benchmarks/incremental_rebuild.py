@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import chain_grammar, expression_grammar, statement_grammar
+from timing import timed
+
+from src.comp.afd import MODES
+from src.comp.parser import build_parser, rebuild_parser
+
+
+def edits(bloques):
+    base = statement_grammar(bloques)
+    return [
+        ("statement + nueva producción de T", base, base + "\nT -> ( E )"),
+        ("statement + nueva sentencia", base, base + "\nS -> return E ;"),
+        ("statement, cambio en E", base, base.replace("E -> E + T", "E -> E - T")),
+        ("expresiones + nuevo operando", expression_grammar(10), expression_grammar(10) + "\nE10 -> num"),
+        ("cadena + nueva alternativa final", chain_grammar(800), chain_grammar(800) + "\nA800 -> z"),
+    ]
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Reconstrucción incremental frente a construcción completa tras una edición")
+    argumentos.add_argument("--blocks", type=int, default=40)
+    argumentos.add_argument("--mode", default="lr1", choices=MODES)
+    argumentos.add_argument("--repeat", type=int, default=5)
+    args = argumentos.parse_args()
+    
+    errores = 0
+    for nombre, antes, despues in edits(args.blocks):
+        previous = build_parser(antes, args.mode)
+        completo, esperado = timed(lambda: build_parser(despues, args.mode), args.repeat)
+        incremental, obtenido = timed(lambda: rebuild_parser(previous, despues), args.repeat)
+        
+        iguales = (obtenido.get_table_data() == esperado.get_table_data() and
+                   obtenido.get_summary() == esperado.get_summary())
+        errores += not iguales
+        print(f"{nombre}: {len(esperado.afd)} estados, completa {completo * 1000:.1f} ms, "
+              f"incremental {incremental * 1000:.1f} ms ({completo / incremental:.1f}x)"
+              f"{'' if iguales else '  DISTINTA'}")
+    
+    if errores:
+        print(f"FALLO: {errores} reconstrucciones no coinciden con la construcción completa")
+        sys.exit(1)
+    print("OK: las reconstrucciones incrementales coinciden con la construcción completa")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,127 @@
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import expression, statement_grammar
+from timing import measure
+
+from src.comp.lexer import compile_lexer
+from src.comp.parser import build_parser
+from src.comp.transition_table import TransitionTable
+
+LEXER_SPEC = r"""
+id = [A-Za-z_][A-Za-z0-9_]*
+num = [0-9]+
+%skip \s+
+%skip //[^\n]*
+"""
+
+
+def operand(rnd):
+    return str(rnd.randrange(1000)) if rnd.random() < 0.3 else f"v{rnd.randrange(500)}"
+
+
+def sum_expression(rnd):
+    return " ".join(expression(rnd, 2 * rnd.randint(1, 4) - 1, lambda r: "+", operand))
+
+
+def statement(rnd, bloques, profundidad=0):
+    r = rnd.random()
+    if profundidad < 4 and r < 0.25:
+        return f"kw{rnd.randrange(bloques)} ({sum_expression(rnd)})\n    {statement(rnd, bloques, profundidad + 1)}"
+    if profundidad < 4 and r < 0.35:
+        cuerpo = "\n".join(statement(rnd, bloques, profundidad + 1) for _ in range(rnd.randint(1, 3)))
+        return f"{{\n{cuerpo}\n}}"
+    comentario = "  // asignación" if rnd.random() < 0.1 else ""
+    return f"x{rnd.randrange(500)} = {sum_expression(rnd)};{comentario}"
+
+
+def naive_tokens(texto, reglas, terminales):
+    # Pasada previa típica: prueba cada expresión en cada posición y deja los
+    # nombres de terminal separados por espacios para el driver.
+    compiladas = [(nombre, re.compile(expresion)) for nombre, expresion in reglas]
+    literales = sorted((t for t in terminales if t not in dict(reglas)), key=len, reverse=True)
+    nombres = []
+    posicion = 0
+    while posicion < len(texto):
+        if texto[posicion].isspace():
+            posicion += 1
+            continue
+        if texto.startswith("//", posicion):
+            fin = texto.find("\n", posicion)
+            posicion = len(texto) if fin < 0 else fin
+            continue
+        for nombre, patron in compiladas:
+            m = patron.match(texto, posicion)
+            if m:
+                lexema = m.group()
+                nombres.append(lexema if lexema in terminales else nombre)
+                posicion = m.end()
+                break
+        else:
+            literal = next(l for l in literales if texto.startswith(l, posicion))
+            nombres.append(literal)
+            posicion += len(literal)
+    return " ".join(nombres)
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Lexer compilado en streaming frente a tokenizar antes de parsear")
+    argumentos.add_argument("--blocks", type=int, default=10)
+    argumentos.add_argument("--statements", type=int, default=20000)
+    argumentos.add_argument("--mode", default="lalr1")
+    args = argumentos.parse_args()
+    
+    parser = build_parser(statement_grammar(args.blocks), args.mode)
+    terminales = parser.get_grammar_data()["terminals"]
+    lexer = compile_lexer(LEXER_SPEC, terminales)
+    
+    rnd = random.Random(11)
+    path = os.path.join(tempfile.mkdtemp(prefix="lr-lexer-"), "programa.src")
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(args.statements):
+            f.write(statement(rnd, args.blocks) + "\n")
+    with open(path, encoding="utf-8") as f:
+        tokens = sum(1 for _ in lexer.stream_tokens(f))
+    print(f"fuente: {os.path.getsize(path) / 1024 / 1024:.1f} MiB, {tokens:,} tokens")
+    
+    def dos_pasadas():
+        with open(path, encoding="utf-8") as f:
+            texto = f.read()
+        entrada = naive_tokens(texto, [("id", "[A-Za-z_][A-Za-z0-9_]*"), ("num", "[0-9]+")], set(terminales))
+        return TransitionTable(entrada, parser.table, record=False).get_summary()
+    
+    def streaming():
+        with open(path, encoding="utf-8") as f:
+            return parser.parse_stream(f, lexer).get_summary()
+    
+    previo, previo_pico, esperado = measure(dos_pasadas)
+    stream, stream_pico, obtenido = measure(streaming)
+    print(f"tokenizar y parsear: {previo:.2f} s ({tokens / previo:,.0f} tokens/s), pico {previo_pico / 1024 / 1024:.1f} MiB")
+    print(f"lexer en streaming:  {stream:.2f} s ({tokens / stream:,.0f} tokens/s), pico {stream_pico / 1024 / 1024:.1f} MiB "
+          f"({previo / stream:.1f}x)")
+    
+    claves = ("accepted", "steps", "error")
+    if not obtenido["accepted"] or any(obtenido[c] != esperado[c] for c in claves):
+        print(f"FALLO: resultados distintos ({obtenido['error'] or esperado['error']})")
+        sys.exit(1)
+    
+    # El endpoint de pasos usa stream_input con el lexer y sin traza: cada
+    # desplazamiento debe llevar el terminal que consumió.
+    with open(path, encoding="utf-8") as f:
+        muestra = "".join(f.readline() for _ in range(200))
+    desplazados = [paso["symbol"] for paso in parser.stream_input(muestra, lexer).steps() if "symbol" in paso]
+    leidos = naive_tokens(muestra, [("id", "[A-Za-z_][A-Za-z0-9_]*"), ("num", "[0-9]+")], set(terminales)).split()
+    if desplazados != leidos:
+        print(f"FALLO: los pasos en streaming no coinciden con los tokens ({desplazados[:5]} frente a {leidos[:5]})")
+        sys.exit(1)
+    print(f"OK: {args.statements} sentencias aceptadas en una sola pasada")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,80 @@
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import expression
+from timing import measure
+
+from src.comp.lexer import compile_lexer
+from src.comp.parser import build_parser
+
+GRAMMAR = """
+E -> E + T
+E -> E - T
+E -> T
+T -> T * F
+T -> F
+F -> ( E )
+F -> num
+"""
+
+
+def actions(parser):
+    numero = parser.table.compressed.reglas.index
+    return {
+        numero("E -> E + T"): lambda a, _, b: a + b,
+        numero("E -> E - T"): lambda a, _, b: a - b,
+        numero("T -> T * F"): lambda a, _, b: a * b,
+        numero("F -> ( E )"): lambda _, e, __: e,
+        numero("F -> num"): int
+    }
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Árbol sintáctico en arrays frente a reconstruirlo desde la traza")
+    argumentos.add_argument("--tokens", type=int, nargs="+", default=[500, 2000, 8000, 100000])
+    argumentos.add_argument("--trace-limit", type=int, default=8000, help="mayor entrada para la que se materializa la traza")
+    argumentos.add_argument("--mode", default="lalr1")
+    args = argumentos.parse_args()
+    
+    parser = build_parser(GRAMMAR, args.mode)
+    lexer = compile_lexer("num = [0-9]", parser.get_grammar_data()["terminals"])
+    acciones = actions(parser)
+    rnd = random.Random(5)
+    
+    errores = 0
+    for cantidad in args.tokens:
+        texto = "".join(expression(
+            rnd, cantidad, lambda r: r.choice("+-+-*"), lambda r: str(r.randrange(10)), 0.05, 20, 30
+        ))
+        arbol, arbol_pico, tabla = measure(
+            lambda: parser.parse_input(texto, lexer, record=False, build_tree=True, actions=acciones)
+        )
+        tree = tabla.tree
+        linea = f"{cantidad} tokens: árbol {arbol * 1000:.1f} ms, pico {arbol_pico / 1024:.0f} KiB ({len(tree)} nodos)"
+        
+        if cantidad <= args.trace_limit:
+            traza, traza_pico, transiciones = measure(lambda: parser.parse_input(texto, lexer).transitions)
+            reducciones = [t["rule_number"] for t in transiciones if "rule_number" in t]
+            internos = [p for p in tree.production if p >= 0]
+            errores += reducciones != internos
+            linea += f" | traza {traza * 1000:.1f} ms, pico {traza_pico / 1024:.0f} KiB"
+        
+        if not tabla.accepted or tree.end[tree.root] - tree.start[tree.root] != len(tree.lexemes):
+            errores += 1
+        # Las acciones evalúan la expresión: para entradas pequeñas se compara con Python.
+        if cantidad <= 2000 and tree.value != eval(texto, {}):
+            errores += 1
+        print(linea)
+    
+    if errores:
+        print(f"FALLO: {errores} árboles no coinciden con la traza o con el valor esperado")
+        sys.exit(1)
+    print("OK: los árboles reproducen las reducciones de la traza")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,62 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from concurrent_builds import grammars
+
+from src.comp.artifact import ARTIFACT_SUFFIX, load_directory, write_artifact
+from src.comp.parser import build_parser
+from src.comp.transition_table import TransitionTable
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Arranque con artefactos precompilados frente a construir las gramáticas")
+    argumentos.add_argument("--grammars", type=int, default=50)
+    argumentos.add_argument("--output", default=None, help="directorio para los artefactos (temporal por defecto)")
+    args = argumentos.parse_args()
+    
+    casos = grammars(args.grammars)
+    directorio = args.output or tempfile.mkdtemp(prefix="lr-artifacts-")
+    os.makedirs(directorio, exist_ok=True)
+    
+    inicio = time.perf_counter()
+    construidos = {}
+    for i, (contenido, mode) in enumerate(casos):
+        parser = build_parser(contenido, mode)
+        construidos[write_artifact(parser, os.path.join(directorio, f"g{i}.{mode}{ARTIFACT_SUFFIX}"))] = parser
+    construccion = time.perf_counter() - inicio
+    print(f"construcción: {len(casos)} gramáticas en {construccion:.3f} s")
+    
+    tamano = sum(os.path.getsize(os.path.join(directorio, nombre)) for nombre in os.listdir(directorio))
+    print(f"artefactos: {tamano / 1024:.1f} KiB en {directorio}")
+    
+    inicio = time.perf_counter()
+    cargados = load_directory(directorio)
+    carga = time.perf_counter() - inicio
+    print(f"carga: {len(cargados)} artefactos en {carga * 1000:.2f} ms "
+          f"({construccion / carga if carga else float('inf'):.0f}x más rápido)")
+    
+    errores = 0
+    for fingerprint, parser in construidos.items():
+        cargado = cargados.get(fingerprint)
+        if cargado is None or cargado.get_table_data() != parser.get_table_data():
+            errores += 1
+            continue
+        terminales = cargado.get_grammar_data()["terminals"]
+        entrada = " ".join(terminales[i % len(terminales)] for i in range(32)) if terminales else ""
+        esperado = TransitionTable(entrada, parser.table).get_summary()
+        if TransitionTable(entrada, cargado.table).get_summary() != esperado:
+            errores += 1
+    
+    if errores:
+        print(f"FALLO: {errores} artefactos no reproducen la tabla construida")
+        sys.exit(1)
+    print("OK: todas las tablas cargadas coinciden con las construidas")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
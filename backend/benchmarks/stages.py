@@ -0,0 +1,247 @@
+import argparse
+import gc
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import time
+import tracemalloc
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import CORPUS, SYNTHETIC, sentence
+
+from src.comp.afd import AFD
+from src.comp.afn import AFN
+from src.comp.grammar import Grammar
+from src.comp.table import LRTable
+from src.comp.transition_table import TransitionTable
+from src.comp.visualizer import Visualizer
+
+BASELINE_FORMAT = 1
+CALIBRATION_ROUNDS = 20000
+
+# Mismo orden que en el servidor: el AFN solo se construye para dibujarlo.
+STAGES = ("grammar", "afd", "table", "parse", "afn", "visualizer")
+
+
+def cases(sizes, filtros):
+    casos = list(CORPUS.items())
+    for nombre, generador in SYNTHETIC.items():
+        casos += [(f"{nombre}-{tamano}", generador(tamano)) for tamano in sizes]
+    if filtros:
+        casos = [(nombre, contenido) for nombre, contenido in casos if any(f in nombre for f in filtros)]
+    return casos
+
+
+def calibrate():
+    # Carga fija en Python puro, ajena a src/comp. En máquinas compartidas la
+    # velocidad cambia de un segundo a otro; el cociente entre una etapa y
+    # esta carga medida junto a ella es mucho más estable que el tiempo.
+    inicio = time.perf_counter()
+    tabla = {}
+    for i in range(CALIBRATION_ROUNDS):
+        tabla[i % 997] = tabla.get(i % 997, 0) + len(str(i))
+    sorted(tabla.items(), key=lambda par: par[1])
+    return time.perf_counter() - inicio
+
+
+def pipeline(contenido, mode, texto, render, medir):
+    grammar = medir("grammar", lambda: Grammar(contenido))
+    afd = medir("afd", lambda: AFD(grammar, mode))
+    table = medir("table", lambda: LRTable(afd))
+    tabla = medir("parse", lambda: TransitionTable(texto, table, record=False))
+    afn = medir("afn", lambda: AFN(grammar))
+    
+    visualizer = Visualizer()
+    
+    def dibujar():
+        dot = visualizer.afd_graph(afd)
+        if render:
+            visualizer.render(dot, "svg")
+        return dot
+    
+    dot = medir("visualizer", dibujar)
+    return {
+        "grammar": {
+            "rules": len(grammar.producciones),
+            "symbols": len(grammar.simbolos),
+            "non_terminals": grammar.num_no_terminales
+        },
+        "afd": {
+            "states": len(afd),
+            "items": afd.count_items(),
+            "states_before_merge": afd.states_before_merge
+        },
+        "table": {
+            "entries": sum(len(fila) for fila in table.action_table.values())
+                       + sum(len(fila) for fila in table.goto_table.values()),
+            "conflicts": len(table.conflicts),
+            "compressed_bytes": table.compressed.nbytes()
+        },
+        "parse": {
+            "tokens": tabla.current_position,
+            "steps": tabla.step_count,
+            "accepted": tabla.accepted
+        },
+        "afn": {
+            "states": len(afn)
+        },
+        "visualizer": {
+            "dot_lines": len(dot.body)
+        }
+    }
+
+
+def measure(contenido, mode, texto, repeat, render):
+    tiempos = {etapa: [] for etapa in STAGES}
+    relativos = {etapa: [] for etapa in STAGES}
+    
+    def cronometrar(nombre, fn):
+        inicio = time.perf_counter()
+        resultado = fn()
+        tiempos[nombre].append(time.perf_counter() - inicio)
+        return resultado
+    
+    # Como timeit: el recolector se desactiva durante las pasadas cronometradas
+    # para que una colección no caiga en una etapa u otra al azar.
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            antes = calibrate()
+            conteos = pipeline(contenido, mode, texto, render, cronometrar)
+            carga = (antes + calibrate()) / 2
+        finally:
+            gc.enable()
+        for etapa in STAGES:
+            relativos[etapa].append(tiempos[etapa][-1] / carga)
+    
+    # El pico se mide en una pasada aparte: tracemalloc ralentiza las etapas.
+    picos = {}
+    
+    def pico(nombre, fn):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        resultado = fn()
+        picos[nombre] = tracemalloc.get_traced_memory()[1] - base
+        return resultado
+    
+    gc.collect()
+    tracemalloc.start()
+    try:
+        pipeline(contenido, mode, texto, render, pico)
+    finally:
+        tracemalloc.stop()
+    
+    return {
+        etapa: {
+            "time": min(tiempos[etapa]),
+            "relative": statistics.median(relativos[etapa]),
+            "peak": picos[etapa],
+            "counts": conteos[etapa]
+        }
+        for etapa in STAGES
+    }
+
+
+def compare(resultados, linea_base, umbral, min_time, min_peak):
+    regresiones = []
+    cambios = []
+    for caso, etapas in resultados.items():
+        anterior = linea_base.get(caso)
+        if anterior is None:
+            continue
+        for etapa, actual in etapas.items():
+            previo = anterior.get(etapa)
+            if previo is None:
+                continue
+            if actual["counts"] != previo["counts"]:
+                cambios.append(f"{caso} {etapa}: {previo['counts']} -> {actual['counts']}")
+            # El tiempo relativo decide; el absoluto solo filtra diferencias
+            # demasiado pequeñas para ser algo más que ruido.
+            if (actual["relative"] > previo["relative"] * (1 + umbral)
+                    and actual["time"] - previo["time"] > min_time):
+                regresiones.append(f"{caso} {etapa}: tiempo {previo['time'] * 1000:.1f} -> {actual['time'] * 1000:.1f} ms "
+                                   f"({actual['relative'] / previo['relative']:.2f}x frente a la calibración)")
+            if actual["peak"] > previo["peak"] * (1 + umbral) and actual["peak"] - previo["peak"] > min_peak:
+                regresiones.append(f"{caso} {etapa}: pico {previo['peak'] / 1024:.0f} -> {actual['peak'] / 1024:.0f} KiB")
+    return regresiones, cambios
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Tiempo, memoria y tamaño de cada etapa de construcción y análisis")
+    argumentos.add_argument("--sizes", type=int, nargs="+", default=[8, 32, 64], help="tamaños de las gramáticas sintéticas")
+    argumentos.add_argument("--modes", nargs="+", default=["lalr1", "lr1"])
+    argumentos.add_argument("--cases", nargs="*", default=[], help="solo los casos cuyo nombre contenga alguno de estos textos")
+    argumentos.add_argument("--tokens", type=int, default=5000, help="longitud de la entrada generada para cada gramática")
+    argumentos.add_argument("--repeat", type=int, default=5, help="repeticiones por caso; se toma el mejor tiempo")
+    argumentos.add_argument("--render", action="store_true", help="incluye el renderizado con Graphviz en la etapa visualizer")
+    argumentos.add_argument("--baseline", help="JSON con una línea base con la que comparar")
+    argumentos.add_argument("--save-baseline", help="guarda los resultados como línea base en este JSON")
+    argumentos.add_argument("--threshold", type=float, default=0.3, help="empeoramiento relativo que cuenta como regresión")
+    argumentos.add_argument("--min-time", type=float, default=0.002, help="diferencia mínima en segundos para señalar un tiempo")
+    argumentos.add_argument("--min-peak", type=int, default=64 * 1024, help="diferencia mínima en bytes para señalar un pico")
+    args = argumentos.parse_args()
+    
+    if args.render and shutil.which("dot") is None:
+        print("aviso: no se encontró el ejecutable dot de Graphviz, se omite el renderizado")
+        args.render = False
+    
+    configuracion = {"tokens": args.tokens, "render": args.render, "calibration_rounds": CALIBRATION_ROUNDS}
+    linea_base = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            linea_base = json.load(f)
+        if linea_base.get("format") != BASELINE_FORMAT or linea_base.get("config") != configuracion:
+            print(f"FALLO: la línea base se midió con otra configuración ({linea_base.get('config')})")
+            sys.exit(1)
+    
+    resultados = {}
+    rechazadas = []
+    for nombre, contenido in cases(args.sizes, args.cases):
+        # La entrada depende solo del caso: los pasos del driver son comparables entre ejecuciones.
+        texto = sentence(Grammar(contenido), args.tokens, random.Random(zlib.crc32(nombre.encode())))
+        for mode in args.modes:
+            caso = f"{nombre}/{mode}"
+            etapas = resultados[caso] = measure(contenido, mode, texto, args.repeat, args.render)
+            print(caso)
+            for etapa in STAGES:
+                r = etapas[etapa]
+                conteos = ", ".join(f"{clave}={valor}" for clave, valor in r["counts"].items())
+                print(f"  {etapa:<11} {r['time'] * 1000:9.2f} ms {r['peak'] / 1024:9.0f} KiB  {conteos}")
+            if not etapas["parse"]["counts"]["accepted"] and not etapas["table"]["counts"]["conflicts"]:
+                rechazadas.append(caso)
+    
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"format": BASELINE_FORMAT, "config": configuracion, "results": resultados}, f, indent=1)
+        print(f"línea base guardada en {args.save_baseline}")
+    
+    if rechazadas:
+        print(f"FALLO: tablas sin conflictos rechazan su entrada generada: {', '.join(rechazadas)}")
+        sys.exit(1)
+    
+    if linea_base is None:
+        print(f"OK: {len(resultados)} casos medidos")
+        return
+    
+    regresiones, cambios = compare(
+        resultados, linea_base["results"], args.threshold, args.min_time, args.min_peak
+    )
+    for linea in cambios:
+        print(f"cambio de tamaño: {linea}")
+    for linea in regresiones:
+        print(f"regresión: {linea}")
+    if regresiones or cambios:
+        print(f"FALLO: {len(regresiones)} regresiones por encima del {args.threshold:.0%} "
+              f"y {len(cambios)} cambios de tamaño frente a {args.baseline}")
+        sys.exit(1)
+    print(f"OK: {len(resultados)} casos sin regresiones frente a {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,28 @@
+import gc
+import time
+import tracemalloc
+
+
+def timed(fn, repeticiones=1):
+    # Mejor tiempo de `repeticiones` llamadas y el resultado de la última.
+    mejor = None
+    for _ in range(repeticiones):
+        gc.collect()
+        inicio = time.perf_counter()
+        resultado = fn()
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor, resultado
+
+
+def measure(fn):
+    # Tiempo de una llamada y pico de memoria de otra: tracemalloc ralentiza
+    # lo que mide.
+    inicio = time.perf_counter()
+    resultado = fn()
+    duracion = time.perf_counter() - inicio
+    tracemalloc.start()
+    fn()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return duracion, pico, resultado
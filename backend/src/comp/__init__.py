@@ -1,5 +1,5 @@
 from .grammar import Grammar
-from .item import LR1Item
+from .item import LR1Item, ItemStore
 from .afn import AFN
 from .afd import AFD, AFDState
 from .table import LRTable
@@ -13,6 +13,7 @@ __author__ = "Parser LR Team"
 __all__ = [
     "Grammar",
     "LR1Item", 
+    "ItemStore",
     "AFN",
     "AFD",
     "AFDState",
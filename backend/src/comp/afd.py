@@ -1,11 +1,27 @@
-from .item import LR1Item
+from collections import deque
+
+from .context import BuildContext
+from .grammar import iter_bits
+from .incremental import GrammarDelta
+from .item import ItemStore
+
+LR0 = 'lr0'
+SLR1 = 'slr1'
+LR1 = 'lr1'
+LALR1 = 'lalr1'
+MODES = (LR0, SLR1, LR1, LALR1)
+LOOKAHEAD_MODES = (LR1, LALR1)
+MODE_NAMES = {LR0: 'LR(0)', SLR1: 'SLR(1)', LR1: 'LR(1)', LALR1: 'LALR(1)'}
 
 class AFDState:
     
-    def __init__(self, items):
-        self.items = items
+    def __init__(self, kernel, cores, item_store):
+        self.kernel = kernel
+        self.cores = cores
+        self.item_store = item_store
         self.transitions = {}
-        self.id = frozenset(item.id for item in items)
+        self.id = kernel
+        self.number = -1
     
     def __eq__(self, other):
         if not isinstance(other, AFDState):
@@ -15,6 +31,16 @@ class AFDState:
     def __hash__(self):
         return hash(self.id)
     
+    @property
+    def items(self):
+        items = []
+        for core, lookaheads in self.cores.items():
+            if not lookaheads:
+                items.append(self.item_store.get_core(core, None))
+            for lookahead in iter_bits(lookaheads):
+                items.append(self.item_store.get_core(core, lookahead))
+        return items
+    
     def add_transition(self, symbol, target_state):
         self.transitions[symbol] = target_state
     
@@ -24,108 +50,266 @@ class AFDState:
 
 class AFD:
     
-    _state_cache = {}
-    
-    def __init__(self, afn):
-        self.afn = afn
-        self.grammar = afn.grammar
+    def __init__(self, grammar, mode=LR1, context=None):
+        if mode not in MODES:
+            raise ValueError(f"Modo de construcción desconocido: '{mode}'")
+        
+        self.grammar = grammar
+        self.mode = mode
+        self.context = context if context is not None else BuildContext()
+        self.uses_lookaheads = mode in LOOKAHEAD_MODES
+        self.item_store = ItemStore.for_grammar(self.grammar)
         self.estados = {}
+        self.state_numbers = {}
         self.estado_inicial = None
         self.transitions_map = {}
-        AFD._state_cache.clear()
+        self.states_before_merge = 0
+        self.merge_conflicts = []
+        if self.context.previous_afd is not None and mode != LALR1:
+            self.context.delta = GrammarDelta(self.context.previous_afd, grammar, self.uses_lookaheads)
         self._build_afd()
+        self.context = None
+    
+    def __getstate__(self):
+        # Los estados se guardan como tuplas planas (kernel, cores, transiciones
+        # por número) en lugar del grafo de objetos; el ItemStore se reconstruye
+        # a partir de la gramática al cargar.
+        estado = self.__dict__.copy()
+        estado['item_store'] = None
+        estado['estado_inicial'] = None
+        estado['state_numbers'] = None
+        estado['estados'] = [
+            (s.kernel, s.cores, [(simbolo, destino.number) for simbolo, destino in s.transitions.items()])
+            for s in self.estados.values()
+        ]
+        return estado
+    
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self.item_store = ItemStore.for_grammar(self.grammar)
+        self.estados = {}
+        self.state_numbers = {}
+        for kernel, cores, _ in estado['estados']:
+            self._register_state(AFDState(kernel, cores, self.item_store))
+        for numero, (_, _, transiciones) in enumerate(estado['estados']):
+            for simbolo, destino in transiciones:
+                self.estados[numero].add_transition(simbolo, self.estados[destino])
+        self.estado_inicial = self.estados.get(0)
     
     def _build_afd(self):
-        if not self.afn.nodo_inicial:
+        if not self.grammar.producciones:
             return
         
-        initial_items = self._closure([self.afn.nodo_inicial])
-        self.estado_inicial = self._make_state(initial_items)
-        self.estados[0] = self.estado_inicial
+        lookaheads = 1 << self.grammar.end_id if self.uses_lookaheads else 0
+        kernel = ((self.item_store.core_id(0, 0), lookaheads),)
+        self.estado_inicial = self._make_state(kernel)
+        self._register_state(self.estado_inicial)
         
         self._build_states()
+        self.states_before_merge = len(self.estados)
+        
+        if self.mode == LALR1:
+            self._merge_cores()
     
-    def _closure(self, items):
-        resultado = list(items)
-        visitados = set(item.id for item in items)
-        cola = list(items)
+    def _closure(self, kernel):
+        store = self.item_store
+        core_next = store.core_next
+        terminal_flags = self.grammar.terminal_flags
+        suffix_first = self.grammar.suffix_first
+        cores = dict(kernel)
         
-        while cola:
-            item = cola.pop(0)
-            next_symbol = item.get_next_symbol()
+        for core, lookaheads in kernel:
+            simbolo = core_next[core]
+            if simbolo < 0 or terminal_flags[simbolo]:
+                continue
             
-            if next_symbol and not self.grammar.is_terminal(next_symbol):
-                beta, alpha = item.get_beta_alpha()
-                first_beta_alpha = self.grammar.calculate_first(beta + [alpha])
-                
-                producciones = self.grammar.get_producciones(next_symbol)
-                for produccion in producciones:
-                    for first_symbol in first_beta_alpha:
-                        if first_symbol != 'ε':
-                            new_item = LR1Item(produccion, 0, first_symbol)
-                            if new_item.id not in visitados:
-                                visitados.add(new_item.id)
-                                resultado.append(new_item)
-                                cola.append(new_item)
-        
-        return resultado
-    
-    def _goto(self, items, symbol):
-        next_items = []
-        
-        for item in items:
-            if (not item.is_reducible() and 
-                item.get_next_symbol() == symbol):
-                next_item = item.advance_dot()
-                if next_item:
-                    next_items.append(next_item)
-        
-        if next_items:
-            return self._closure(next_items)
-        return []
-    
-    def _make_state(self, items):
-        state_id = frozenset(item.id for item in items)
-        
-        if state_id in AFD._state_cache:
-            return AFD._state_cache[state_id]
-        
-        state = AFDState(items)
-        AFD._state_cache[state_id] = state
-        return state
+            if not self.uses_lookaheads:
+                for producciones, _, _ in store.closure_template(simbolo, False):
+                    for destino in producciones:
+                        cores.setdefault(destino, 0)
+                continue
+            
+            bits, nullable = suffix_first[store.core_prod[core]][store.core_dot[core] + 1]
+            if nullable:
+                bits |= lookaheads
+            if not bits:
+                continue
+            
+            for producciones, spontaneous, propagates in store.closure_template(simbolo):
+                nuevos = spontaneous | bits if propagates else spontaneous
+                for destino in producciones:
+                    cores[destino] = cores.get(destino, 0) | nuevos
+        
+        return cores
+    
+    def _goto(self, estado):
+        core_next = self.item_store.core_next
+        destinos = {}
+        
+        for core, lookaheads in estado.cores.items():
+            simbolo = core_next[core]
+            if simbolo < 0:
+                continue
+            bucket = destinos.get(simbolo)
+            if bucket is None:
+                bucket = destinos[simbolo] = {}
+            bucket[core + 1] = bucket.get(core + 1, 0) | lookaheads
+        
+        return {
+            simbolo: tuple(sorted(bucket.items()))
+            for simbolo, bucket in destinos.items()
+        }
+    
+    def _make_state(self, kernel):
+        return self.context.intern_state(kernel, self._new_state)
+    
+    def _new_state(self, kernel):
+        delta = self.context.delta
+        anterior = delta.previous_state(kernel, self.item_store) if delta is not None else None
+        if anterior is None:
+            return AFDState(kernel, self._closure(kernel), self.item_store)
+        return self._reuse_state(anterior, kernel)
+    
+    def _reuse_state(self, anterior, kernel=None):
+        # Estado limpio tras una edición: su clausura es la del estado anterior
+        # con el mismo kernel y sus sucesores se traducen sin recalcular GOTO.
+        estado = self.context.reused_states.get(anterior.number)
+        if estado is None:
+            delta = self.context.delta
+            if kernel is None:
+                kernel = delta.translate_kernel(anterior.kernel)
+            estado = AFDState(kernel, delta.translate_cores(anterior.cores), self.item_store)
+            self.context.reused_states[anterior.number] = estado
+            self.context.reused[kernel] = anterior
+        return estado
+    
+    def _successors(self, estado):
+        anterior = self.context.reused.get(estado.id) if self.context.reused else None
+        if anterior is None:
+            return {simbolo: self._make_state(kernel) for simbolo, kernel in self._goto(estado).items()}
+        
+        # Los sucesores de un estado reutilizado se buscan por su número en el
+        # AFD anterior: solo la primera vez que aparece cada uno se construye
+        # su kernel, y solo los sucios pasan por la tabla de kernels.
+        delta = self.context.delta
+        limpios = delta.clean_states(self.item_store)
+        por_numero = self.context.reused_states
+        nnt = delta.previous_non_terminals
+        shift = delta.shift
+        sucesores = {}
+        for simbolo, destino in anterior.transitions.items():
+            nuevo = por_numero.get(destino.number)
+            if nuevo is None:
+                if limpios[destino.number]:
+                    nuevo = self._reuse_state(destino)
+                else:
+                    nuevo = self._make_state(delta.translate_kernel(destino.kernel))
+                    por_numero[destino.number] = nuevo
+            sucesores[simbolo + shift if simbolo >= nnt else simbolo] = nuevo
+        return sucesores
+    
+    def _register_state(self, state):
+        state.number = len(self.estados)
+        self.estados[state.number] = state
+        self.state_numbers[state.id] = state.number
     
     def _build_states(self):
-        estados_pendientes = [self.estado_inicial]
-        estados_procesados = {self.estado_inicial.id}
-        counter = 1
+        estados_pendientes = deque([self.estado_inicial])
         
         while estados_pendientes:
-            estado_actual = estados_pendientes.pop(0)
+            self.context.check()
+            estado_actual = estados_pendientes.popleft()
             
-            simbolos = set()
-            for item in estado_actual.items:
-                if not item.is_reducible():
-                    simbolos.add(item.get_next_symbol())
+            estado_actual.transitions = self._successors(estado_actual)
             
-            for symbol in simbolos:
-                goto_items = self._goto(estado_actual.items, symbol)
-                
-                if goto_items:
-                    nuevo_estado = self._make_state(goto_items)
-                    
-                    estado_actual.add_transition(symbol, nuevo_estado)
-                    
-                    if nuevo_estado.id not in estados_procesados:
-                        estados_procesados.add(nuevo_estado.id)
-                        estados_pendientes.append(nuevo_estado)
-                        self.estados[counter] = nuevo_estado
-                        counter += 1
+            for nuevo_estado in estado_actual.transitions.values():
+                if nuevo_estado.number < 0:
+                    self._register_state(nuevo_estado)
+                    estados_pendientes.append(nuevo_estado)
+    
+    def _merge_cores(self):
+        grupos = {}
+        for estado in self.estados.values():
+            core_key = tuple(core for core, _ in estado.kernel)
+            grupos.setdefault(core_key, []).append(estado)
+        
+        fusionados = {}
+        merges = []
+        for miembros in grupos.values():
+            kernel = {}
+            cores = {}
+            for estado in miembros:
+                for core, lookaheads in estado.kernel:
+                    kernel[core] = kernel.get(core, 0) | lookaheads
+                for core, lookaheads in estado.cores.items():
+                    cores[core] = cores.get(core, 0) | lookaheads
+            
+            merged = AFDState(tuple(sorted(kernel.items())), cores, self.item_store)
+            merges.append((merged, miembros))
+            for estado in miembros:
+                fusionados[estado.id] = merged
+        
+        viejos = self.estados
+        self.estados = {}
+        self.state_numbers = {}
+        for estado in viejos.values():
+            merged = fusionados[estado.id]
+            if merged.id not in self.state_numbers:
+                self._register_state(merged)
+            for symbol, target in estado.transitions.items():
+                merged.add_transition(symbol, fusionados[target.id])
+        
+        self.estado_inicial = fusionados[self.estado_inicial.id]
+        for merged, miembros in merges:
+            self._record_merge_conflicts(merged, miembros)
+    
+    def _reduce_lookaheads(self, estado):
+        core_next = self.item_store.core_next
+        core_prod = self.item_store.core_prod
+        reduces = {}
+        for core, lookaheads in estado.cores.items():
+            if core_next[core] < 0 and core_prod[core] != 0:
+                reduces[core_prod[core]] = reduces.get(core_prod[core], 0) | lookaheads
+        return reduces
+    
+    def _record_merge_conflicts(self, merged, miembros):
+        if len(miembros) < 2:
+            return
+        
+        reduces = self._reduce_lookaheads(merged)
+        if len(reduces) < 2:
+            return
+        
+        previos = 0
+        for estado in miembros:
+            vistos = 0
+            for lookaheads in self._reduce_lookaheads(estado).values():
+                previos |= vistos & lookaheads
+                vistos |= lookaheads
+        
+        producciones = sorted(reduces)
+        por_terminal = {}
+        for i, p in enumerate(producciones):
+            for q in producciones[i + 1:]:
+                for terminal in iter_bits(reduces[p] & reduces[q] & ~previos):
+                    por_terminal.setdefault(terminal, set()).update((p, q))
+        
+        for terminal, conflictivas in sorted(por_terminal.items()):
+            self.merge_conflicts.append({
+                'state': merged.number,
+                'terminal': self.grammar.simbolos[terminal],
+                'productions': sorted(conflictivas)
+            })
+    
+    def count_items(self):
+        cores = {}
+        for estado in self.estados.values():
+            for core, lookaheads in estado.cores.items():
+                cores[core] = cores.get(core, 0) | lookaheads
+        return sum(bin(lookaheads).count("1") if lookaheads else 1 for lookaheads in cores.values())
     
     def get_state_number(self, state):
-        for num, st in self.estados.items():
-            if st == state:
-                return num
-        return -1
+        return self.state_numbers.get(state.id, -1)
     
     def __len__(self):
         return len(self.estados)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from .item import LR1Item
+from .item import ItemStore
 
 class AFN:
     def __init__(self, grammar):
@@ -11,31 +11,29 @@ class AFN:
         if not self.grammar.reglas:
             return
         
-        regla_inicial = self.grammar.reglas[0]
-        self.nodo_inicial = LR1Item(regla_inicial, 0, '$')
+        self.nodo_inicial = ItemStore.for_grammar(self.grammar).get(0, 0, self.grammar.end_id)
         self.estados[self.nodo_inicial.id] = self.nodo_inicial
         
         self._build_states(self.nodo_inicial)
     
     def _build_states(self, nodo_inicial):
         visitados = set()
+        pendientes = [nodo_inicial]
         
-        def dfs(nodo):
-            if nodo is None or nodo.id in visitados:
-                return
+        while pendientes:
+            nodo = pendientes.pop()
+            if nodo.id in visitados:
+                continue
             
             visitados.add(nodo.id)
             
-            siguiente = nodo.next_transition(self.estados)
-            if siguiente is not None:
-                dfs(siguiente)
-            
             epsilon_transitions = nodo.next_transition_e(self.estados, self.grammar)
             if epsilon_transitions:
-                for item in epsilon_transitions:
-                    dfs(item)
-        
-        dfs(nodo_inicial)
+                pendientes.extend(reversed(epsilon_transitions))
+            
+            siguiente = nodo.next_transition(self.estados)
+            if siguiente is not None:
+                pendientes.append(siguiente)
     
     def __len__(self):
         return len(self.estados)
\ No newline at end of file
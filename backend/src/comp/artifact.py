@@ -0,0 +1,242 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from .afd import LR1, MODES, MODE_NAMES
+from .cache import grammar_fingerprint, normalize_grammar
+from .compressed_table import CompressedTable, copy_arrays
+from .parser import LR1Parser, build_parser
+from .table import action_table_of, goto_table_of, table_to_dict
+
+MAGIC = b"LRPT"
+FORMAT_VERSION = 4
+ARTIFACT_SUFFIX = ".lrt"
+ALIGNMENT = 8
+
+# magic, versión, longitud de la cabecera JSON
+_PREFIX = struct.Struct("<4sII")
+
+TABLE_ARRAYS = ('prod_lhs', 'prod_len', 'action_base', 'action_check', 'action_value',
+                'action_default', 'goto_base', 'goto_check', 'goto_value', 'goto_default',
+                'follow_offset', 'follow_columns', 'goto_offset', 'goto_symbols', 'default_offset',
+                'default_columns')
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_artifact(parser, path):
+    if not parser.is_built:
+        raise ValueError(f"Parser no construido: {parser.build_errors}")
+    
+    table = parser.table
+    compressed = table.compressed
+    arrays = {nombre: getattr(compressed, nombre) for nombre in TABLE_ARRAYS}
+    
+    grammar_content = normalize_grammar(parser.grammar_content)
+    header = {
+        'fingerprint': grammar_fingerprint(grammar_content, parser.mode),
+        'mode': parser.mode,
+        'grammar': grammar_content,
+        'byteorder': sys.byteorder,
+        'itemsize': array('i').itemsize,
+        'simbolos': list(compressed.simbolos),
+        'num_no_terminales': compressed.num_no_terminales,
+        'reglas': list(compressed.reglas),
+        'conflicts': [
+            [estado, terminal, info]
+            for estado, estado_conflicts in table.conflicts.items()
+            for terminal, info in estado_conflicts.items()
+        ],
+        'conflict_codes': [
+            [estado, columna, list(codes)]
+            for estado, celdas in compressed.conflict_codes.items()
+            for columna, codes in celdas.items()
+        ],
+        'summary': parser.get_summary(),
+        'arrays': {}
+    }
+    
+    offset = 0
+    for nombre, valores in arrays.items():
+        header['arrays'][nombre] = [offset, len(valores)]
+        offset = _align(offset + len(valores) * header['itemsize'])
+    
+    datos = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    inicio = _align(_PREFIX.size + len(datos))
+    
+    temporal = f"{path}.tmp"
+    with open(temporal, 'wb') as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(datos)))
+        f.write(datos)
+        f.write(bytes(inicio - _PREFIX.size - len(datos)))
+        posicion = 0
+        for nombre, valores in arrays.items():
+            offset = header['arrays'][nombre][0]
+            f.write(bytes(offset - posicion))
+            contenido = valores.tobytes()
+            f.write(contenido)
+            posicion = offset + len(contenido)
+    os.replace(temporal, path)
+    return header['fingerprint']
+
+
+class ArtifactTable:
+    
+    def __init__(self, mode, simbolos, num_no_terminales, reglas, conflicts, arrays, conflict_codes=()):
+        self.mode = mode
+        celdas = {}
+        for estado, columna, codes in conflict_codes:
+            celdas.setdefault(estado, {})[columna] = tuple(codes)
+        self.compressed = CompressedTable(
+            simbolos, num_no_terminales, reglas, *(arrays[nombre] for nombre in TABLE_ARRAYS), celdas
+        )
+        self.terminales = set(simbolos[num_no_terminales:])
+        self.no_terminales = list(simbolos[:num_no_terminales])
+        self.conflicts = {}
+        for estado, terminal, info in conflicts:
+            self.conflicts.setdefault(estado, {})[terminal] = {
+                'type': info['type'],
+                'action1': tuple(info['action1']),
+                'action2': tuple(info['action2'])
+            }
+    
+    def __getstate__(self):
+        return copy_arrays(self.__dict__)
+    
+    @property
+    def action_table(self):
+        return action_table_of(self.compressed)
+    
+    @property
+    def goto_table(self):
+        return goto_table_of(self.compressed)
+    
+    def get_action(self, estado, terminal):
+        return self.compressed.get_action(estado, terminal)
+    
+    def get_goto(self, estado, no_terminal):
+        return self.compressed.get_goto(estado, no_terminal)
+    
+    def has_conflicts(self):
+        return len(self.conflicts) > 0
+    
+    def grammar_class(self):
+        if self.has_conflicts():
+            return None
+        return MODE_NAMES[self.mode]
+    
+    def estimate_memory(self):
+        total = sum(400 * len(celdas) for celdas in self.conflicts.values())
+        return total + self.compressed.nbytes()
+    
+    def to_dict(self):
+        return table_to_dict(
+            self.action_table, self.goto_table, self.terminales, self.no_terminales,
+            self.conflicts, self.compressed.reglas
+        )
+
+
+class ParserArtifact:
+    
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        vista = memoryview(mapa)
+        
+        if len(vista) < _PREFIX.size:
+            raise ValueError(f"Artefacto truncado: {path}")
+        magic, version, longitud = _PREFIX.unpack_from(vista)
+        if magic != MAGIC:
+            raise ValueError(f"No es un artefacto de parser: {path}")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Versión de artefacto no soportada: {version} (se esperaba {FORMAT_VERSION})")
+        
+        header = json.loads(bytes(vista[_PREFIX.size:_PREFIX.size + longitud]))
+        if header['itemsize'] != array('i').itemsize:
+            raise ValueError(f"Tamaño de entero incompatible en el artefacto: {header['itemsize']}")
+        
+        inicio = _align(_PREFIX.size + longitud)
+        arrays = {}
+        for nombre in TABLE_ARRAYS:
+            offset, cantidad = header['arrays'][nombre]
+            desde = inicio + offset
+            hasta = desde + cantidad * header['itemsize']
+            if hasta > len(vista):
+                raise ValueError(f"Artefacto truncado: {path}")
+            valores = vista[desde:hasta].cast('i')
+            if header['byteorder'] != sys.byteorder:
+                valores = array('i', valores)
+                valores.byteswap()
+            arrays[nombre] = valores
+        
+        self.path = path
+        self.fingerprint = header['fingerprint']
+        self.mode = header['mode']
+        self.grammar_content = header['grammar']
+        self.summary = header['summary']
+        self.table = ArtifactTable(
+            self.mode, header['simbolos'], header['num_no_terminales'], header['reglas'],
+            header['conflicts'], arrays, header['conflict_codes']
+        )
+
+
+def load_artifact(path):
+    return ParserArtifact(path)
+
+
+def load_parser(path):
+    return LR1Parser.from_artifact(load_artifact(path))
+
+
+def load_directory(directory):
+    parsers = {}
+    for nombre in sorted(os.listdir(directory)):
+        if not nombre.endswith(ARTIFACT_SUFFIX):
+            continue
+        path = os.path.join(directory, nombre)
+        try:
+            artifact = load_artifact(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"No se pudo cargar el artefacto {path}: {e}")
+            continue
+        parsers[artifact.fingerprint] = LR1Parser.from_artifact(artifact)
+    return parsers
+
+
+def compile_grammar(grammar_path, output_dir, mode=LR1):
+    with open(grammar_path, encoding='utf-8') as f:
+        parser = build_parser(f.read(), mode)
+    
+    nombre = os.path.splitext(os.path.basename(grammar_path))[0]
+    path = os.path.join(output_dir, f"{nombre}.{mode}{ARTIFACT_SUFFIX}")
+    write_artifact(parser, path)
+    return path, parser
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Precompila gramáticas a artefactos binarios de tabla LR")
+    argumentos.add_argument("grammars", nargs="+", help="archivos de gramática")
+    argumentos.add_argument("-o", "--output", default=".", help="directorio de salida")
+    argumentos.add_argument("-m", "--mode", default=LR1, choices=MODES)
+    args = argumentos.parse_args()
+    
+    os.makedirs(args.output, exist_ok=True)
+    for grammar_path in args.grammars:
+        try:
+            path, parser = compile_grammar(grammar_path, args.output, args.mode)
+        except ValueError as e:
+            print(f"{grammar_path}: {e}")
+            sys.exit(1)
+        summary = parser.get_summary()
+        print(f"{grammar_path} -> {path} ({summary['table']['states']} estados, "
+              f"{summary['table']['conflicts']} conflictos)")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
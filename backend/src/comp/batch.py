@@ -0,0 +1,102 @@
+import time
+
+from .transition_table import TransitionTable
+
+BATCH_INLINE_LIMIT = 64
+
+
+def read_inputs(contenido):
+    return [linea.strip() for linea in contenido.splitlines() if linea.strip()]
+
+
+def parse_one(runtime, input_string, include_traces=False, lexer=None, recover=False):
+    inicio = time.perf_counter()
+    tokens = lexer.tokens(input_string) if lexer is not None else None
+    transition_table = TransitionTable(input_string, runtime, record=include_traces, tokens=tokens, recover=recover)
+    resultado = {
+        'input': input_string,
+        'accepted': transition_table.accepted,
+        'error': transition_table.error_message,
+        'steps': transition_table.step_count,
+        'time_ms': (time.perf_counter() - inicio) * 1000
+    }
+    if recover:
+        resultado['errors'] = transition_table.errors
+    if include_traces:
+        resultado['transitions'] = transition_table.transitions
+    return resultado
+
+
+def parse_chunk(runtime, inputs, include_traces=False, lexer=None, recover=False, cancel=None):
+    resultados = []
+    for input_string in inputs:
+        if cancel is not None:
+            cancel.check()
+        resultados.append(parse_one(runtime, input_string, include_traces, lexer, recover))
+    return resultados
+
+
+def _chunks(inputs, chunk_size):
+    for i in range(0, len(inputs), chunk_size):
+        yield inputs[i:i + chunk_size]
+
+
+def _run_chunks(executor, runtime, chunks, include_traces, lexer, recover):
+    # Cada bloque es una tarea más del ejecutor compartido: cuenta para su
+    # cola y su plazo. Si no cabe o falla uno, se cancelan los demás.
+    futures = []
+    try:
+        for chunk in chunks:
+            futures.append(executor.submit(parse_chunk, runtime, chunk, include_traces, lexer, recover))
+        results = []
+        for future in futures:
+            results.extend(executor.result(future))
+        return results
+    except BaseException:
+        for future in futures:
+            future.cancel()
+            future.cancel_token.cancel()
+        raise
+
+
+def parse_batch(runtime, inputs, include_traces=False, max_workers=None, chunk_size=None, lexer=None,
+                recover=False, executor=None):
+    runtime = getattr(runtime, 'compressed', runtime)
+    if executor is not None:
+        max_workers = min(max_workers or executor.max_workers, executor.max_workers)
+    else:
+        max_workers = 1
+    inicio = time.perf_counter()
+    
+    if max_workers == 1 or len(inputs) <= BATCH_INLINE_LIMIT:
+        workers = 1
+        results = parse_chunk(runtime, inputs, include_traces, lexer, recover)
+    else:
+        # Un bloque por trabajador: más bloques solo ocuparían la cola que
+        # comparten las construcciones.
+        workers = min(max_workers, -(-len(inputs) // BATCH_INLINE_LIMIT))
+        chunk_size = chunk_size or -(-len(inputs) // workers)
+        results = _run_chunks(executor, runtime, list(_chunks(inputs, chunk_size)), include_traces, lexer, recover)
+    
+    total_ms = (time.perf_counter() - inicio) * 1000
+    for i, resultado in enumerate(results):
+        resultado['index'] = i
+    
+    accepted = sum(1 for resultado in results if resultado['accepted'])
+    parse_ms = sum(resultado['time_ms'] for resultado in results)
+    return {
+        'results': results,
+        'summary': {
+            'inputs': len(results),
+            'accepted': accepted,
+            'rejected': len(results) - accepted,
+            'workers': workers
+        },
+        'timing': {
+            'total_ms': total_ms,
+            'parse_ms': parse_ms,
+            'mean_ms': parse_ms / len(results) if results else 0.0,
+            'max_ms': max((resultado['time_ms'] for resultado in results), default=0.0),
+            'inputs_per_second': len(results) / (total_ms / 1000) if total_ms else 0.0
+        }
+    }
\ No newline at end of file
@@ -0,0 +1,150 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+def normalize_grammar(contenido):
+    lineas = (" ".join(linea.split()) for linea in contenido.split("\n"))
+    return "\n".join(linea for linea in lineas if linea)
+
+
+def grammar_fingerprint(contenido, *extra):
+    digest = hashlib.sha256(normalize_grammar(contenido).encode("utf-8"))
+    for parte in extra:
+        digest.update(b"\0")
+        digest.update(str(parte).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ParserCache:
+    
+    def __init__(self, max_entries=64, max_bytes=256 * 1024 * 1024, size_of=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_of = size_of or (lambda value: 1)
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def get_or_build(self, key, builder):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._pending[key] = future
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        
+        if not owner:
+            return future.result()
+        
+        try:
+            value = builder()
+        except BaseException as e:
+            with self._lock:
+                self._pending.pop(key, None)
+            future.set_exception(e)
+            raise
+        
+        self.put(key, value)
+        with self._lock:
+            self._pending.pop(key, None)
+        future.set_result(value)
+        return value
+    
+    def get_or_submit(self, key, submit):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                future = Future()
+                future.set_result(entry[0])
+                return future
+            
+            future = self._pending.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            
+            future = submit()
+            self._pending[key] = future
+            self.misses += 1
+        
+        future.add_done_callback(lambda done: self._finish_submit(key, done))
+        return future
+    
+    def _finish_submit(self, key, future):
+        if not future.cancelled() and future.exception() is None:
+            self.put(key, future.result())
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+    
+    def put(self, key, value):
+        size = self.size_of(value)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            self._evict()
+    
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or
+                                 self.current_bytes > self.max_bytes):
+            _, (_, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+            self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def __contains__(self, key):
+        return key in self._entries
+    
+    def stats(self):
+        with self._lock:
+            consultas = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "in_flight": len(self._pending),
+                "hit_ratio": (self.hits + self.coalesced) / consultas if consultas else 0.0
+            }
\ No newline at end of file
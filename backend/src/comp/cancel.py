@@ -0,0 +1,35 @@
+import threading
+import time
+
+
+class BuildCancelled(Exception):
+    pass
+
+
+class CancelToken:
+    
+    def __init__(self, deadline=None):
+        self.deadline = deadline
+        self._event = threading.Event()
+    
+    @classmethod
+    def with_timeout(cls, timeout):
+        return cls(time.monotonic() + timeout if timeout else None)
+    
+    def cancel(self):
+        self._event.set()
+    
+    @property
+    def cancelled(self):
+        if self._event.is_set():
+            return True
+        return self.deadline is not None and time.monotonic() >= self.deadline
+    
+    def remaining(self):
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+    
+    def check(self):
+        if self.cancelled:
+            raise BuildCancelled("Construcción cancelada por tiempo límite")
\ No newline at end of file
@@ -0,0 +1,201 @@
+import argparse
+import os
+import sys
+
+from .afd import LR1, MODES, MODE_NAMES
+from .artifact import ARTIFACT_SUFFIX, load_parser
+from .cache import grammar_fingerprint
+from .grammar import END_MARKER
+from .parser import build_parser
+from .transition_table import STEPS_PER_TOKEN
+
+DRIVER = '''
+
+def parse_tokens(tokens, max_steps=None):
+    tokens = list(tokens)
+    action = _ACTION
+    default = _DEFAULT
+    terminals = _TERMINALS
+    reduce = _REDUCE
+    total = len(tokens)
+    stack = [0]
+    push = stack.append
+    state = 0
+    position = 0
+    steps = 0
+    accepted = False
+    error = None
+    token = tokens[0] if total else END_MARKER
+    known = token in terminals
+    limit = _STEPS_PER_TOKEN if max_steps is None else max_steps
+    
+    while True:
+        if steps >= limit:
+            error = "Se alcanzó el límite máximo de pasos"
+            break
+        steps += 1
+        code = action[state].get(token, default[state]) if known else 0
+        
+        if code > 0:
+            state = code - 1
+            push(state)
+            position += 1
+            token = tokens[position] if position < total else END_MARKER
+            known = token in terminals
+            if max_steps is None:
+                limit = (position + 1) * _STEPS_PER_TOKEN
+        
+        elif code < -1:
+            pops, goto, goto_default, lhs = reduce[-code - 1]
+            if pops:
+                del stack[-pops:]
+            state = goto.get(stack[-1], goto_default)
+            if state < 0:
+                error = f"No hay transición GOTO desde estado {stack[-1]} con símbolo '{lhs}'"
+                break
+            push(state)
+        
+        elif code == -1:
+            accepted = True
+            break
+        
+        else:
+            error = f"No hay acción definida para estado {state} con símbolo '{token}'"
+            break
+    
+    return {
+        'accepted': accepted,
+        'steps': steps,
+        'error': error,
+        'final_stack': stack,
+        'remaining_input': tokens[position:] + [END_MARKER],
+        'current_position': position
+    }
+
+
+def parse(input_string, max_steps=None):
+    return parse_tokens(input_string.split(), max_steps)
+'''
+
+
+def _action_rows(runtime):
+    filas = [{} for _ in range(runtime.num_states)]
+    for i, estado in enumerate(runtime.action_check):
+        if estado >= 0:
+            columna = i - runtime.action_base[estado]
+            filas[estado][columna] = runtime.action_value[i]
+    simbolos = runtime.simbolos
+    return [
+        {simbolos[runtime.num_no_terminales + c]: fila[c] for c in sorted(fila)}
+        for fila in filas
+    ]
+
+
+def _goto_rows(runtime):
+    filas = [{} for _ in range(runtime.num_no_terminales)]
+    for i, no_terminal in enumerate(runtime.goto_check):
+        if no_terminal >= 0:
+            estado = i - runtime.goto_base[no_terminal]
+            filas[no_terminal][estado] = runtime.goto_value[i] - 1
+    return [{e: fila[e] for e in sorted(fila)} for fila in filas]
+
+
+def _tuple(valores):
+    valores = list(valores)
+    if len(valores) == 1:
+        return f"({valores[0]!r},)"
+    return f"({', '.join(repr(v) for v in valores)})"
+
+
+def generate_module(parser):
+    if not parser.is_built:
+        raise ValueError(f"Parser no construido: {parser.build_errors}")
+    
+    runtime = parser.table.compressed
+    simbolos = runtime.simbolos
+    num_no_terminales = runtime.num_no_terminales
+    fingerprint = grammar_fingerprint(parser.grammar_content, parser.mode)
+    
+    lineas = [
+        f"# Parser {MODE_NAMES[parser.mode]} generado para la gramática {fingerprint}.",
+        "# Módulo autónomo: no depende de src.comp ni construye la tabla al importarse.",
+        "# No editar a mano; regenerar con `python -m src.comp.codegen`.",
+        "",
+        f"MODE = {parser.mode!r}",
+        f"GRAMMAR_CLASS = {parser.table.grammar_class()!r}",
+        f"FINGERPRINT = {fingerprint!r}",
+        f"END_MARKER = {END_MARKER!r}",
+        f"SYMBOLS = {_tuple(simbolos)}",
+        "RULES = ("
+    ]
+    lineas += [f"    {regla!r}," for regla in runtime.reglas]
+    lineas += [
+        ")",
+        "",
+        f"_TERMINALS = frozenset({_tuple(simbolos[num_no_terminales:])})",
+        f"_STEPS_PER_TOKEN = {len(runtime.reglas) + STEPS_PER_TOKEN}",
+        "",
+        "_ACTION = ("
+    ]
+    lineas += [f"    {fila!r}," for fila in _action_rows(runtime)]
+    lineas += [
+        ")",
+        f"_DEFAULT = {_tuple(runtime.action_default)}",
+        ""
+    ]
+    
+    goto_rows = _goto_rows(runtime)
+    for no_terminal, fila in enumerate(goto_rows):
+        lineas.append(f"_GOTO_{no_terminal} = {fila!r}")
+    
+    # Cada reducción lleva resueltos de antemano su longitud, la fila GOTO de su
+    # lado izquierdo y el destino por defecto: el bucle no consulta más tablas.
+    lineas += ["", "_REDUCE = ("]
+    for numero, regla in enumerate(runtime.reglas):
+        lhs = runtime.prod_lhs[numero]
+        if numero == 0:
+            lineas.append(f"    None,  # {numero}: {regla}")
+            continue
+        lineas.append(
+            f"    ({runtime.prod_len[numero]}, _GOTO_{lhs}, {runtime.goto_default[lhs] - 1}, "
+            f"{simbolos[lhs]!r}),  # {numero}: {regla}"
+        )
+    lineas.append(")")
+    
+    return "\n".join(lineas) + DRIVER
+
+
+def write_module(parser, path):
+    codigo = generate_module(parser)
+    temporal = f"{path}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        f.write(codigo)
+    os.replace(temporal, path)
+    return path
+
+
+def _load(path, mode):
+    if path.endswith(ARTIFACT_SUFFIX):
+        return load_parser(path)
+    with open(path, encoding='utf-8') as f:
+        return build_parser(f.read(), mode)
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Genera un módulo Python autónomo con el parser LR de una gramática")
+    argumentos.add_argument("source", help=f"archivo de gramática o artefacto {ARTIFACT_SUFFIX}")
+    argumentos.add_argument("-o", "--output", required=True, help="módulo .py de salida")
+    argumentos.add_argument("-m", "--mode", default=LR1, choices=MODES)
+    args = argumentos.parse_args()
+    
+    try:
+        parser = _load(args.source, args.mode)
+        write_module(parser, args.output)
+    except ValueError as e:
+        print(f"{args.source}: {e}")
+        sys.exit(1)
+    print(f"{args.source} -> {args.output} ({parser.table.compressed.num_states} estados)")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
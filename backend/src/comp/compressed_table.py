@@ -0,0 +1,318 @@
+from array import array
+
+from .grammar import iter_bits
+
+ERROR = 0
+ACCEPT = -1
+
+
+def encode_action(action):
+    accion, valor = action
+    if accion == 'shift':
+        return valor + 1
+    if accion == 'reduce':
+        return -(valor + 1)
+    if accion == 'accept':
+        return ACCEPT
+    return ERROR
+
+
+def decode_action(code):
+    if code > 0:
+        return ('shift', code - 1)
+    if code == ACCEPT:
+        return ('accept', 0)
+    if code < 0:
+        return ('reduce', -code - 1)
+    return None
+
+
+def place_rows(filas, base, ocupado=0):
+    # Casillas ocupadas como bits de un entero: una fila cabe en el
+    # desplazamiento d si ningún bit de su máscara desplazada por d está ocupado.
+    for fila in sorted(range(len(filas)), key=lambda i: -len(filas[i])):
+        entradas = filas[fila]
+        if not entradas:
+            continue
+        
+        # Un bit de `bloqueado` vale 1 en los desplazamientos donde alguna
+        # columna de la fila cae en una casilla ocupada; el primer hueco de
+        # primer ajuste es su bit a cero más bajo.
+        bloqueado = 0
+        for c in entradas:
+            bloqueado |= ocupado >> c
+        desplazamiento = (~bloqueado & (bloqueado + 1)).bit_length() - 1
+        
+        base[fila] = desplazamiento
+        ocupado |= sum(1 << c for c in entradas) << desplazamiento
+    return ocupado
+
+
+def write_rows(filas, base, check, value):
+    for fila, entradas in enumerate(filas):
+        for c, v in entradas.items():
+            check[base[fila] + c] = fila
+            value[base[fila] + c] = v
+
+
+def pack_rows(filas, ancho):
+    base = array('i', [0] * len(filas))
+    size = place_rows(filas, base).bit_length() + ancho
+    check = array('i', [-1]) * size
+    value = array('i', [0]) * size
+    write_rows(filas, base, check, value)
+    return base, check, value
+
+
+def repack_rows(previo, origen, destinos, filas, ancho):
+    # Las filas con origen[fila] >= 0 se quedan donde estaban en el
+    # empaquetado ACTION de `previo`: solo se renumeran su estado y los
+    # destinos de sus shifts. Las casillas de las filas que desaparecen quedan
+    # libres y las filas nuevas (`filas`) las ocupan con el mismo primer ajuste.
+    nuevos = array('i', [-1]) * previo.num_states
+    base = array('i', [0]) * len(filas)
+    for fila, anterior in enumerate(origen):
+        if anterior >= 0:
+            nuevos[anterior] = fila
+            base[fila] = previo.action_base[anterior]
+    
+    check = array('i', [nuevos[anterior] if anterior >= 0 else -1 for anterior in previo.action_check])
+    value = array('i', [
+        ERROR if fila < 0 else destinos[v - 1] + 1 if v > 0 else v
+        for fila, v in zip(check, previo.action_value)
+    ])
+    
+    ocupado = int('0' + ''.join('0' if fila < 0 else '1' for fila in reversed(check)), 2)
+    ocupado = place_rows(filas, base, ocupado)
+    # Las filas reutilizadas leen hasta base + ancho: si hay terminales nuevos
+    # la tabla crece lo mismo que las filas.
+    ancho_previo = len(previo.simbolos) - previo.num_no_terminales
+    size = max(len(check) + ancho - ancho_previo, ocupado.bit_length() + ancho)
+    # Con demasiados huecos sale más pequeño empaquetar de nuevo, esta vez
+    # con las filas reutilizadas ya renumeradas.
+    if 2 * bin(ocupado).count('1') < size:
+        for i, fila in enumerate(check):
+            if fila >= 0:
+                filas[fila][i - base[fila]] = value[i]
+        return pack_rows(filas, ancho)
+    
+    check.extend(array('i', [-1]) * (size - len(check)))
+    value.extend(array('i', [ERROR]) * (size - len(value)))
+    write_rows(filas, base, check, value)
+    return base, check, value
+
+
+def copy_arrays(estado):
+    return {
+        nombre: array('i', valor) if isinstance(valor, memoryview) else valor
+        for nombre, valor in estado.items()
+    }
+
+
+class CompressedTable:
+    
+    def __init__(self, simbolos, num_no_terminales, reglas, prod_lhs, prod_len,
+                 action_base, action_check, action_value, action_default,
+                 goto_base, goto_check, goto_value, goto_default,
+                 follow_offset, follow_columns, goto_offset, goto_symbols, default_offset, default_columns,
+                 conflict_codes=None):
+        self.simbolos = simbolos
+        self.num_no_terminales = num_no_terminales
+        self.reglas = reglas
+        self.prod_lhs = prod_lhs
+        self.prod_len = prod_len
+        self.action_base = action_base
+        self.action_check = action_check
+        self.action_value = action_value
+        self.action_default = action_default
+        self.goto_base = goto_base
+        self.goto_check = goto_check
+        self.goto_value = goto_value
+        self.goto_default = goto_default
+        # Para la recuperación de errores: FOLLOW de cada no terminal como
+        # columnas de terminal y los no terminales con GOTO propio en cada
+        # estado (los GOTO por defecto no dicen si la transición existe).
+        self.follow_offset = follow_offset
+        self.follow_columns = follow_columns
+        self.goto_offset = goto_offset
+        self.goto_symbols = goto_symbols
+        # Columnas donde la reducción por defecto es una acción propia de la
+        # fila: action_code la devuelve en todas, pero solo estas son explícitas.
+        self.default_offset = default_offset
+        self.default_columns = default_columns
+        # Celdas en conflicto: {estado: {columna: (código, ...)}} con todas las
+        # acciones, no solo la elegida. Solo las usa el driver GLR.
+        self.conflict_codes = conflict_codes or {}
+        self.symbol_ids = {simbolo: i for i, simbolo in enumerate(simbolos)}
+    
+    def __getstate__(self):
+        return copy_arrays(self.__dict__)
+    
+    @classmethod
+    def from_rows(cls, grammar, acciones, gotos, celdas, previo=None, origen=None, destinos=None):
+        # `acciones[estado]` es {columna: código} y `gotos[estado]` es
+        # {no terminal: estado destino}; `celdas` guarda todas las acciones de
+        # las celdas en conflicto. En una reconstrucción, acciones[estado] es
+        # None si la fila es la del estado origen[estado] de `previo`, y
+        # `destinos` da el número nuevo de cada estado de `previo`.
+        num_no_terminales = grammar.num_no_terminales
+        ancho = len(grammar.simbolos) - num_no_terminales
+        num_estados = len(acciones)
+        
+        filas = []
+        defaults = array('i', [ERROR] * num_estados)
+        default_offset = array('i', [0])
+        default_columns = array('i')
+        for estado, fila in enumerate(acciones):
+            if fila is None:
+                anterior = origen[estado]
+                defaults[estado] = previo.action_default[anterior]
+                default_columns.extend(previo.defaults_of(anterior))
+                default_offset.append(len(default_columns))
+                filas.append({})
+                continue
+            
+            reduces = {}
+            for code in fila.values():
+                if code < ACCEPT:
+                    reduces[code] = reduces.get(code, 0) + 1
+            if reduces:
+                default = max(reduces, key=lambda code: (reduces[code], code))
+                defaults[estado] = default
+                default_columns.extend(sorted(c for c, code in fila.items() if code == default))
+                fila = {c: code for c, code in fila.items() if code != default}
+            default_offset.append(len(default_columns))
+            filas.append(fila)
+        if previo is not None:
+            action_base, action_check, action_value = repack_rows(previo, origen, destinos, filas, ancho)
+        else:
+            action_base, action_check, action_value = pack_rows(filas, ancho)
+        
+        columnas = [{} for _ in range(num_no_terminales)]
+        for estado, fila in enumerate(gotos):
+            for no_terminal, destino in fila.items():
+                columnas[no_terminal][estado] = destino + 1
+        goto_defaults = array('i', [0] * num_no_terminales)
+        for simbolo, columna in enumerate(columnas):
+            if not columna:
+                continue
+            cuenta = {}
+            for destino in columna.values():
+                cuenta[destino] = cuenta.get(destino, 0) + 1
+            default = max(cuenta, key=lambda destino: (cuenta[destino], -destino))
+            goto_defaults[simbolo] = default
+            columnas[simbolo] = {e: d for e, d in columna.items() if d != default}
+        goto_base, goto_check, goto_value = pack_rows(columnas, num_estados)
+        
+        follow_offset = array('i', [0])
+        follow_columns = array('i')
+        for simbolo in range(num_no_terminales):
+            bits = grammar.follow_sets[simbolo] >> num_no_terminales
+            follow_columns.extend(iter_bits(bits))
+            follow_offset.append(len(follow_columns))
+        
+        goto_offset = array('i', [0])
+        goto_symbols = array('i')
+        for fila in gotos:
+            goto_symbols.extend(sorted(fila))
+            goto_offset.append(len(goto_symbols))
+        
+        conflict_codes = {
+            estado: {columna: tuple(codes) for columna, codes in columnas_estado.items()}
+            for estado, columnas_estado in celdas.items()
+        }
+        
+        return cls(
+            list(grammar.simbolos), num_no_terminales, list(grammar.reglas),
+            array('i', (lhs for lhs, _ in grammar.producciones)),
+            array('i', (len(rhs) for _, rhs in grammar.producciones)),
+            action_base, action_check, action_value, defaults,
+            goto_base, goto_check, goto_value, goto_defaults,
+            follow_offset, follow_columns, goto_offset, goto_symbols, default_offset, default_columns,
+            conflict_codes
+        )
+    
+    @property
+    def num_states(self):
+        return len(self.action_base)
+    
+    def terminal_column(self, terminal):
+        simbolo = self.symbol_ids.get(terminal)
+        if simbolo is None or simbolo < self.num_no_terminales:
+            return -1
+        return simbolo - self.num_no_terminales
+    
+    def action_code(self, estado, columna):
+        if columna < 0:
+            return ERROR
+        i = self.action_base[estado] + columna
+        if self.action_check[i] == estado:
+            return self.action_value[i]
+        return self.action_default[estado]
+    
+    def goto_state(self, estado, no_terminal):
+        i = self.goto_base[no_terminal] + estado
+        if self.goto_check[i] == no_terminal:
+            return self.goto_value[i] - 1
+        return self.goto_default[no_terminal] - 1
+    
+    def follow_of(self, no_terminal):
+        return self.follow_columns[self.follow_offset[no_terminal]:self.follow_offset[no_terminal + 1]]
+    
+    def gotos_of(self, estado):
+        return self.goto_symbols[self.goto_offset[estado]:self.goto_offset[estado + 1]]
+    
+    def defaults_of(self, estado):
+        return self.default_columns[self.default_offset[estado]:self.default_offset[estado + 1]]
+    
+    def has_action(self, estado, columna):
+        if columna < 0:
+            return False
+        if self.action_check[self.action_base[estado] + columna] == estado:
+            return True
+        return columna in self.defaults_of(estado)
+    
+    def row_actions(self, estado):
+        base = self.action_base[estado]
+        check = self.action_check
+        value = self.action_value
+        fila = {
+            columna: value[base + columna]
+            for columna in range(len(self.simbolos) - self.num_no_terminales)
+            if check[base + columna] == estado
+        }
+        default = self.action_default[estado]
+        for columna in self.defaults_of(estado):
+            fila[columna] = default
+        return fila
+    
+    def row_gotos(self, estado):
+        return {no_terminal: self.goto_state(estado, no_terminal) for no_terminal in self.gotos_of(estado)}
+    
+    def action_codes(self, estado, columna):
+        celdas = self.conflict_codes.get(estado)
+        if celdas is not None and columna in celdas:
+            return celdas[columna]
+        return (self.action_code(estado, columna),)
+    
+    def get_action(self, estado, terminal):
+        if not 0 <= estado < self.num_states:
+            return None
+        return decode_action(self.action_code(estado, self.terminal_column(terminal)))
+    
+    def get_goto(self, estado, no_terminal):
+        simbolo = self.symbol_ids.get(no_terminal)
+        if simbolo is None or simbolo >= self.num_no_terminales or not 0 <= estado < self.num_states:
+            return None
+        # Solo los GOTO propios del estado: el GOTO por defecto de la columna
+        # no dice si la transición existe.
+        if simbolo not in self.gotos_of(estado):
+            return None
+        return self.goto_state(estado, simbolo)
+    
+    def nbytes(self):
+        arrays = (self.prod_lhs, self.prod_len, self.action_base, self.action_check,
+                  self.action_value, self.action_default, self.goto_base, self.goto_check,
+                  self.goto_value, self.goto_default, self.follow_offset, self.follow_columns,
+                  self.goto_offset, self.goto_symbols, self.default_offset, self.default_columns)
+        return sum(len(a) * a.itemsize for a in arrays)
\ No newline at end of file
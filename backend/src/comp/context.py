@@ -0,0 +1,27 @@
+class BuildContext:
+    
+    def __init__(self, cancel=None):
+        self.cancel = cancel
+        self.states = {}
+        self.previous_afd = None
+        self.previous_table = None
+        self.delta = None
+        # Estados reutilizados del AFD anterior (kernel nuevo -> estado
+        # anterior) y, por número anterior, el estado nuevo con su kernel.
+        self.reused = {}
+        self.reused_states = {}
+    
+    def reuse(self, afd, table):
+        self.previous_afd = afd
+        self.previous_table = table
+    
+    def check(self):
+        if self.cancel is not None:
+            self.cancel.check()
+    
+    def intern_state(self, kernel, factory):
+        state = self.states.get(kernel)
+        if state is None:
+            state = factory(kernel)
+            self.states[kernel] = state
+        return state
\ No newline at end of file
@@ -0,0 +1,385 @@
+from .compressed_table import ACCEPT, ERROR
+from .grammar import END_MARKER
+from .transition_table import CANCEL_CHECK_STEPS
+
+TREE_COUNT_LIMIT = 10 ** 18
+
+class GSSNode:
+    __slots__ = ('state', 'level', 'edges')
+    
+    def __init__(self, state, level):
+        self.state = state
+        self.level = level
+        # Aristas hacia nodos anteriores de la pila, con el nodo del bosque
+        # que cubre el símbolo de la transición.
+        self.edges = []
+
+
+class SharedForest:
+    
+    def __init__(self, runtime, lexemes=None):
+        self.runtime = runtime
+        self.lexemes = lexemes if lexemes is not None else []
+        self.symbol = []
+        self.start = []
+        self.end = []
+        # Por nodo, las alternativas empaquetadas (producción, hijos); las
+        # hojas no tienen ninguna.
+        self.families = []
+        self.root = -1
+        self._index = {}
+    
+    def __len__(self):
+        return len(self.symbol)
+    
+    def node(self, simbolo, inicio, fin):
+        clave = (simbolo, inicio, fin)
+        nodo = self._index.get(clave)
+        if nodo is None:
+            nodo = self._index[clave] = len(self.symbol)
+            self.symbol.append(simbolo)
+            self.start.append(inicio)
+            self.end.append(fin)
+            self.families.append([])
+        return nodo
+    
+    def leaf(self, simbolo, posicion):
+        # Cada token se desplaza una sola vez: su hoja no necesita índice.
+        nodo = len(self.symbol)
+        self.symbol.append(simbolo)
+        self.start.append(posicion)
+        self.end.append(posicion + 1)
+        self.families.append(())
+        return nodo
+    
+    def pack(self, nodo, produccion, hijos):
+        familia = (produccion, hijos)
+        familias = self.families[nodo]
+        if familia not in familias:
+            familias.append(familia)
+    
+    def label(self, nodo):
+        return self.runtime.simbolos[self.symbol[nodo]]
+    
+    def is_ambiguous(self, nodo=None):
+        return any(len(self.families[n]) > 1 for n in self.reachable(nodo))
+    
+    def reachable(self, nodo=None):
+        raiz = self.root if nodo is None else nodo
+        if raiz < 0:
+            return []
+        vistos = {raiz}
+        orden = [raiz]
+        for actual in orden:
+            for _, hijos in self.families[actual]:
+                for hijo in hijos:
+                    if hijo not in vistos:
+                        vistos.add(hijo)
+                        orden.append(hijo)
+        return orden
+    
+    def count_trees(self, nodo=None, limite=TREE_COUNT_LIMIT):
+        # Número de árboles distintos bajo el nodo, acotado por `limite`.
+        # None si el bosque tiene ciclos (ambigüedad infinita).
+        raiz = self.root if nodo is None else nodo
+        if raiz < 0:
+            return 0
+        en_curso = -1
+        memo = {}
+        pila = [(raiz, False)]
+        while pila:
+            actual, listo = pila.pop()
+            familias = self.families[actual]
+            if listo:
+                total = 0 if familias else 1
+                for _, hijos in familias:
+                    producto = 1
+                    for hijo in hijos:
+                        producto = min(producto * memo[hijo], limite)
+                    total = min(total + producto, limite)
+                memo[actual] = total
+                continue
+            if actual in memo:
+                continue
+            memo[actual] = en_curso
+            pila.append((actual, True))
+            for _, hijos in familias:
+                for hijo in hijos:
+                    estado = memo.get(hijo)
+                    if estado == en_curso:
+                        return None
+                    if estado is None:
+                        pila.append((hijo, False))
+        return memo[raiz]
+    
+    def to_dict(self):
+        # Solo los nodos alcanzables desde la raíz, renumerados, en listas
+        # paralelas; los hijos de todas las familias van en un único array.
+        orden = self.reachable()
+        numeros = {nodo: i for i, nodo in enumerate(orden)}
+        family_offset = []
+        family_production = []
+        child_offset = []
+        children = []
+        for nodo in orden:
+            family_offset.append(len(family_production))
+            for produccion, hijos in self.families[nodo]:
+                family_production.append(produccion)
+                child_offset.append(len(children))
+                children.extend(numeros[hijo] for hijo in hijos)
+        return {
+            'root': 0 if orden else -1,
+            'nodes': len(orden),
+            'symbols': list(self.runtime.simbolos),
+            'symbol': [self.symbol[nodo] for nodo in orden],
+            'start': [self.start[nodo] for nodo in orden],
+            'end': [self.end[nodo] for nodo in orden],
+            'family_offset': family_offset,
+            'family_production': family_production,
+            'child_offset': child_offset,
+            'children': children,
+            'tokens': list(self.lexemes)
+        }
+
+
+class GLRDriver:
+    
+    def __init__(self, input_string, lr_table, tokens=None, lexemes=None, max_steps=None, run=True, cancel=None):
+        self.input_string = input_string.strip()
+        self.lr_table = lr_table
+        self.runtime = getattr(lr_table, 'compressed', lr_table)
+        self.accepted = False
+        self.error_message = None
+        self.step_count = 0
+        self.max_steps = max_steps
+        self.cancel = cancel
+        self._next_check = CANCEL_CHECK_STEPS
+        self.current_position = 0
+        self.max_stacks = 1
+        self.gss_nodes = 1
+        
+        if tokens is None:
+            self.tokens = self.input_string.split()
+            self._token_iter = iter(self.tokens)
+            self._keep_tokens = False
+        else:
+            self.tokens = []
+            self._token_iter = iter(tokens)
+            self._keep_tokens = lexemes is None
+        self.forest = SharedForest(self.runtime, self.tokens if lexemes is None else lexemes)
+        
+        if run:
+            self.run()
+    
+    def _next_token(self):
+        token = next(self._token_iter, None)
+        if token is None:
+            return END_MARKER
+        if self._keep_tokens:
+            self.tokens.append(token)
+        return token
+    
+    def run(self):
+        runtime = self.runtime
+        action_code = runtime.action_code
+        conflict_codes = runtime.conflict_codes
+        terminal_column = runtime.terminal_column
+        goto_state = runtime.goto_state
+        prod_len = runtime.prod_len
+        prod_lhs = runtime.prod_lhs
+        forest = self.forest
+        num_no_terminales = runtime.num_no_terminales
+        
+        token = self._next_token()
+        columna = terminal_column(token)
+        pila = [GSSNode(0, 0)]
+        posicion = 0
+        # Estados alcanzados por reducción en la posición actual: repetir uno
+        # indica un ciclo (A -> A, ciclos de vacías) que el camino general
+        # resuelve compartiendo nodos.
+        reducidos = set()
+        
+        while True:
+            # Camino determinista: una sola pila y una celda sin conflicto se
+            # resuelven como en LR, sin repartir trabajo entre pilas.
+            if len(pila) == 1:
+                nodo = pila[0]
+                celdas = conflict_codes.get(nodo.state)
+                if celdas is None or columna not in celdas:
+                    code = action_code(nodo.state, columna) if columna >= 0 else ERROR
+                    if code > 0 and self._step():
+                        hoja = forest.leaf(num_no_terminales + columna, posicion)
+                        destino = GSSNode(code - 1, posicion + 1)
+                        destino.edges.append((nodo, hoja))
+                        self.gss_nodes += 1
+                        pila = [destino]
+                        posicion += 1
+                        self.current_position = posicion
+                        token = self._next_token()
+                        columna = terminal_column(token)
+                        reducidos.clear()
+                        continue
+                    if code < ACCEPT and self._step():
+                        regla = -code - 1
+                        lhs = prod_lhs[regla]
+                        longitud = prod_len[regla]
+                        hijos = []
+                        base = nodo
+                        for _ in range(longitud):
+                            if len(base.edges) != 1:
+                                break
+                            base, etiqueta = base.edges[0]
+                            hijos.append(etiqueta)
+                        else:
+                            estado = goto_state(base.state, lhs)
+                            if estado not in reducidos:
+                                reducidos.add(estado)
+                                hijos.reverse()
+                                simbolo = forest.node(lhs, base.level, posicion)
+                                forest.pack(simbolo, regla, tuple(hijos))
+                                destino = GSSNode(estado, posicion)
+                                destino.edges.append((base, simbolo))
+                                self.gss_nodes += 1
+                                pila = [destino]
+                                continue
+                        self.step_count -= 1
+            
+            if self.max_steps is not None and self.step_count >= self.max_steps:
+                self.error_message = "Se alcanzó el límite máximo de pasos"
+                break
+            
+            frontera, desplazamientos = self._reduce_level(pila, columna, posicion)
+            if self.accepted or self.error_message:
+                break
+            if token == END_MARKER or not desplazamientos:
+                estados = sorted(frontera)
+                self.error_message = f"No hay acción definida para los estados {estados} con símbolo '{token}'"
+                break
+            
+            hoja = forest.leaf(num_no_terminales + columna, posicion)
+            siguiente = {}
+            for nodo, estado in desplazamientos:
+                destino = siguiente.get(estado)
+                if destino is None:
+                    destino = siguiente[estado] = GSSNode(estado, posicion + 1)
+                    self.gss_nodes += 1
+                destino.edges.append((nodo, hoja))
+            self.step_count += len(desplazamientos)
+            
+            pila = list(siguiente.values())
+            reducidos.clear()
+            self.max_stacks = max(self.max_stacks, len(pila))
+            posicion += 1
+            self.current_position = posicion
+            token = self._next_token()
+            columna = terminal_column(token)
+        
+        return self
+    
+    def _step(self):
+        self.step_count += 1
+        if self.cancel is not None and self.step_count >= self._next_check:
+            self._next_check = self.step_count + CANCEL_CHECK_STEPS
+            self.cancel.check()
+        return self.max_steps is None or self.step_count <= self.max_steps
+    
+    def _codes(self, estado, columna):
+        if columna < 0:
+            return ()
+        return self.runtime.action_codes(estado, columna)
+    
+    def _reduce_level(self, pila, columna, posicion):
+        # Reduce todas las pilas activas antes de desplazar. Los nodos que
+        # llegan al mismo estado en la misma posición se comparten, y las
+        # reducciones que cubren el mismo tramo con el mismo símbolo se
+        # empaquetan en un único nodo del bosque.
+        runtime = self.runtime
+        prod_len = runtime.prod_len
+        prod_lhs = runtime.prod_lhs
+        goto_state = runtime.goto_state
+        forest = self.forest
+        
+        frontera = {nodo.state: nodo for nodo in pila}
+        desplazamientos = []
+        pendientes = []
+        for nodo in pila:
+            self._classify(nodo, columna, pendientes, desplazamientos)
+        
+        while pendientes:
+            nodo, regla, arista = pendientes.pop()
+            if not self._step():
+                self.error_message = "Se alcanzó el límite máximo de pasos"
+                return frontera, desplazamientos
+            lhs = prod_lhs[regla]
+            for base, hijos in self._paths(nodo, prod_len[regla], arista):
+                simbolo = forest.node(lhs, base.level, posicion)
+                forest.pack(simbolo, regla, hijos)
+                estado = goto_state(base.state, lhs)
+                destino = frontera.get(estado)
+                if destino is None:
+                    destino = frontera[estado] = GSSNode(estado, posicion)
+                    destino.edges.append((base, simbolo))
+                    self.gss_nodes += 1
+                    self._classify(destino, columna, pendientes, desplazamientos)
+                elif not any(anterior is base for anterior, _ in destino.edges):
+                    # Arista nueva en un nodo ya existente: se rehacen solo los
+                    # caminos que pasan por ella (también tras aristas vacías).
+                    destino.edges.append((base, simbolo))
+                    arista = (destino, base)
+                    for activo in frontera.values():
+                        for code in self._codes(activo.state, columna):
+                            if code < ACCEPT and prod_len[-code - 1]:
+                                pendientes.append((activo, -code - 1, arista))
+        self.max_stacks = max(self.max_stacks, len(frontera))
+        return frontera, desplazamientos
+    
+    def _classify(self, nodo, columna, pendientes, desplazamientos):
+        for code in self._codes(nodo.state, columna):
+            if code > 0:
+                desplazamientos.append((nodo, code - 1))
+            elif code == ACCEPT:
+                self.accepted = True
+                self.forest.root = nodo.edges[0][1]
+            elif code < ACCEPT:
+                pendientes.append((nodo, -code - 1, None))
+    
+    def _paths(self, nodo, longitud, arista=None):
+        # Con `arista` solo se recorren los caminos que la usan: el resto ya se
+        # redujo antes de que existiera.
+        if longitud == 0:
+            yield nodo, ()
+            return
+        origen, final = arista if arista is not None else (None, None)
+        pila = [(nodo, longitud, (), arista is None)]
+        while pila:
+            actual, restante, hijos, usada = pila.pop()
+            if restante == 0:
+                if usada:
+                    yield actual, hijos
+                continue
+            if not usada and actual.level < origen.level:
+                continue
+            for anterior, etiqueta in actual.edges:
+                pila.append((anterior, restante - 1, (etiqueta,) + hijos,
+                             usada or (actual is origen and anterior is final)))
+    
+    def get_summary(self):
+        return {
+            'accepted': self.accepted,
+            'steps': self.step_count,
+            'error': self.error_message,
+            'current_position': self.current_position,
+            'ambiguous': self.forest.is_ambiguous() if self.accepted else False,
+            'trees': self.forest.count_trees() if self.accepted else 0,
+            'forest_nodes': len(self.forest.reachable()) if self.accepted else 0,
+            'gss_nodes': self.gss_nodes,
+            'max_stacks': self.max_stacks
+        }
+    
+    def to_dict(self):
+        return {
+            'input_string': self.input_string,
+            'tokens': self.tokens,
+            'summary': self.get_summary(),
+            'forest': self.forest.to_dict() if self.accepted else None
+        }
\ No newline at end of file
@@ -1,16 +1,40 @@
+from .context import BuildContext
+
+EPSILON = 'ε'
+END_MARKER = '$'
+ERROR_TOKEN = 'error'
+EPSILON_SYMBOLS = (EPSILON, 'epsilon')
+
+
 class Grammar:
-    def __init__(self, gic_content):
+    def __init__(self, gic_content, context=None):
         self.gic_content = gic_content
+        self.context = context if context is not None else BuildContext()
         self.reglas = []
         self.diccionario = {}
         self.start_symbol = None
+        self.simbolos = []
+        self.simbolo_ids = {}
+        self.terminal_flags = bytearray()
+        self.producciones = []
+        self.producciones_de = []
+        self.num_no_terminales = 0
+        self.end_id = None
         self._parse_grammar()
+        self.context = None
+    
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        estado.pop('_item_store', None)
+        return estado
     
     def _parse_grammar(self):
         reglas = self.obtener_reglas(self.gic_content)
         reglas = self.extender_reglas(reglas)
         self.reglas = reglas
+        self._compile_rules()
         self._build_dictionary()
+        self._compute_sets()
     
     def obtener_reglas(self, contenido):
         t = contenido.split("\n")
@@ -20,24 +44,65 @@ class Grammar:
     def extender_reglas(self, reglas):
         if not reglas:
             return reglas
-            
+        
         primera_regla = reglas[0]
-        term = primera_regla.split(" -> ")[0]
+        term = primera_regla.split("->")[0].strip()
         self.start_symbol = term
         
         new_rule = f"S' -> {term}"
         reglas.insert(0, new_rule)
         return reglas
     
+    def _split_regla(self, regla):
+        lado_izquierdo, flecha, lado_derecho = regla.partition("->")
+        lado_izquierdo = lado_izquierdo.strip()
+        if not flecha or not lado_izquierdo or len(lado_izquierdo.split()) != 1:
+            raise ValueError(f"Regla mal formada: '{regla}'")
+        
+        simbolos = lado_derecho.split()
+        if len(simbolos) == 1 and simbolos[0] in EPSILON_SYMBOLS:
+            simbolos = []
+        return lado_izquierdo, simbolos
+    
+    def _compile_rules(self):
+        partes = [self._split_regla(regla) for regla in self.reglas]
+        
+        for lado_izquierdo, _ in partes:
+            self._intern(lado_izquierdo)
+        self.num_no_terminales = len(self.simbolos)
+        
+        if self.reglas:
+            self.end_id = self._intern(END_MARKER)
+        for _, lado_derecho in partes:
+            for simbolo in lado_derecho:
+                self._intern(simbolo)
+        
+        self.terminal_flags = bytearray(
+            0 if i < self.num_no_terminales else 1 for i in range(len(self.simbolos))
+        )
+        
+        producciones_de = [[] for _ in self.simbolos]
+        for numero, (lado_izquierdo, lado_derecho) in enumerate(partes):
+            lhs = self.simbolo_ids[lado_izquierdo]
+            rhs = tuple(self.simbolo_ids[simbolo] for simbolo in lado_derecho)
+            self.producciones.append((lhs, rhs))
+            producciones_de[lhs].append(numero)
+        self.producciones_de = [tuple(numeros) for numeros in producciones_de]
+    
+    def _intern(self, simbolo):
+        simbolo_id = self.simbolo_ids.get(simbolo)
+        if simbolo_id is None:
+            simbolo_id = len(self.simbolos)
+            self.simbolo_ids[simbolo] = simbolo_id
+            self.simbolos.append(simbolo)
+        return simbolo_id
+    
     def _build_dictionary(self):
-        for regla in self.reglas:
-            partes = regla.split(" -> ")
-            if len(partes) == 2:
-                lado_izquierdo = partes[0]
-                
-                if lado_izquierdo not in self.diccionario:
-                    self.diccionario[lado_izquierdo] = []
-                self.diccionario[lado_izquierdo].append(regla)
+        for regla, (lhs, _) in zip(self.reglas, self.producciones):
+            lado_izquierdo = self.simbolos[lhs]
+            if lado_izquierdo not in self.diccionario:
+                self.diccionario[lado_izquierdo] = []
+            self.diccionario[lado_izquierdo].append(regla)
     
     def get_producciones(self, simbolo):
         return self.diccionario.get(simbolo, [])
@@ -45,114 +110,168 @@ class Grammar:
     def is_terminal(self, simbolo):
         return simbolo not in self.diccionario
     
+    def is_terminal_id(self, simbolo_id):
+        return self.terminal_flags[simbolo_id] == 1
+    
     def get_simbolos_no_terminales(self):
         return list(self.diccionario.keys())
     
     def get_simbolos_terminales(self):
-        terminales = set()
-        for regla in self.reglas:
-            partes = regla.split(" -> ")
-            if len(partes) == 2:
-                lado_derecho = partes[1].split()
-                for simbolo in lado_derecho:
-                    if self.is_terminal(simbolo) and simbolo not in ['ε', 'epsilon']:
-                        terminales.add(simbolo)
-        return terminales
+        return {
+            simbolo for simbolo in self.simbolos[self.num_no_terminales:]
+            if simbolo != END_MARKER
+        }
     
-    def calculate_first(self, symbols):
-        if not symbols:
-            return {'ε'}
+    def format_produccion(self, numero):
+        lhs, rhs = self.producciones[numero]
+        lado_derecho = " ".join(self.simbolos[s] for s in rhs) if rhs else EPSILON
+        return f"{self.simbolos[lhs]} -> {lado_derecho}"
+    
+    def _compute_sets(self):
+        num_simbolos = len(self.simbolos)
+        self.nullable = bytearray(num_simbolos)
+        self.first_sets = [
+            (1 << s) if self.terminal_flags[s] else 0 for s in range(num_simbolos)
+        ]
+        self.follow_sets = [0] * num_simbolos
         
-        first_set = set()
+        usos = [[] for _ in range(num_simbolos)]
+        for numero, (_, rhs) in enumerate(self.producciones):
+            for simbolo in set(rhs):
+                if not self.terminal_flags[simbolo]:
+                    usos[simbolo].append(numero)
         
-        for i, symbol in enumerate(symbols):
-            if self.is_terminal(symbol):
-                first_set.add(symbol)
-                break
-            else:
-                symbol_first = self._first_of_nonterminal(symbol)
-                first_set.update(symbol_first - {'ε'})
-                
-                if 'ε' not in symbol_first:
-                    break
-                elif i == len(symbols) - 1:
-                    first_set.add('ε')
+        self._propagate_first(list(range(len(self.producciones))), usos)
+        self._compute_suffix_first()
+        self._compute_follow()
+        self._first_memo = {}
+    
+    def _propagate_first(self, pendientes, usos):
+        # Lista de trabajo: una producción solo se vuelve a evaluar cuando cambia
+        # FIRST o la anulabilidad de algún símbolo de su lado derecho.
+        en_cola = bytearray(len(self.producciones))
+        for numero in pendientes:
+            en_cola[numero] = 1
         
-        return first_set
+        while pendientes:
+            self.context.check()
+            numero = pendientes.pop()
+            en_cola[numero] = 0
+            lhs, rhs = self.producciones[numero]
+            
+            first = self.first_sets[lhs]
+            nuevo = first
+            anulable = True
+            for simbolo in rhs:
+                nuevo |= self.first_sets[simbolo]
+                if not self.nullable[simbolo]:
+                    anulable = False
+                    break
+            
+            if nuevo == first and (not anulable or self.nullable[lhs]):
+                continue
+            self.first_sets[lhs] = nuevo
+            if anulable:
+                self.nullable[lhs] = 1
+            for dependiente in usos[lhs]:
+                if not en_cola[dependiente]:
+                    en_cola[dependiente] = 1
+                    pendientes.append(dependiente)
     
-    def _first_of_nonterminal(self, nonterminal):
-        if hasattr(self, '_first_cache') and nonterminal in self._first_cache:
-            return self._first_cache[nonterminal]
+    def _compute_suffix_first(self):
+        self.suffix_first = []
+        for _, rhs in self.producciones:
+            sufijos = [(0, True)] * (len(rhs) + 1)
+            bits, nullable = 0, True
+            for i in range(len(rhs) - 1, -1, -1):
+                simbolo = rhs[i]
+                if self.nullable[simbolo]:
+                    bits |= self.first_sets[simbolo]
+                else:
+                    bits, nullable = self.first_sets[simbolo], False
+                sufijos[i] = (bits, nullable)
+            self.suffix_first.append(tuple(sufijos))
+    
+    def _compute_follow(self):
+        if not self.producciones:
+            return
+        self.follow_sets[0] = 1 << self.end_id
         
-        if not hasattr(self, '_first_cache'):
-            self._first_cache = {}
+        # FOLLOW(X) recibe FIRST de lo que sigue a X en cada producción y, si eso
+        # es anulable, también FOLLOW del lado izquierdo: lo segundo se propaga
+        # por un grafo con una lista de trabajo.
+        hereda = [[] for _ in self.simbolos]
+        for numero, (lhs, rhs) in enumerate(self.producciones):
+            sufijos = self.suffix_first[numero]
+            for i, simbolo in enumerate(rhs):
+                if self.terminal_flags[simbolo]:
+                    continue
+                bits, nullable = sufijos[i + 1]
+                self.follow_sets[simbolo] |= bits
+                if nullable and simbolo != lhs:
+                    hereda[lhs].append(simbolo)
         
-        if nonterminal in getattr(self, '_computing_first', set()):
-            return set()
+        pendientes = [s for s in range(self.num_no_terminales) if self.follow_sets[s]]
+        while pendientes:
+            self.context.check()
+            simbolo = pendientes.pop()
+            follow = self.follow_sets[simbolo]
+            for destino in hereda[simbolo]:
+                if self.follow_sets[destino] | follow != self.follow_sets[destino]:
+                    self.follow_sets[destino] |= follow
+                    pendientes.append(destino)
+    
+    def first_of_sequence(self, simbolo_ids):
+        simbolo_ids = tuple(simbolo_ids)
+        resultado = self._first_memo.get(simbolo_ids)
+        if resultado is not None:
+            return resultado
         
-        if not hasattr(self, '_computing_first'):
-            self._computing_first = set()
+        bits, nullable = 0, True
+        for simbolo in simbolo_ids:
+            bits |= self.first_sets[simbolo]
+            if not self.nullable[simbolo]:
+                nullable = False
+                break
         
-        self._computing_first.add(nonterminal)
+        resultado = (bits, nullable)
+        self._first_memo[simbolo_ids] = resultado
+        return resultado
+    
+    def first_beta_lookahead(self, produccion, posicion, lookahead):
+        bits, nullable = self.suffix_first[produccion][posicion]
+        if nullable:
+            bits |= 1 << lookahead
+        return bits
+    
+    def calculate_first(self, symbols):
+        if not symbols:
+            return {EPSILON}
         
-        first_set = set()
-        producciones = self.get_producciones(nonterminal)
+        conocidos = []
+        desconocido = None
+        for symbol in symbols:
+            simbolo_id = self.simbolo_ids.get(symbol)
+            if simbolo_id is None:
+                desconocido = symbol
+                break
+            conocidos.append(simbolo_id)
         
-        for produccion in producciones:
-            partes = produccion.split(" -> ")
-            if len(partes) == 2:
-                lado_derecho = partes[1].split()
-                
-                if not lado_derecho or lado_derecho == [''] or lado_derecho == ['ε'] or lado_derecho == ['epsilon']:
-                    first_set.add('ε')
-                else:
-                    for simbolo in lado_derecho:
-                        if self.is_terminal(simbolo):
-                            first_set.add(simbolo)
-                            break
-                        else:
-                            symbol_first = self._first_of_nonterminal(simbolo)
-                            first_set.update(symbol_first - {'ε'})
-                            if 'ε' not in symbol_first:
-                                break
-                    else:
-                        first_set.add('ε')
-        
-        self._computing_first.remove(nonterminal)
-        self._first_cache[nonterminal] = first_set
+        bits, nullable = self.first_of_sequence(conocidos)
+        first_set = {self.simbolos[t] for t in iter_bits(bits)}
+        if nullable:
+            first_set.add(EPSILON if desconocido is None else desconocido)
         return first_set
     
     def calculate_follow(self, nonterminal):
-        if hasattr(self, '_follow_cache') and nonterminal in self._follow_cache:
-            return self._follow_cache[nonterminal]
-        
-        if not hasattr(self, '_follow_cache'):
-            self._follow_cache = {}
-        
-        follow_set = set()
-        
-        if nonterminal == self.start_symbol:
-            follow_set.add('$')
-        
-        for regla in self.reglas:
-            partes = regla.split(" -> ")
-            if len(partes) == 2:
-                lado_izquierdo = partes[0]
-                lado_derecho = partes[1].split()
-                
-                for i, simbolo in enumerate(lado_derecho):
-                    if simbolo == nonterminal:
-                        beta = lado_derecho[i + 1:]
-                        
-                        if not beta:
-                            if lado_izquierdo != nonterminal:
-                                follow_set.update(self.calculate_follow(lado_izquierdo))
-                        else:
-                            first_beta = self.calculate_first(beta)
-                            follow_set.update(first_beta - {'ε'})
-                            
-                            if 'ε' in first_beta and lado_izquierdo != nonterminal:
-                                follow_set.update(self.calculate_follow(lado_izquierdo))
-        
-        self._follow_cache[nonterminal] = follow_set
-        return follow_set
\ No newline at end of file
+        simbolo_id = self.simbolo_ids.get(nonterminal)
+        if simbolo_id is None or self.terminal_flags[simbolo_id]:
+            return set()
+        return {self.simbolos[t] for t in iter_bits(self.follow_sets[simbolo_id])}
+
+
+def iter_bits(bits):
+    while bits:
+        bajo = bits & -bits
+        yield bajo.bit_length() - 1
+        bits ^= bajo
\ No newline at end of file
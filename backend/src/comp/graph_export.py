@@ -0,0 +1,190 @@
+from array import array
+from collections import deque
+
+EPSILON_EDGE = -1
+MAX_PAGE_SIZE = 500
+MAX_NEIGHBORHOOD_NODES = 500
+
+
+def _csr(num_nodos, aristas, origen, destino):
+    offsets = array('i', [0] * (num_nodos + 1))
+    for arista in aristas:
+        offsets[arista[origen] + 1] += 1
+    for i in range(num_nodos):
+        offsets[i + 1] += offsets[i]
+    
+    vecinos = array('i', [0] * len(aristas))
+    simbolos = array('i', [0] * len(aristas))
+    siguiente = array('i', offsets[:-1])
+    for arista in aristas:
+        i = siguiente[arista[origen]]
+        vecinos[i] = arista[destino]
+        simbolos[i] = arista[2]
+        siguiente[arista[origen]] += 1
+    return offsets, vecinos, simbolos
+
+
+class AutomatonGraph:
+    
+    def __init__(self, kind, symbols, labels, aristas):
+        self.kind = kind
+        self.symbols = symbols
+        self.labels = labels
+        self.num_edges = len(aristas)
+        self.out_offsets, self.out_targets, self.out_symbols = _csr(len(labels), aristas, 0, 1)
+        self.in_offsets, self.in_sources, self.in_symbols = _csr(len(labels), aristas, 1, 0)
+    
+    @classmethod
+    def from_afd(cls, afd):
+        labels = []
+        aristas = []
+        for numero in range(len(afd.estados)):
+            estado = afd.estados[numero]
+            labels.append([str(item) for item in estado.items])
+            for simbolo, destino in estado.transitions.items():
+                destino_num = afd.get_state_number(destino)
+                if destino_num != -1:
+                    aristas.append((numero, destino_num, simbolo))
+        return cls('afd', list(afd.grammar.simbolos), labels, aristas)
+    
+    @classmethod
+    def from_afn(cls, afn):
+        labels = []
+        aristas = []
+        if afn.nodo_inicial is None:
+            return cls('afn', list(afn.grammar.simbolos), labels, aristas)
+        
+        numeros = {afn.nodo_inicial.id: 0}
+        cola = deque([afn.nodo_inicial])
+        
+        def numero_de(item):
+            numero = numeros.get(item.id)
+            if numero is None:
+                numero = numeros[item.id] = len(numeros)
+                cola.append(item)
+            return numero
+        
+        while cola:
+            actual = cola.popleft()
+            origen = numeros[actual.id]
+            labels.append(str(actual))
+            
+            if actual.transition is not None:
+                aristas.append((origen, numero_de(actual.transition), actual.transition_val))
+            
+            if actual.transition_e:
+                vistos = set()
+                for destino in actual.transition_e:
+                    if destino.id not in vistos:
+                        vistos.add(destino.id)
+                        aristas.append((origen, numero_de(destino), EPSILON_EDGE))
+        
+        return cls('afn', list(afn.grammar.simbolos), labels, aristas)
+    
+    def __len__(self):
+        return len(self.labels)
+    
+    def nbytes(self):
+        arrays = (self.out_offsets, self.out_targets, self.out_symbols,
+                  self.in_offsets, self.in_sources, self.in_symbols)
+        texto = sum(
+            sum(len(l) for l in label) if isinstance(label, list) else len(label)
+            for label in self.labels
+        )
+        return texto + sum(len(a) * a.itemsize for a in arrays)
+    
+    def _node(self, nodo):
+        if self.kind == 'afd':
+            return {'id': nodo, 'items': self.labels[nodo]}
+        return {'id': nodo, 'item': self.labels[nodo]}
+    
+    def _out_edges(self, nodo):
+        for i in range(self.out_offsets[nodo], self.out_offsets[nodo + 1]):
+            yield nodo, self.out_targets[i], self.out_symbols[i]
+    
+    def _in_edges(self, nodo):
+        for i in range(self.in_offsets[nodo], self.in_offsets[nodo + 1]):
+            yield self.in_sources[i], nodo, self.in_symbols[i]
+    
+    def _header(self):
+        return {
+            'kind': self.kind,
+            'total_nodes': len(self.labels),
+            'total_edges': self.num_edges,
+            'initial': 0 if self.labels else None,
+            'symbols': self.symbols,
+            'epsilon': EPSILON_EDGE
+        }
+    
+    def _check_node(self, nodo):
+        if not 0 <= nodo < len(self.labels):
+            raise ValueError(f"Estado fuera de rango: {nodo}")
+    
+    def page(self, start=0, limit=100):
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        start = max(0, start)
+        fin = min(start + limit, len(self.labels))
+        
+        edges = []
+        for nodo in range(start, fin):
+            edges.extend(self._out_edges(nodo))
+        
+        resultado = self._header()
+        resultado.update({
+            'start': start,
+            'limit': limit,
+            'next': fin if fin < len(self.labels) else None,
+            'nodes': [self._node(nodo) for nodo in range(start, fin)],
+            'edges': [list(edge) for edge in edges]
+        })
+        return resultado
+    
+    def neighborhood(self, nodo, depth=1, direction='both', limit=MAX_NEIGHBORHOOD_NODES):
+        self._check_node(nodo)
+        if direction not in ('out', 'in', 'both'):
+            raise ValueError(f"Dirección desconocida: '{direction}'")
+        limit = max(1, min(limit, MAX_NEIGHBORHOOD_NODES))
+        
+        distancias = {nodo: 0}
+        cola = deque([nodo])
+        truncated = False
+        while cola:
+            actual = cola.popleft()
+            if distancias[actual] >= depth:
+                continue
+            
+            vecinos = []
+            if direction in ('out', 'both'):
+                vecinos.extend(destino for _, destino, _ in self._out_edges(actual))
+            if direction in ('in', 'both'):
+                vecinos.extend(origen for origen, _, _ in self._in_edges(actual))
+            
+            for vecino in vecinos:
+                if vecino in distancias:
+                    continue
+                if len(distancias) >= limit:
+                    truncated = True
+                    break
+                distancias[vecino] = distancias[actual] + 1
+                cola.append(vecino)
+        
+        edges = [
+            list(edge)
+            for actual in distancias
+            for edge in self._out_edges(actual)
+            if edge[1] in distancias
+        ]
+        
+        resultado = self._header()
+        resultado.update({
+            'center': nodo,
+            'depth': depth,
+            'direction': direction,
+            'truncated': truncated,
+            'nodes': [
+                dict(self._node(actual), distance=distancia)
+                for actual, distancia in sorted(distancias.items())
+            ],
+            'edges': edges
+        })
+        return resultado
\ No newline at end of file
@@ -0,0 +1,138 @@
+class GrammarDelta:
+    
+    def __init__(self, previous_afd, grammar, uses_lookaheads):
+        anterior = previous_afd.grammar
+        self.previous_afd = previous_afd
+        self.grammar = grammar
+        self.uses_lookaheads = uses_lookaheads
+        self.previous_non_terminals = anterior.num_no_terminales
+        self.shift = grammar.num_no_terminales - anterior.num_no_terminales
+        self.stable = self._stable_numbering(anterior, grammar)
+        self.prefix = 0
+        self.core_limit = 0
+        self.template_dirty = bytearray(grammar.num_no_terminales)
+        self.suffix_dirty = bytearray()
+        self.follow_changed = bytearray(grammar.num_no_terminales)
+        self.terminals_added = len(grammar.simbolos) - len(anterior.simbolos) != self.shift
+        self._clean = None
+        if self.stable:
+            self._compare(anterior, grammar)
+    
+    def _stable_numbering(self, anterior, grammar):
+        # Los estados anteriores solo se pueden reutilizar si los no terminales
+        # conservan su id y los terminales antiguos solo se desplazan en bloque.
+        # Así los cores del prefijo común de producciones coinciden y los
+        # lookaheads se traducen con un simple desplazamiento de bits.
+        if self.shift < 0:
+            return False
+        nnt = anterior.num_no_terminales
+        terminales = anterior.simbolos[nnt:]
+        inicio = grammar.num_no_terminales
+        return (
+            grammar.simbolos[:nnt] == anterior.simbolos[:nnt] and
+            grammar.simbolos[inicio:inicio + len(terminales)] == terminales
+        )
+    
+    def _compare(self, anterior, grammar):
+        # Con la numeración estable basta comparar las producciones por id,
+        # desplazando los terminales de la gramática anterior.
+        k = self.shift
+        nnt = anterior.num_no_terminales
+        limite = min(len(grammar.producciones), len(anterior.producciones))
+        while self.prefix < limite:
+            lhs, rhs = anterior.producciones[self.prefix]
+            if k:
+                rhs = tuple(s + k if s >= nnt else s for s in rhs)
+            if grammar.producciones[self.prefix] != (lhs, rhs):
+                break
+            self.prefix += 1
+        self.core_limit = sum(len(rhs) + 1 for _, rhs in grammar.producciones[:self.prefix])
+        
+        for simbolo in range(grammar.num_no_terminales):
+            if simbolo >= nnt or grammar.follow_sets[simbolo] != anterior.follow_sets[simbolo] << k:
+                self.follow_changed[simbolo] = 1
+        
+        sucios = bytearray(grammar.num_no_terminales)
+        for lhs, _ in grammar.producciones[self.prefix:]:
+            sucios[lhs] = 1
+        for lhs, _ in anterior.producciones[self.prefix:]:
+            sucios[lhs] = 1
+        
+        # Con lookaheads, un core con el punto en i depende de FIRST del sufijo
+        # que empieza en i + 1: se marca solo si ese sufijo cambió.
+        self.suffix_dirty = bytearray(self.core_limit)
+        if self.uses_lookaheads:
+            core = 0
+            for numero, (lhs, rhs) in enumerate(grammar.producciones[:self.prefix]):
+                sufijos = grammar.suffix_first[numero]
+                sufijos_anteriores = anterior.suffix_first[numero]
+                for i in range(1, len(rhs) + 1):
+                    bits, nullable = sufijos_anteriores[i]
+                    if sufijos[i] != (bits << k, nullable):
+                        self.suffix_dirty[core + i - 1] = 1
+                if rhs and self.suffix_dirty[core]:
+                    sucios[lhs] = 1
+                core += len(rhs) + 1
+        
+        # La plantilla de clausura de A cambia si cambia la de cualquier no
+        # terminal alcanzable desde A por la esquina izquierda.
+        esquinas = [[] for _ in range(grammar.num_no_terminales)]
+        for lhs, rhs in grammar.producciones:
+            if rhs and not grammar.terminal_flags[rhs[0]]:
+                esquinas[rhs[0]].append(lhs)
+        pendientes = [simbolo for simbolo in range(grammar.num_no_terminales) if sucios[simbolo]]
+        while pendientes:
+            simbolo = pendientes.pop()
+            for lhs in esquinas[simbolo]:
+                if not sucios[lhs]:
+                    sucios[lhs] = 1
+                    pendientes.append(lhs)
+        self.template_dirty = sucios
+    
+    def translate_symbol(self, simbolo):
+        if simbolo < self.previous_non_terminals:
+            return simbolo
+        return simbolo + self.shift
+    
+    def translate_kernel(self, kernel):
+        if not self.shift or not self.uses_lookaheads:
+            return kernel
+        return tuple((core, lookaheads << self.shift) for core, lookaheads in kernel)
+    
+    def translate_cores(self, cores):
+        if not self.shift or not self.uses_lookaheads:
+            return cores
+        return {core: lookaheads << self.shift for core, lookaheads in cores.items()}
+    
+    def _clean_kernel(self, kernel, store):
+        terminal_flags = self.grammar.terminal_flags
+        for core, _ in kernel:
+            if core >= self.core_limit:
+                return False
+            simbolo = store.core_next[core]
+            if simbolo >= 0 and not terminal_flags[simbolo] and self.template_dirty[simbolo]:
+                return False
+            if self.suffix_dirty[core]:
+                return False
+        return True
+    
+    def clean_states(self, store):
+        # Por número de estado anterior, 1 si su kernel solo usa cores que no
+        # cambian: el estado y sus transiciones se pueden reutilizar tal cual.
+        if self._clean is None:
+            self._clean = bytearray(len(self.previous_afd.estados))
+            if self.stable:
+                for numero, estado in self.previous_afd.estados.items():
+                    self._clean[numero] = self._clean_kernel(estado.kernel, store)
+        return self._clean
+    
+    def previous_state(self, kernel, store):
+        if not self.stable or not self._clean_kernel(kernel, store):
+            return None
+        
+        if self.shift and self.uses_lookaheads:
+            kernel = tuple((core, lookaheads >> self.shift) for core, lookaheads in kernel)
+        numero = self.previous_afd.state_numbers.get(kernel)
+        if numero is None:
+            return None
+        return self.previous_afd.estados[numero]
\ No newline at end of file
@@ -1,33 +1,139 @@
+from .grammar import iter_bits
+
+class ItemStore:
+    def __init__(self, grammar):
+        self.grammar = grammar
+        self.stride = len(grammar.simbolos) + 1
+        self.core_offsets = []
+        self.core_prod = []
+        self.core_dot = []
+        self.core_next = []
+        for produccion, (_, rhs) in enumerate(grammar.producciones):
+            self.core_offsets.append(len(self.core_prod))
+            for dot_pos in range(len(rhs) + 1):
+                self.core_prod.append(produccion)
+                self.core_dot.append(dot_pos)
+                self.core_next.append(rhs[dot_pos] if dot_pos < len(rhs) else -1)
+        self.num_cores = len(self.core_prod)
+        self._items = {}
+        self._templates = {}
+    
+    @classmethod
+    def for_grammar(cls, grammar):
+        store = getattr(grammar, '_item_store', None)
+        if store is None:
+            store = cls(grammar)
+            grammar._item_store = store
+        return store
+    
+    def item_id(self, produccion, dot_pos, lookahead):
+        if lookahead is None:
+            lookahead = self.stride - 1
+        return (self.core_offsets[produccion] + dot_pos) * self.stride + lookahead
+    
+    def core_id(self, produccion, dot_pos):
+        return self.core_offsets[produccion] + dot_pos
+    
+    def get_core(self, core, lookahead):
+        return self.get(self.core_prod[core], self.core_dot[core], lookahead)
+    
+    def closure_template(self, nonterminal, lookaheads=True):
+        template = self._templates.get((nonterminal, lookaheads))
+        if template is not None:
+            return template
+        
+        grammar = self.grammar
+        spontaneous = {nonterminal: 0}
+        propagates = {nonterminal: True}
+        pendientes = [nonterminal]
+        
+        while pendientes:
+            simbolo = pendientes.pop()
+            for produccion in grammar.producciones_de[simbolo]:
+                rhs = grammar.producciones[produccion][1]
+                if not rhs or grammar.terminal_flags[rhs[0]]:
+                    continue
+                
+                destino = rhs[0]
+                bits, nullable = grammar.suffix_first[produccion][1]
+                if not lookaheads:
+                    bits, nullable = 0, True
+                elif not bits and not nullable:
+                    continue
+                if nullable:
+                    bits |= spontaneous[simbolo]
+                nuevo_prop = propagates[simbolo] and nullable
+                
+                if destino not in spontaneous:
+                    spontaneous[destino] = bits
+                    propagates[destino] = nuevo_prop
+                    pendientes.append(destino)
+                elif (spontaneous[destino] | bits != spontaneous[destino] or
+                      (nuevo_prop and not propagates[destino])):
+                    spontaneous[destino] |= bits
+                    propagates[destino] = propagates[destino] or nuevo_prop
+                    pendientes.append(destino)
+        
+        template = tuple(
+            (tuple(self.core_offsets[p] for p in grammar.producciones_de[simbolo]),
+             spontaneous[simbolo], propagates[simbolo])
+            for simbolo in spontaneous
+        )
+        self._templates[(nonterminal, lookaheads)] = template
+        return template
+    
+    def get(self, produccion, dot_pos=0, lookahead=None):
+        item_id = self.item_id(produccion, dot_pos, lookahead)
+        item = self._items.get(item_id)
+        if item is None:
+            item = LR1Item(self.grammar, produccion, dot_pos, lookahead, item_id)
+            self._items[item_id] = item
+        return item
+    
+    def __len__(self):
+        return len(self._items)
+
+
 class LR1Item:
-    def __init__(self, regla, dot_pos=0, lookahead='$', parent=None):
-        self.regla = regla
+    __slots__ = ('grammar', 'produccion', 'dot_pos', 'lookahead', 'next', 'id',
+                 'transition', 'transition_val', 'transition_e')
+    
+    def __init__(self, grammar, produccion, dot_pos, lookahead, item_id):
+        self.grammar = grammar
+        self.produccion = produccion
         self.dot_pos = dot_pos
         self.lookahead = lookahead
-        self.parent = parent
-        
-        self._parse_regla()
+        self.next = grammar.producciones[produccion][1]
+        self.id = item_id
         
         self.transition = None
         self.transition_val = None
         self.transition_e = None
-        
-        self.id = (self.regla, self.dot_pos, self.lookahead)
     
-    def _parse_regla(self):
-        partes = self.regla.split(" -> ")
-        self.current = partes[0]
-        self.next = partes[1].split() if len(partes) > 1 else []
-        self.dot_pos_mx = len(self.next)
+    @property
+    def regla(self):
+        return self.grammar.reglas[self.produccion]
+    
+    @property
+    def current(self):
+        return self.grammar.producciones[self.produccion][0]
+    
+    @property
+    def dot_pos_mx(self):
+        return len(self.next)
     
     def __str__(self):
+        simbolos = self.grammar.simbolos
         produccion = []
         for i, simbolo in enumerate(self.next):
             if i == self.dot_pos:
                 produccion.append(".")
-            produccion.append(simbolo)
-        if self.dot_pos == self.dot_pos_mx:
+            produccion.append(simbolos[simbolo])
+        if self.dot_pos == len(self.next):
             produccion.append(".")
-        return f"[{self.current} -> {' '.join(produccion)}, {self.lookahead}]"
+        if self.lookahead is None:
+            return f"[{simbolos[self.current]} -> {' '.join(produccion)}]"
+        return f"[{simbolos[self.current]} -> {' '.join(produccion)}, {simbolos[self.lookahead]}]"
     
     def __repr__(self):
         return self.__str__()
@@ -41,58 +147,52 @@ class LR1Item:
         return hash(self.id)
     
     def is_reducible(self):
-        return self.dot_pos >= self.dot_pos_mx
+        return self.dot_pos >= len(self.next)
     
     def get_next_symbol(self):
-        if self.dot_pos < self.dot_pos_mx:
+        if self.dot_pos < len(self.next):
             return self.next[self.dot_pos]
         return None
     
     def get_beta_alpha(self):
-        beta = self.next[self.dot_pos + 1:] if self.dot_pos + 1 < len(self.next) else []
+        beta = self.next[self.dot_pos + 1:]
         alpha = self.lookahead
         return beta, alpha
     
+    def first_beta_alpha(self):
+        bits = self.grammar.first_beta_lookahead(self.produccion, self.dot_pos + 1, self.lookahead)
+        return list(iter_bits(bits))
+    
     def advance_dot(self):
-        if self.dot_pos < self.dot_pos_mx:
-            return LR1Item(self.regla, self.dot_pos + 1, self.lookahead, self)
+        if self.dot_pos < len(self.next):
+            store = ItemStore.for_grammar(self.grammar)
+            return store.get(self.produccion, self.dot_pos + 1, self.lookahead)
         return None
     
     def next_transition(self, estados):
-        if self.dot_pos < self.dot_pos_mx:
+        if self.dot_pos < len(self.next):
             next_item = self.advance_dot()
-            if next_item and next_item.id not in estados:
-                self.transition_val = self.get_next_symbol()
-                self.transition = next_item
+            self.transition = next_item
+            self.transition_val = self.get_next_symbol()
+            if next_item.id not in estados:
                 estados[next_item.id] = next_item
                 return next_item
-            elif next_item:
-                self.transition = estados[next_item.id]
-                self.transition_val = self.get_next_symbol()
-                return None
         return None
     
     def next_transition_e(self, estados, grammar):
-        if self.dot_pos < self.dot_pos_mx:
+        if self.dot_pos < len(self.next):
             next_symbol = self.get_next_symbol()
             transition_e = []
             
-            if next_symbol and not grammar.is_terminal(next_symbol):
-                beta, alpha = self.get_beta_alpha()
-                first_beta_alpha = grammar.calculate_first(beta + [alpha])
+            if not grammar.is_terminal_id(next_symbol):
+                store = ItemStore.for_grammar(grammar)
+                first_beta_alpha = self.first_beta_alpha()
                 
-                producciones = grammar.get_producciones(next_symbol)
-                for produccion in producciones:
+                for produccion in grammar.producciones_de[next_symbol]:
                     for first_symbol in first_beta_alpha:
-                        new_item_id = (produccion, 0, first_symbol)
-                        if new_item_id not in estados:
-                            new_item = LR1Item(produccion, 0, first_symbol, self)
-                            estados[new_item_id] = new_item
-                            transition_e.append(new_item)
-                        else:
-                            existing_item = estados[new_item_id]
-                            if existing_item not in transition_e:
-                                transition_e.append(existing_item)
+                        new_item = store.get(produccion, 0, first_symbol)
+                        estados.setdefault(new_item.id, new_item)
+                        transition_e.append(new_item)
             
             self.transition_e = transition_e if transition_e else None
             return self.transition_e
@@ -0,0 +1,218 @@
+import hashlib
+import re
+
+from .grammar import END_MARKER, ERROR_TOKEN
+
+SKIP_DIRECTIVE = '%skip'
+DEFAULT_SKIP = r'\s+'
+READ_CHUNK = 1 << 16
+
+class LexerError(ValueError):
+    
+    def __init__(self, text, line, column):
+        super().__init__(f"Carácter inesperado {text!r} en línea {line}, columna {column}")
+        self.text = text
+        self.line = line
+        self.column = column
+
+
+def lexer_fingerprint(contenido):
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def parse_lexer_spec(contenido):
+    reglas = []
+    skips = []
+    for numero, linea in enumerate(contenido.split('\n'), 1):
+        linea = linea.strip()
+        if not linea or linea.startswith('#'):
+            continue
+        
+        if linea.startswith(SKIP_DIRECTIVE):
+            expresion = linea[len(SKIP_DIRECTIVE):].strip()
+            if not expresion:
+                raise ValueError(f"Línea {numero}: falta la expresión de {SKIP_DIRECTIVE}")
+            skips.append(expresion)
+            continue
+        
+        nombre, separador, expresion = linea.partition('=')
+        nombre = nombre.strip()
+        expresion = expresion.strip()
+        if not separador or not expresion or len(nombre.split()) != 1:
+            raise ValueError(f"Línea {numero}: se esperaba 'TERMINAL = expresión' o '{SKIP_DIRECTIVE} expresión'")
+        reglas.append((nombre, expresion))
+    return reglas, skips
+
+
+def _compile(descripcion, expresion):
+    try:
+        patron = re.compile(expresion)
+    except re.error as e:
+        raise ValueError(f"Expresión regular inválida para {descripcion}: {e}")
+    if patron.fullmatch('') is not None:
+        raise ValueError(f"La expresión de {descripcion} acepta la cadena vacía")
+    return patron
+
+
+class Lexer:
+    
+    def __init__(self, reglas, skips, terminales):
+        terminales = [t for t in terminales if t not in (END_MARKER, ERROR_TOKEN)]
+        conocidos = set(terminales)
+        
+        compiladas = []
+        for nombre, expresion in reglas:
+            if nombre not in conocidos:
+                raise ValueError(f"El token '{nombre}' no es un terminal de la gramática")
+            compiladas.append((nombre, _compile(f"el token '{nombre}'", expresion), {}))
+        
+        # Los terminales sin regla propia se reconocen literalmente. Si además
+        # encajan completos en una regla (palabras clave frente a 'id'), se
+        # resuelven al reconocer el lexema de esa regla, como en flex.
+        definidos = {nombre for nombre, _ in reglas}
+        literales = []
+        for terminal in terminales:
+            if terminal in definidos:
+                continue
+            regla = next((r for r in compiladas if r[1].fullmatch(terminal)), None)
+            if regla is None:
+                literales.append(terminal)
+            else:
+                regla[2][terminal] = terminal
+        
+        entradas = list(compiladas)
+        for expresion in skips or [DEFAULT_SKIP]:
+            entradas.append((None, _compile(f"'{SKIP_DIRECTIVE}'", expresion), None))
+        for literal in sorted(literales, key=len, reverse=True):
+            expresion = re.escape(literal)
+            if literal[-1].isalnum() or literal[-1] == '_':
+                expresion += r'(?!\w)'
+            entradas.append((literal, re.compile(expresion), None))
+        
+        # Un único patrón con un grupo por entrada: lastindex identifica la
+        # entrada reconocida aunque las expresiones tengan grupos propios.
+        alternativas = []
+        grupos = []
+        self._tipos = [None]
+        self._palabras = [None]
+        for nombre, patron, palabras in entradas:
+            grupos.append(len(self._tipos))
+            alternativas.append(f"({patron.pattern})")
+            self._tipos += [nombre] + [None] * patron.groups
+            self._palabras += [palabras or None] + [None] * patron.groups
+        try:
+            self.pattern = re.compile('|'.join(alternativas))
+        except re.error as e:
+            raise ValueError(f"No se pudo combinar las expresiones del lexer: {e}")
+        
+        # El patrón combinado da la primera entrada que encaja, no la más
+        # larga. Para el lexema más largo (en empate, la primera entrada, como
+        # en flex) basta mirar las entradas posteriores a la reconocida, con
+        # otro patrón combinado solo de ellas, y repetir desde la que encaje.
+        # Los literales van de más largo a más corto: detrás de uno no hay
+        # nada más largo que probar.
+        self._posteriores = [None] * len(self._tipos)
+        for i in range(min(len(entradas) - len(literales), len(entradas) - 1)):
+            siguientes = entradas[i + 1:]
+            mapa = [None]
+            for j, (_, patron, _) in enumerate(siguientes, i + 1):
+                mapa += [grupos[j]] + [None] * patron.groups
+            posterior = re.compile('|'.join(f"({patron.pattern})" for _, patron, _ in siguientes))
+            self._posteriores[grupos[i]] = (posterior, mapa)
+        self.terminals = terminales
+    
+    def nbytes(self):
+        patrones = [self.pattern] + [resto[0] for resto in self._posteriores if resto is not None]
+        return sum(2 * len(patron.pattern) for patron in patrones) + 64 * len(self._tipos)
+    
+    def scan(self, texto):
+        return self._scan(iter((texto,)), 0)
+    
+    def scan_stream(self, lector, chunk_size=READ_CHUNK):
+        return self._scan(iter(lambda: lector.read(chunk_size), ''), chunk_size)
+    
+    def tokens(self, texto, lexemes=None, locations=None):
+        return self._names(self.scan(texto), lexemes, locations)
+    
+    def stream_tokens(self, lector, chunk_size=READ_CHUNK, lexemes=None, locations=None):
+        return self._names(self.scan_stream(lector, chunk_size), lexemes, locations)
+    
+    def _names(self, tokens, lexemes, locations):
+        if lexemes is None and locations is None:
+            return (token[0] for token in tokens)
+        return self._collect(tokens, lexemes, locations)
+    
+    def _collect(self, tokens, lexemes, locations):
+        # locations guarda línea y columna aplanadas, dos enteros por token.
+        for tipo, lexema, linea, columna in tokens:
+            if lexemes is not None:
+                lexemes.append(lexema)
+            if locations is not None:
+                locations.extend((linea, columna))
+            yield tipo
+    
+    def _scan(self, bloques, ventana):
+        match = self.pattern.match
+        tipos = self._tipos
+        palabras = self._palabras
+        posteriores = self._posteriores
+        buffer = ''
+        posicion = 0
+        fin = False
+        linea = 1
+        columna = 1
+        
+        while True:
+            if fin or len(buffer) - posicion >= ventana:
+                m = match(buffer, posicion) if posicion < len(buffer) else None
+                if m is not None:
+                    grupo = m.lastindex
+                    final = m.end()
+                    resto = posteriores[grupo]
+                    while resto is not None:
+                        n = resto[0].match(buffer, posicion)
+                        if n is None:
+                            break
+                        otro = resto[1][n.lastindex]
+                        if n.end() > final:
+                            grupo = otro
+                            final = n.end()
+                        resto = posteriores[otro]
+                # Un lexema que llega al final del búfer podría continuar en el
+                # siguiente bloque: se lee más antes de aceptarlo.
+                if fin or (m is not None and final < len(buffer)):
+                    if m is None:
+                        if posicion < len(buffer):
+                            raise LexerError(buffer[posicion], linea, columna)
+                        return
+                    lexema = buffer[posicion:final]
+                    if not lexema:
+                        raise LexerError(buffer[posicion], linea, columna)
+                    
+                    tipo = tipos[grupo]
+                    if tipo is not None:
+                        reservadas = palabras[grupo]
+                        if reservadas is not None:
+                            tipo = reservadas.get(lexema, tipo)
+                        yield tipo, lexema, linea, columna
+                    
+                    saltos = lexema.count('\n')
+                    if saltos:
+                        linea += saltos
+                        columna = len(lexema) - lexema.rindex('\n')
+                    else:
+                        columna += len(lexema)
+                    posicion = final
+                    continue
+            
+            bloque = next(bloques, '')
+            if bloque:
+                buffer = buffer[posicion:] + bloque
+                posicion = 0
+            else:
+                fin = True
+
+
+def compile_lexer(contenido, terminales):
+    reglas, skips = parse_lexer_spec(contenido)
+    return Lexer(reglas, skips, terminales)
\ No newline at end of file
@@ -0,0 +1,124 @@
+from array import array
+
+ERROR_NODE = -2
+
+class ParseTree:
+    
+    def __init__(self, runtime, actions=None, lexemes=None):
+        self.runtime = runtime
+        self.actions = actions
+        self.lexemes = lexemes if lexemes is not None else []
+        # Un nodo por posición en los arrays paralelos. Las hojas llevan
+        # production = -1 y los nodos sintetizados al recuperarse de un error
+        # production = ERROR_NODE, ambos sin hijos; los hijos de cada nodo interno son contiguos en
+        # `children` porque se añaden justo al reducir.
+        self.production = array('i')
+        self.symbol = array('i')
+        self.start = array('i')
+        self.end = array('i')
+        self.child_offset = array('i')
+        self.children = array('i')
+        self.root = -1
+        self.value = None
+        self._nodes = []
+        self._values = [] if actions is not None else None
+    
+    def __len__(self):
+        return len(self.production)
+    
+    def shift(self, columna, posicion):
+        nodo = len(self.production)
+        self.production.append(-1)
+        self.symbol.append(self.runtime.num_no_terminales + columna)
+        self.start.append(posicion)
+        self.end.append(posicion + 1)
+        self.child_offset.append(len(self.children))
+        self._nodes.append(nodo)
+        if self._values is not None:
+            self._values.append(self.lexemes[posicion] if posicion < len(self.lexemes) else None)
+    
+    def reduce(self, regla, pops, posicion):
+        nodo = len(self.production)
+        nodos = self._nodes
+        self.child_offset.append(len(self.children))
+        if pops:
+            hijos = nodos[-pops:]
+            del nodos[-pops:]
+            self.children.extend(hijos)
+            self.start.append(self.start[hijos[0]])
+            self.end.append(self.end[hijos[-1]])
+        else:
+            self.start.append(posicion)
+            self.end.append(posicion)
+        self.production.append(regla)
+        self.symbol.append(self.runtime.prod_lhs[regla])
+        nodos.append(nodo)
+        
+        valores = self._values
+        if valores is not None:
+            # Sin acción propia el nodo toma el valor de su primer hijo, como $$ = $1.
+            argumentos = valores[len(valores) - pops:] if pops else []
+            if pops:
+                del valores[-pops:]
+            accion = self.actions.get(regla)
+            if accion is not None:
+                valores.append(accion(*argumentos))
+            else:
+                valores.append(argumentos[0] if argumentos else None)
+    
+    def recover(self, pops, simbolo, posicion):
+        nodo = len(self.production)
+        nodos = self._nodes
+        inicio = posicion
+        if pops:
+            inicio = self.start[nodos[-pops]]
+            del nodos[-pops:]
+        self.production.append(ERROR_NODE)
+        self.symbol.append(simbolo)
+        self.start.append(inicio)
+        self.end.append(posicion)
+        self.child_offset.append(len(self.children))
+        nodos.append(nodo)
+        if self._values is not None:
+            if pops:
+                del self._values[-pops:]
+            self._values.append(None)
+    
+    def accept(self):
+        if self._nodes:
+            self.root = self._nodes[-1]
+        if self._values:
+            self.value = self._values[-1]
+    
+    def is_leaf(self, nodo):
+        return self.production[nodo] < 0
+    
+    def children_of(self, nodo):
+        if self.production[nodo] < 0:
+            return self.children[0:0]
+        inicio = self.child_offset[nodo]
+        return self.children[inicio:inicio + self.runtime.prod_len[self.production[nodo]]]
+    
+    def label(self, nodo):
+        return self.runtime.simbolos[self.symbol[nodo]]
+    
+    def text(self, nodo):
+        return " ".join(str(lexema) for lexema in self.lexemes[self.start[nodo]:self.end[nodo]])
+    
+    def nbytes(self):
+        arrays = (self.production, self.symbol, self.start, self.end, self.child_offset, self.children)
+        return sum(len(a) * a.itemsize for a in arrays)
+    
+    def to_dict(self):
+        return {
+            'root': self.root,
+            'nodes': len(self.production),
+            'symbols': list(self.runtime.simbolos),
+            'production': self.production.tolist(),
+            'symbol': self.symbol.tolist(),
+            'start': self.start.tolist(),
+            'end': self.end.tolist(),
+            'child_offset': self.child_offset.tolist(),
+            'children': self.children.tolist(),
+            'tokens': list(self.lexemes)
+        }
\ No newline at end of file
@@ -1,38 +1,97 @@
-from .grammar import Grammar
-from .item import LR1Item
+from array import array
+
+from .grammar import END_MARKER, Grammar
 from .afn import AFN
-from .afd import AFD
+from .afd import AFD, LALR1, LR1
+from .cancel import BuildCancelled
+from .context import BuildContext
+from .glr import GLRDriver
+from .graph_export import AutomatonGraph
 from .table import LRTable
 from .transition_table import TransitionTable
 from .visualizer import Visualizer
 
+AUTOMATON_KINDS = ('afn', 'afd')
+
 class LR1Parser:
     
-    def __init__(self, grammar_content, input_string=""):
+    def __init__(self, grammar_content, input_string="", mode=LR1, cancel=None, previous=None):
         self.grammar_content = grammar_content
         self.input_string = input_string
-        self.grammar = None
-        self.afn = None
-        self.afd = None
-        self.table = None
+        self.mode = mode
+        self.context = BuildContext(cancel)
+        # LALR(1) no se reconstruye de forma incremental: el AFD guardado es
+        # el fusionado, sin los estados LR(1) canónicos de los que saldría la
+        # reutilización, y una edición puede cambiar los lookaheads de
+        # cualquier estado fusionado. Se construye completo.
+        if previous is not None and previous.mode == mode and mode != LALR1 and previous._afd is not None:
+            self.context.reuse(previous._afd, previous._table)
         self.transition_table = None
         self.visualizer = Visualizer()
         self.is_built = False
         self.build_errors = []
+        self._grammar = None
+        self._afn = None
+        self._afd = None
+        self._table = None
+        self._visualizations = {}
+        self._table_data = None
+        self._summary = None
+    
+    @classmethod
+    def from_artifact(cls, artifact):
+        parser = cls(artifact.grammar_content, mode=artifact.mode)
+        parser._table = artifact.table
+        parser._summary = artifact.summary
+        parser.context = None
+        parser.is_built = True
+        return parser
+    
+    def __getstate__(self):
+        if self.is_built:
+            self.get_summary()
+        estado = self.__dict__.copy()
+        estado['_afn'] = None
+        estado['context'] = None
+        return estado
+    
+    @property
+    def grammar(self):
+        if self._grammar is None:
+            self._grammar = Grammar(self.grammar_content, self.context)
+        return self._grammar
+    
+    @property
+    def afn(self):
+        if self._afn is None:
+            self._afn = AFN(self.grammar)
+        return self._afn
+    
+    @property
+    def afd(self):
+        if self._afd is None:
+            self._afd = AFD(self.grammar, self.mode, self.context)
+        return self._afd
+    
+    @property
+    def table(self):
+        if self._table is None:
+            self._table = LRTable(self.afd, self.context)
+        return self._table
     
     def build(self):
         try:
-            self.grammar = Grammar(self.grammar_content)
-            self.afn = AFN(self.grammar)
-            self.afd = AFD(self.afn)
-            self.table = LRTable(self.afd)
+            self.table
             
             if self.input_string:
                 self.transition_table = TransitionTable(self.input_string, self.table)
             
             self.is_built = True
+            self.context = None
             return True
             
+        except BuildCancelled:
+            raise
         except Exception as e:
             error_msg = f"Error en la construcción: {e}"
             print(error_msg)
@@ -40,22 +99,130 @@ class LR1Parser:
             self.is_built = False
             return False
     
-    def generate_visualizations(self):
+    def generate_visualizations(self, include_afn=True):
         if not self.is_built:
             print("Parser no construido. No se pueden generar visualizaciones.")
             return {}
         
-        visualizations = {}
+        visualizations = self._visualizations
         
-        afn_img = self.visualizer.visualize_afn(self.afn)
-        if afn_img:
-            visualizations['afn'] = afn_img
+        if include_afn and 'afn' not in visualizations:
+            afn_img = self.visualizer.visualize_afn(self.afn)
+            if afn_img:
+                visualizations['afn'] = afn_img
         
-        afd_img = self.visualizer.visualize_afd(self.afd)
-        if afd_img:
-            visualizations['afd'] = afd_img
+        if 'afd' not in visualizations:
+            afd_img = self.visualizer.visualize_afd(self.afd)
+            if afd_img:
+                visualizations['afd'] = afd_img
         
-        return visualizations
+        if include_afn:
+            return dict(visualizations)
+        return {k: v for k, v in visualizations.items() if k != 'afn'}
+    
+    def render_automaton(self, kind, format='png', cancel=None):
+        if kind not in AUTOMATON_KINDS:
+            raise ValueError(f"Autómata desconocido: '{kind}'")
+        if kind == 'afn':
+            dot = self.visualizer.afn_graph(self.afn)
+        else:
+            dot = self.visualizer.afd_graph(self.afd)
+        if cancel is not None:
+            cancel.check()
+        return self.visualizer.render(dot, format)
+    
+    def automaton_graph(self, kind, cancel=None):
+        if kind not in AUTOMATON_KINDS:
+            raise ValueError(f"Autómata desconocido: '{kind}'")
+        automata = self.afn if kind == 'afn' else self.afd
+        if cancel is not None:
+            cancel.check()
+        if kind == 'afn':
+            return AutomatonGraph.from_afn(automata)
+        return AutomatonGraph.from_afd(automata)
+    
+    def afn_state_count(self):
+        # En LR(1) y LALR(1) los ítems del AFN son la unión de los del AFD. En
+        # LR(0) y SLR(1) el AFD no tiene lookaheads y contarlos exigiría
+        # construir el AFN: solo se informa si ya se construyó para dibujarlo.
+        if self._afn is not None:
+            return len(self._afn)
+        if self.afd.uses_lookaheads:
+            return self.afd.count_items()
+        return None
+    
+    def get_table_data(self):
+        if self._table_data is None:
+            self._table_data = self.table.to_dict()
+        return self._table_data
+    
+    def get_grammar_data(self):
+        runtime = self.table.compressed
+        return {
+            'terminals': [s for s in runtime.simbolos[runtime.num_no_terminales:] if s != END_MARKER],
+            'non_terminals': runtime.simbolos[:runtime.num_no_terminales],
+            'productions': runtime.reglas
+        }
+    
+    def parse_input(self, input_string, lexer=None, record=True, build_tree=False, actions=None, recover=False,
+                    max_steps=None, cancel=None):
+        if not self.is_built:
+            return None
+        tokens = lexemes = locations = None
+        if lexer is not None:
+            lexemes = [] if build_tree else None
+            locations = array('i') if recover else None
+            tokens = lexer.tokens(input_string, lexemes, locations)
+        return TransitionTable(input_string, self.table, record=record, tokens=tokens,
+                               build_tree=build_tree, actions=actions, lexemes=lexemes,
+                               recover=recover, locations=locations, max_steps=max_steps, cancel=cancel)
+    
+    def stream_input(self, input_string, lexer=None, recover=False, max_steps=None):
+        if not self.is_built:
+            return None
+        tokens = locations = None
+        if lexer is not None:
+            locations = array('i') if recover else None
+            tokens = lexer.tokens(input_string, locations=locations)
+        return TransitionTable(input_string, self.table, record=False, tokens=tokens, run=False,
+                               recover=recover, locations=locations, max_steps=max_steps)
+    
+    def parse_stream(self, lector, lexer, build_tree=False, actions=None, recover=False):
+        if not self.is_built:
+            return None
+        # El archivo se lee por bloques y cada token llega al driver según se
+        # reconoce: ni el texto ni la lista de tokens se materializan enteros.
+        lexemes = [] if build_tree else None
+        locations = array('i') if recover else None
+        tokens = lexer.stream_tokens(lector, lexemes=lexemes, locations=locations)
+        return TransitionTable('', self.table, record=False, tokens=tokens,
+                               build_tree=build_tree, actions=actions, lexemes=lexemes,
+                               recover=recover, locations=locations)
+    
+    def parse_glr(self, input_string, lexer=None, max_steps=None, cancel=None):
+        if not self.is_built:
+            return None
+        # Las celdas con conflicto se exploran todas en paralelo; el resultado
+        # es un bosque compartido con todas las derivaciones de la entrada.
+        tokens = lexemes = None
+        if lexer is not None:
+            lexemes = []
+            tokens = lexer.tokens(input_string, lexemes)
+        return GLRDriver(input_string, self.table, tokens=tokens, lexemes=lexemes, max_steps=max_steps,
+                         cancel=cancel)
+    
+    def estimate_memory(self):
+        if not self.is_built:
+            return 1024
+        
+        total = 256 * len(self.table.compressed.reglas)
+        if self._afn is not None:
+            total += 600 * len(self._afn)
+        if self._afd is not None:
+            total += sum(400 + 120 * len(estado.cores) for estado in self._afd.estados.values())
+        total += self.table.estimate_memory()
+        total += sum(len(img) for img in self._visualizations.values())
+        return total
     
     def get_summary(self):
         if not self.is_built:
@@ -64,7 +231,12 @@ class LR1Parser:
                 "errors": self.build_errors
             }
         
-        return {
+        if self._summary is not None:
+            if self._summary["afn"]["states"] is None and self._afn is not None:
+                self._summary["afn"]["states"] = len(self._afn)
+            return self._summary
+        
+        self._summary = {
             "status": "built",
             "grammar": {
                 "rules": len(self.grammar.reglas),
@@ -73,17 +245,22 @@ class LR1Parser:
                 "start_symbol": self.grammar.start_symbol
             },
             "afn": {
-                "states": len(self.afn)
+                "states": self.afn_state_count()
             },
             "afd": {
-                "states": len(self.afd)
+                "states": len(self.afd),
+                "mode": self.afd.mode,
+                "states_before_merge": self.afd.states_before_merge,
+                "merge_conflicts": self.afd.merge_conflicts
             },
             "table": {
-                "states": len(self.table.action_table),
+                "states": self.table.compressed.num_states,
                 "conflicts": len(self.table.conflicts),
-                "is_lr1": not self.table.has_conflicts()
+                "is_lr1": not self.table.has_conflicts(),
+                "grammar_class": self.table.grammar_class()
             }
         }
+        return self._summary
     
     def parse(self):
         if not self.is_built:
@@ -91,13 +268,9 @@ class LR1Parser:
                 return None
         
         result = {
-            'table': self.table.to_dict(),
+            'table': self.get_table_data(),
             'conflicts': self.table.conflicts if hasattr(self.table, 'conflicts') else [],
-            'grammar': {
-                'terminals': list(self.grammar.get_simbolos_terminales()),
-                'non_terminals': list(self.grammar.get_simbolos_no_terminales()),
-                'productions': self.grammar.reglas
-            }
+            'grammar': self.get_grammar_data()
         }
         
         if hasattr(self, 'transition_table') and self.transition_table:
@@ -109,4 +282,67 @@ class LR1Parser:
                 'current_position': self.transition_table.current_position
             }
         
-        return result
\ No newline at end of file
+        return result
+
+
+def build_parser(grammar_content, mode=LR1, cancel=None):
+    parser = LR1Parser(grammar_content, mode=mode, cancel=cancel)
+    parser.build()
+    return parser
+
+
+def rebuild_parser(previous, grammar_content, mode=None, cancel=None):
+    mode = previous.mode if mode is None else mode
+    parser = LR1Parser(grammar_content, mode=mode, cancel=cancel, previous=previous)
+    parser.build()
+    return parser
+
+
+def parse_request(parser, input_string, lexer=None, record=True, build_tree=False, recover=False, glr=False,
+                  max_steps=None, cancel=None):
+    # Todo lo que sigue a la construcción (resumen, tabla y análisis de la
+    # cadena) corre también en el ejecutor, con el mismo plazo que ella.
+    parse_result = parser.parse()
+    if input_string and glr:
+        # Las gramáticas con conflictos se analizan con todas las acciones de
+        # cada celda; no hay traza de pila única.
+        driver = parser.parse_glr(input_string, lexer, max_steps=max_steps, cancel=cancel)
+        glr_summary = driver.get_summary()
+        parse_result['transition_table'] = {
+            'input_string': driver.input_string,
+            'transitions': [],
+            'accepted': driver.accepted,
+            'error': driver.error_message,
+            'errors': [],
+            'final_stack': [],
+            'current_position': driver.current_position,
+            'parse_tree': None,
+            'forest': driver.forest.to_dict() if driver.accepted else None,
+            'ambiguous': glr_summary['ambiguous'],
+            'trees': glr_summary['trees']
+        }
+    elif input_string:
+        transition_table = parser.parse_input(input_string, lexer, record=record, build_tree=build_tree,
+                                              recover=recover, max_steps=max_steps, cancel=cancel)
+        parse_result['transition_table'] = {
+            'input_string': transition_table.input_string,
+            'transitions': transition_table.transitions,
+            'accepted': transition_table.is_accepted(),
+            'error': transition_table.error_message,
+            'errors': transition_table.errors,
+            'final_stack': transition_table.stack,
+            'current_position': transition_table.current_position,
+            'parse_tree': transition_table.tree.to_dict() if transition_table.tree is not None else None,
+            'forest': None,
+            'ambiguous': False,
+            'trees': None
+        }
+    return parser.get_summary(), parse_result
+
+
+def render_automaton(parser, kind, format='png', cancel=None):
+    return parser.render_automaton(kind, format, cancel)
+
+
+def export_graph(parser, kind, cancel=None):
+    return parser.automaton_graph(kind, cancel)
\ No newline at end of file
@@ -1,14 +1,30 @@
+from array import array
+
+from .afd import LR0, SLR1, MODE_NAMES
+from .compressed_table import ACCEPT, CompressedTable, decode_action
+from .context import BuildContext
+from .grammar import iter_bits
+
 class LRTable:
     
-    def __init__(self, afd):
+    def __init__(self, afd, context=None):
         self.afd = afd
         self.grammar = afd.grammar
-        self.action_table = {}
-        self.goto_table = {}
+        self.mode = afd.mode
+        self.context = context if context is not None else BuildContext()
         self.terminales = self._get_terminales()
         self.no_terminales = self.grammar.get_simbolos_no_terminales()
         self.conflicts = {}
+        self.compressed = None
+        self._terminal_bits = sum(
+            1 << t for t in range(self.grammar.num_no_terminales, len(self.grammar.simbolos))
+        )
         self._build_table()
+        # Las filas solo se conservan empaquetadas en `compressed`; action_table
+        # y goto_table se derivan de él cuando se piden. El AFD lo guarda el
+        # parser, la tabla no lo necesita después de construirse.
+        self.afd = None
+        self.context = None
     
     def _get_terminales(self):
         terminales = self.grammar.get_simbolos_terminales()
@@ -16,33 +32,127 @@ class LRTable:
         return terminales
     
     def _build_table(self):
-        for estado_num in self.afd.estados:
-            self.action_table[estado_num] = {}
-            self.goto_table[estado_num] = {}
+        # Durante la construcción cada fila es un dict columna -> código de
+        # acción (o no terminal -> estado en GOTO), ya en el formato empaquetado.
+        num_estados = len(self.afd.estados)
+        self._acciones = [{} for _ in range(num_estados)]
+        self._gotos = [{} for _ in range(num_estados)]
+        self._celdas = {}
+        
+        anterior = self.context.previous_table if self.context.delta is not None else None
+        reused = self.context.reused if anterior is not None else {}
+        reduces_changed = self._reduces_changed() if reused else None
+        destinos = self._renumbering() if reused else None
+        origen = array('i', [-1]) * num_estados if reused else None
         
         for estado_num, estado in self.afd.estados.items():
-            self._fill_state_entries(estado_num, estado)
+            self.context.check()
+            estado_anterior = reused.get(estado.id)
+            if estado_anterior is None or (
+                    reduces_changed is not None and self._reduces_lhs(estado, reduces_changed)):
+                self._fill_state_entries(estado_num, estado)
+            else:
+                self._copy_state_entries(estado_num, estado_anterior, anterior, destinos)
+                origen[estado_num] = estado_anterior.number
+        
+        self.compressed = CompressedTable.from_rows(
+            self.grammar, self._acciones, self._gotos, self._celdas,
+            anterior.compressed if reused else None, origen, destinos
+        )
+        self._acciones = self._gotos = self._celdas = None
+    
+    def _reduces_changed(self):
+        # Las filas reutilizadas copian las reducciones de la tabla anterior;
+        # solo cambian si cambia FOLLOW (SLR) o el conjunto de terminales (LR0).
+        delta = self.context.delta
+        if self.mode == SLR1:
+            return delta.follow_changed
+        if self.mode == LR0 and delta.terminals_added:
+            return bytearray(b'\x01') * self.grammar.num_no_terminales
+        return None
+    
+    def _reduces_lhs(self, estado, lhs_flags):
+        store = self.afd.item_store
+        producciones = self.grammar.producciones
+        return any(
+            lhs_flags[producciones[store.core_prod[core]][0]]
+            for core in estado.cores if store.core_next[core] < 0
+        )
+    
+    def _renumbering(self):
+        # Número nuevo de cada estado anterior: directo para los reutilizados y
+        # por kernel para el resto (-1 si ya no existe).
+        delta = self.context.delta
+        destinos = array('i', [-1]) * len(delta.previous_afd.estados)
+        for numero, estado in self.context.reused_states.items():
+            destinos[numero] = estado.number
+        numeros = self.afd.state_numbers
+        for numero, estado in delta.previous_afd.estados.items():
+            if destinos[numero] < 0:
+                destinos[numero] = numeros.get(delta.translate_kernel(estado.kernel), -1)
+        return destinos
+    
+    def _copy_state_entries(self, estado_num, estado_anterior, anterior, destinos):
+        # Las columnas de terminal no cambian entre las dos gramáticas (ver
+        # GrammarDelta): la fila ACTION se queda empaquetada donde estaba en
+        # la tabla anterior (from_rows solo renumera sus estados destino) y los
+        # no terminales antiguos conservan su id.
+        previo = anterior.compressed
+        self._acciones[estado_num] = None
+        self._gotos[estado_num] = {
+            no_terminal: destinos[destino]
+            for no_terminal, destino in previo.row_gotos(estado_anterior.number).items()
+        }
+        
+        conflicts = anterior.conflicts.get(estado_anterior.number)
+        if conflicts:
+            self.conflicts[estado_num] = {
+                terminal: dict(
+                    info,
+                    action1=self._translate_action(info['action1'], destinos),
+                    action2=self._translate_action(info['action2'], destinos)
+                )
+                for terminal, info in conflicts.items()
+            }
+            self._celdas[estado_num] = {
+                columna: [self._translate_code(code, destinos) for code in codes]
+                for columna, codes in previo.conflict_codes[estado_anterior.number].items()
+            }
+    
+    def _translate_code(self, code, destinos):
+        return destinos[code - 1] + 1 if code > 0 else code
+    
+    def _translate_action(self, action, destinos):
+        if action[0] == 'shift':
+            return ('shift', destinos[action[1]])
+        return action
     
     def _fill_state_entries(self, estado_num, estado):
-        for item in estado.items:
-            if item.is_reducible():
-                self._handle_reduce_action(estado_num, item)
+        store = self.afd.item_store
+        for core, lookaheads in estado.cores.items():
+            next_symbol = store.core_next[core]
+            if next_symbol < 0:
+                self._handle_reduce_action(estado_num, store.core_prod[core], lookaheads)
             else:
-                self._handle_shift_action(estado_num, estado, item)
+                self._handle_shift_action(estado_num, estado, next_symbol)
     
-    def _handle_reduce_action(self, estado_num, item):
-        if item.regla.startswith("S' ->"):
-            if item.lookahead == '$':
-                self._add_action(estado_num, '$', 'accept', 0)
-        else:
-            regla_num = self._get_regla_number(item.regla)
-            self._add_action(estado_num, item.lookahead, 'reduce', regla_num)
+    def _reduce_lookaheads(self, produccion, lookaheads):
+        if self.mode == SLR1:
+            return self.grammar.follow_sets[self.grammar.producciones[produccion][0]]
+        if self.mode == LR0:
+            return self._terminal_bits
+        return lookaheads
     
-    def _handle_shift_action(self, estado_num, estado, item):
-        next_symbol = item.get_next_symbol()
-        if not next_symbol:
-            return
-        
+    def _handle_reduce_action(self, estado_num, produccion, lookaheads):
+        num_no_terminales = self.grammar.num_no_terminales
+        for lookahead in iter_bits(self._reduce_lookaheads(produccion, lookaheads)):
+            if produccion == 0:
+                if lookahead == self.grammar.end_id:
+                    self._add_action(estado_num, lookahead - num_no_terminales, ACCEPT)
+            else:
+                self._add_action(estado_num, lookahead - num_no_terminales, -(produccion + 1))
+    
+    def _handle_shift_action(self, estado_num, estado, next_symbol):
         target_state = estado.get_transition(next_symbol)
         if not target_state:
             return
@@ -51,42 +161,48 @@ class LRTable:
         if target_num == -1:
             return
         
-        if self.grammar.is_terminal(next_symbol):
-            self._add_action(estado_num, next_symbol, 'shift', target_num)
+        if self.grammar.is_terminal_id(next_symbol):
+            self._add_action(estado_num, next_symbol - self.grammar.num_no_terminales, target_num + 1)
         else:
-            self.goto_table[estado_num][next_symbol] = target_num
-    
-    def _add_action(self, estado, terminal, accion, valor):
-        if terminal in self.action_table[estado]:
-            existing_action = self.action_table[estado][terminal]
-            if existing_action != (accion, valor):
-                self._record_conflict(estado, terminal, existing_action, (accion, valor))
-                if self._should_prefer_new_action(existing_action, (accion, valor)):
-                    self.action_table[estado][terminal] = (accion, valor)
-        else:
-            self.action_table[estado][terminal] = (accion, valor)
+            self._gotos[estado_num][next_symbol] = target_num
     
-    def _should_prefer_new_action(self, existing_action, new_action):
-        existing_type, existing_val = existing_action
-        new_type, new_val = new_action
-        
-        if existing_type == 'reduce' and new_type == 'shift':
+    def _add_action(self, estado, columna, code):
+        fila = self._acciones[estado]
+        existing_code = fila.get(columna)
+        if existing_code is None:
+            fila[columna] = code
+        elif existing_code != code:
+            self._record_conflict(estado, columna, existing_code, code)
+            if self._should_prefer_new_action(existing_code, code):
+                fila[columna] = code
+    
+    def _should_prefer_new_action(self, existing_code, new_code):
+        # Códigos empaquetados: shift > 0, accept = -1, reduce r = -(r + 1).
+        if existing_code < ACCEPT and new_code > 0:
             return True
-        elif existing_type == 'shift' and new_type == 'reduce':
+        elif existing_code > 0 and new_code < ACCEPT:
             return False
             
-        elif existing_type == 'reduce' and new_type == 'reduce':
-            return new_val < existing_val
+        elif existing_code < ACCEPT and new_code < ACCEPT:
+            return new_code > existing_code
             
         return False
     
-    def _record_conflict(self, estado, terminal, action1, action2):
+    def _record_conflict(self, estado, columna, code1, code2):
         if estado not in self.conflicts:
             self.conflicts[estado] = {}
         
-        conflict_type = self._determine_conflict_type(action1, action2)
+        # `conflicts` describe el último par en conflicto; `_celdas` guarda
+        # todas las acciones de la celda para el driver GLR.
+        acciones = self._celdas.setdefault(estado, {}).setdefault(columna, [code1])
+        if code2 not in acciones:
+            acciones.append(code2)
+        
+        action1 = decode_action(code1)
+        action2 = decode_action(code2)
+        terminal = self.grammar.simbolos[self.grammar.num_no_terminales + columna]
         self.conflicts[estado][terminal] = {
-            'type': conflict_type,
+            'type': self._determine_conflict_type(action1, action2),
             'action1': action1,
             'action2': action2
         }
@@ -101,82 +217,123 @@ class LRTable:
         else:
             return 'unknown'
     
-    def _get_regla_number(self, regla):
-        try:
-            return self.grammar.reglas.index(regla)
-        except ValueError:
-            return -1
+    @property
+    def action_table(self):
+        return action_table_of(self.compressed)
+    
+    @property
+    def goto_table(self):
+        return goto_table_of(self.compressed)
     
     def get_action(self, estado, terminal):
-        return self.action_table.get(estado, {}).get(terminal)
+        return self.compressed.get_action(estado, terminal)
     
     def get_goto(self, estado, no_terminal):
-        return self.goto_table.get(estado, {}).get(no_terminal)
+        return self.compressed.get_goto(estado, no_terminal)
     
     def has_conflicts(self):
         return len(self.conflicts) > 0
     
+    def grammar_class(self):
+        if self.has_conflicts():
+            return None
+        return MODE_NAMES[self.mode]
+    
+    def estimate_memory(self):
+        total = sum(400 * len(celdas) for celdas in self.conflicts.values())
+        return total + self.compressed.nbytes()
+    
     def to_dict(self):
-        terminales_list = sorted(list(self.terminales))
-        no_terminales_list = sorted(list(self.no_terminales))
-        
-        table_data = {
-            "headers": {
-                "action": terminales_list,
-                "goto": no_terminales_list
-            },
-            "rows": []
+        return table_to_dict(
+            self.action_table, self.goto_table, self.terminales, self.no_terminales,
+            self.conflicts, self.grammar.reglas
+        )
+
+
+def action_table_of(compressed):
+    # Tabla ACTION como dicts por estado con nombres de terminal y tuplas de
+    # acción, solo con las celdas explícitas de cada fila.
+    simbolos = compressed.simbolos
+    num_no_terminales = compressed.num_no_terminales
+    return {
+        estado: {
+            simbolos[num_no_terminales + columna]: decode_action(code)
+            for columna, code in compressed.row_actions(estado).items()
+        }
+        for estado in range(compressed.num_states)
+    }
+
+
+def goto_table_of(compressed):
+    simbolos = compressed.simbolos
+    return {
+        estado: {simbolos[no_terminal]: destino for no_terminal, destino in compressed.row_gotos(estado).items()}
+        for estado in range(compressed.num_states)
+    }
+
+
+def table_to_dict(action_table, goto_table, terminales, no_terminales, conflicts, reglas):
+    terminales_list = sorted(list(terminales))
+    no_terminales_list = sorted(list(no_terminales))
+    
+    table_data = {
+        "headers": {
+            "action": terminales_list,
+            "goto": no_terminales_list
+        },
+        "rows": []
+    }
+    
+    for estado_num in sorted(action_table.keys()):
+        row = {
+            "state": estado_num,
+            "action": {},
+            "goto": {}
         }
         
-        for estado_num in sorted(self.action_table.keys()):
-            row = {
-                "state": estado_num,
-                "action": {},
-                "goto": {}
-            }
-            
-            for terminal in terminales_list:
-                action = self.get_action(estado_num, terminal)
-                if action:
-                    action_type, value = action
-                    if action_type == 'shift':
-                        row["action"][terminal] = f"s{value}"
-                    elif action_type == 'reduce':
-                        row["action"][terminal] = f"r{value}"
-                    elif action_type == 'accept':
-                        row["action"][terminal] = "acc"
-                else:
-                    row["action"][terminal] = ""
-            
-            for no_terminal in no_terminales_list:
-                goto = self.get_goto(estado_num, no_terminal)
-                row["goto"][no_terminal] = str(goto) if goto is not None else ""
-            
-            table_data["rows"].append(row)
+        for terminal in terminales_list:
+            action = action_table[estado_num].get(terminal)
+            if action:
+                action_type, value = action
+                if action_type == 'shift':
+                    row["action"][terminal] = f"s{value}"
+                elif action_type == 'reduce':
+                    row["action"][terminal] = f"r{value}"
+                elif action_type == 'accept':
+                    row["action"][terminal] = "acc"
+            else:
+                row["action"][terminal] = ""
         
-        conflicts_data = []
-        for estado, estado_conflicts in self.conflicts.items():
-            for terminal, conflict_info in estado_conflicts.items():
-                conflicts_data.append({
-                    "state": estado,
-                    "terminal": terminal,
-                    "type": conflict_info["type"],
-                    "action1": self._format_action(conflict_info["action1"]),
-                    "action2": self._format_action(conflict_info["action2"])
-                })
+        for no_terminal in no_terminales_list:
+            goto = goto_table[estado_num].get(no_terminal)
+            row["goto"][no_terminal] = str(goto) if goto is not None else ""
         
-        return {
-            "table": table_data,
-            "conflicts": conflicts_data,
-            "grammar_rules": self.grammar.reglas
-        }
+        table_data["rows"].append(row)
+    
+    conflicts_data = []
+    for estado, estado_conflicts in conflicts.items():
+        for terminal, conflict_info in estado_conflicts.items():
+            conflicts_data.append({
+                "state": estado,
+                "terminal": terminal,
+                "type": conflict_info["type"],
+                "action1": format_action(conflict_info["action1"]),
+                "action2": format_action(conflict_info["action2"])
+            })
     
-    def _format_action(self, action):
-        action_type, value = action
-        if action_type == 'shift':
-            return f"shift {value}"
-        elif action_type == 'reduce':
-            return f"reduce {value}"
-        elif action_type == 'accept':
-            return "accept"
-        return str(action)
\ No newline at end of file
+    return {
+        "table": table_data,
+        "conflicts": conflicts_data,
+        "grammar_rules": reglas
+    }
+
+
+def format_action(action):
+    action_type, value = action
+    if action_type == 'shift':
+        return f"shift {value}"
+    elif action_type == 'reduce':
+        return f"reduce {value}"
+    elif action_type == 'accept':
+        return "accept"
+    return str(action)
\ No newline at end of file
@@ -1,130 +1,430 @@
+from array import array
+from itertools import islice
+
+from .compressed_table import ACCEPT, ERROR
+from .grammar import END_MARKER, ERROR_TOKEN
+from .lexer import LexerError
+from .parse_tree import ParseTree
+
+STEPS_PER_TOKEN = 4
+RECOVERY_MAX_ERRORS = 100
+RECOVERY_QUIET_TOKENS = 3
+CANCEL_CHECK_STEPS = 4096
+
 class TransitionTable:
     
-    def __init__(self, input_string, lr_table):
+    def __init__(self, input_string, lr_table, max_steps=None, record=True, tokens=None, run=True,
+                 build_tree=False, actions=None, lexemes=None, recover=False, max_errors=None, locations=None,
+                 cancel=None):
         self.input_string = input_string.strip()
         self.lr_table = lr_table
-        self.tokens = self._tokenize_input()
+        self.runtime = getattr(lr_table, 'compressed', lr_table)
         self.stack = [0]
-        self.input_buffer = list(self.tokens) + ['$']
         self.current_position = 0  # Track position in original input
-        self.transitions = []
         self.accepted = False
         self.error_message = None
         self.step_count = 0
-        self.max_steps = 1000
+        self.max_steps = max_steps
+        self.record = record
+        self.finished = False
+        self.lexer_error = None
+        self.recover = recover
+        self.max_errors = max_errors or RECOVERY_MAX_ERRORS
+        self.errors = []
+        self.locations = locations
+        self._quiet = 0
+        self._recovery_position = -1
+        self._error_column = self.runtime.terminal_column(ERROR_TOKEN) if recover else -1
+        self._follow = {}
         
-        self._process_string()
+        if tokens is None:
+            self.tokens = self._tokenize_input()
+            self._token_iter = iter(self.tokens)
+            self._keep_tokens = False
+        else:
+            self.tokens = []
+            self._token_iter = iter(tokens)
+            self._keep_tokens = record or (build_tree and lexemes is None)
+        
+        # El árbol se arma en las mismas reducciones del driver: no necesita la
+        # traza, así que con record=False el coste es lineal en la entrada.
+        self.tree = None
+        if build_tree:
+            self.tree = ParseTree(self.runtime, actions, self.tokens if lexemes is None else lexemes)
+        
+        self._steps_per_token = len(self.runtime.reglas) + STEPS_PER_TOKEN
+        self._codes = array('i')
+        self._pops = array('i')
+        self._states = array('i')
+        self._positions = array('i')
+        self._error_step = 0
+        self._transitions = None
+        
+        if run:
+            self.run(cancel)
     
     def _tokenize_input(self):
         if not self.input_string:
             return []
         return self.input_string.split()
     
-    def _process_string(self):
-        while self.step_count < self.max_steps:
-            self.step_count += 1
+    def _next_token(self):
+        try:
+            token = next(self._token_iter, None)
+        except LexerError as e:
+            # El carácter no reconocido queda como símbolo actual: no es un
+            # terminal, así que el driver se detiene con el error del lexer.
+            self.lexer_error = str(e)
+            self._token_iter = iter(())
+            token = e.text
+        if token is None:
+            return END_MARKER
+        if self._keep_tokens:
+            self.tokens.append(token)
+        return token
+    
+    def _step_limit(self):
+        if self.max_steps is not None:
+            return self.max_steps
+        return (self.current_position + 1) * self._steps_per_token
+    
+    def _drive(self):
+        runtime = self.runtime
+        action_code = runtime.action_code
+        terminal_column = runtime.terminal_column
+        goto_state = runtime.goto_state
+        prod_len = runtime.prod_len
+        prod_lhs = runtime.prod_lhs
+        num_reglas = len(runtime.reglas)
+        stack = self.stack
+        tree = self.tree
+        
+        current_input = self._next_token()
+        columna = terminal_column(current_input)
+        
+        while True:
+            if self.step_count >= self._step_limit():
+                self._record_error("Se alcanzó el límite máximo de pasos")
+                yield ERROR, 0, -1, current_input
+                break
             
-            current_state = self.stack[-1]
-            current_input = self.input_buffer[0] if self.input_buffer else '$'
+            self.step_count += 1
+            current_state = stack[-1]
+            code = action_code(current_state, columna)
             
-            action = self.lr_table.get_action(current_state, current_input)
+            if code > 0:
+                stack.append(code - 1)
+                self.current_position += 1
+                if self._quiet:
+                    self._quiet -= 1
+                if tree is not None:
+                    tree.shift(columna, self.current_position - 1)
+                self._record(code, 0, code - 1)
+                yield code, 0, code - 1, current_input
+                current_input = self._next_token()
+                columna = terminal_column(current_input)
             
-            if not action:
-                self._record_error(f"No hay acción definida para estado {current_state} con símbolo '{current_input}'")
+            elif code == ACCEPT:
+                self.accepted = not self.errors
+                if tree is not None:
+                    tree.accept()
+                self._record(code, 0, -1)
+                yield code, 0, -1, current_input
                 break
             
-            action_type, value = action
+            elif code < 0:
+                rule_number = -code - 1
+                if rule_number >= num_reglas:
+                    self._record_error(f"Número de regla inválido: {rule_number}")
+                    yield ERROR, 0, -1, current_input
+                    break
+                
+                pops = min(prod_len[rule_number], len(stack) - 1)
+                if pops:
+                    del stack[-pops:]
+                
+                current_state = stack[-1]
+                destino = goto_state(current_state, prod_lhs[rule_number])
+                if destino < 0:
+                    left_side = runtime.simbolos[prod_lhs[rule_number]]
+                    self._record_error(f"No hay transición GOTO desde estado {current_state} con símbolo '{left_side}'")
+                    yield ERROR, pops, -1, current_input
+                    break
+                
+                stack.append(destino)
+                if tree is not None:
+                    tree.reduce(rule_number, pops, self.current_position)
+                self._record(code, pops, destino)
+                yield code, pops, destino, current_input
             
-            if action_type == 'shift':
-                self._perform_shift(value, current_input)
-            elif action_type == 'reduce':
-                self._perform_reduce(value)
-            elif action_type == 'accept':
-                self._perform_accept()
-                break
             else:
-                self._record_error(f"Acción desconocida: {action_type}")
+                message = self.lexer_error or f"No hay acción definida para estado {current_state} con símbolo '{current_input}'"
+                recuperado = self._recover(current_input, columna, message) if self.recover else None
+                if recuperado is not None:
+                    current_input, pops, destino = recuperado
+                    columna = terminal_column(current_input)
+                    self._record(ERROR, pops, destino)
+                    yield ERROR, pops, destino, current_input
+                    continue
+                self._record_error(message)
+                yield ERROR, 0, -1, current_input
                 break
         
-        if self.step_count >= self.max_steps:
-            self._record_error("Se alcanzó el límite máximo de pasos")
+        if self.errors:
+            self.error_message = self.errors[0]['message']
+        self.finished = True
     
-    def _perform_shift(self, next_state, symbol):
-        self.stack.append(next_state)
-        self.input_buffer.pop(0)
-        self.current_position += 1  # Update position when consuming input
-        
-        self.transitions.append({
-            'step': self.step_count,
-            'action': f'shift {next_state}',
-            'stack': list(self.stack),
-            'input': list(self.input_buffer),
-            'symbol': symbol,
-            'position': self.current_position
-        })
-    
-    def _perform_reduce(self, rule_number):
-        if rule_number >= len(self.lr_table.grammar.reglas):
-            self._record_error(f"Número de regla inválido: {rule_number}")
-            return
-        
-        rule = self.lr_table.grammar.reglas[rule_number]
-        left_side, right_side = rule.split(' -> ')
+    def _add_error(self, message, token):
+        diagnostico = {'position': self.current_position, 'token': token, 'message': message}
+        indice = 2 * self.current_position
+        if self.locations is not None and indice < len(self.locations):
+            diagnostico['line'] = self.locations[indice]
+            diagnostico['column'] = self.locations[indice + 1]
+        self.errors.append(diagnostico)
+    
+    def _skip_token(self):
+        self.current_position += 1
+        return self._next_token()
+    
+    def _recover(self, token, columna, message):
+        # Modo pánico: se anota el error (salvo justo después de otra
+        # recuperación, como hace yacc), se desapilan estados y se descarta
+        # entrada hasta poder seguir. Devuelve el token actual, los estados
+        # desapilados y el estado apilado, o None si no hay forma de seguir.
+        if not self._quiet:
+            self._add_error(message, token)
+        if self.lexer_error is not None:
+            return self._give_up(message, token)
+        if len(self.errors) >= self.max_errors:
+            self._add_error(f"Se alcanzó el máximo de {self.max_errors} errores; análisis detenido", token)
+            return None
         
-        symbols = right_side.split() if right_side.strip() else []
+        # Sin ningún token consumido desde la última recuperación se descarta
+        # el actual: así cada ciclo avanza y el trabajo queda acotado.
+        if self.current_position == self._recovery_position:
+            if token == END_MARKER:
+                return self._give_up(message, token)
+            token = self._skip_token()
+            columna = self.runtime.terminal_column(token)
         
-        if symbols and symbols[0] != 'ε':
-            for _ in range(len(symbols)):
-                if len(self.stack) > 1:
-                    self.stack.pop()
+        if self._error_column >= 0:
+            recuperado = self._recover_error_token(token, columna)
+        else:
+            recuperado = self._recover_follow(token, columna)
+        if recuperado is None:
+            return self._give_up(message, token)
         
-        current_state = self.stack[-1]
-        goto_state = self.lr_table.get_goto(current_state, left_side)
+        self._quiet = RECOVERY_QUIET_TOKENS
+        self._recovery_position = self.current_position
+        return recuperado
+    
+    def _give_up(self, message, token):
+        # El error que detiene el análisis se informa siempre, una sola vez.
+        if not self.errors or self.errors[-1]['position'] != self.current_position:
+            self._add_error(message, token)
+        return None
+    
+    def _recover_error_token(self, token, columna):
+        # Con producciones `error`: se desapila hasta un estado que desplace
+        # `error`, se desplaza y se descarta entrada hasta tener acción.
+        runtime = self.runtime
+        stack = self.stack
+        for profundidad in range(len(stack) - 1, -1, -1):
+            code = runtime.action_code(stack[profundidad], self._error_column)
+            if code > 0:
+                break
+        else:
+            return None
         
-        if goto_state is None:
-            self._record_error(f"No hay transición GOTO desde estado {current_state} con símbolo '{left_side}'")
-            return
+        pops = len(stack) - 1 - profundidad
+        del stack[profundidad + 1:]
+        stack.append(code - 1)
+        if self.tree is not None:
+            self.tree.recover(pops, runtime.num_no_terminales + self._error_column, self.current_position)
         
-        self.stack.append(goto_state)
+        # Las reducciones por defecto dan acción en cualquier columna: solo
+        # vale una acción propia de la fila.
+        while not runtime.has_action(stack[-1], columna):
+            if token == END_MARKER:
+                return None
+            token = self._skip_token()
+            columna = runtime.terminal_column(token)
+        return token, pops, code - 1
+    
+    def _follow_of(self, no_terminal):
+        follow = self._follow.get(no_terminal)
+        if follow is None:
+            follow = self._follow[no_terminal] = set(self.runtime.follow_of(no_terminal))
+        return follow
+    
+    def _recover_follow(self, token, columna):
+        # Sin producciones `error`: se busca, desde la cima, un estado con GOTO
+        # sobre algún A y se descarta entrada hasta un token de FOLLOW(A) con
+        # acción propia en GOTO(s, A) (no la reducción por defecto, que cubre
+        # todas las columnas); ese estado se apila como si A se hubiera reducido.
+        runtime = self.runtime
+        stack = self.stack
+        candidatos = []
+        for profundidad in range(len(stack) - 1, -1, -1):
+            estado = stack[profundidad]
+            for simbolo in runtime.gotos_of(estado):
+                candidatos.append((profundidad, simbolo, runtime.goto_state(estado, simbolo)))
+        if not candidatos:
+            return None
         
-        self.transitions.append({
-            'step': self.step_count,
-            'action': f'reduce {rule_number} ({rule})',
-            'stack': list(self.stack),
-            'input': list(self.input_buffer),
-            'rule': rule,
-            'rule_number': rule_number,
-            'position': self.current_position
-        })
-    
-    def _perform_accept(self):
-        self.accepted = True
-        self.transitions.append({
-            'step': self.step_count,
-            'action': 'accept',
-            'stack': list(self.stack),
-            'input': list(self.input_buffer),
-            'message': 'Cadena aceptada',
-            'position': self.current_position
-        })
+        while True:
+            for profundidad, simbolo, destino in candidatos:
+                if columna in self._follow_of(simbolo) and runtime.has_action(destino, columna):
+                    pops = len(stack) - 1 - profundidad
+                    del stack[profundidad + 1:]
+                    stack.append(destino)
+                    if self.tree is not None:
+                        self.tree.recover(pops, simbolo, self.current_position)
+                    return token, pops, destino
+            if token == END_MARKER:
+                return None
+            token = self._skip_token()
+            columna = runtime.terminal_column(token)
+    
+    def _record(self, code, pops, state):
+        if self.record:
+            self._codes.append(code)
+            self._pops.append(pops)
+            self._states.append(state)
+            self._positions.append(self.current_position)
     
     def _record_error(self, message):
         self.error_message = message
         self.accepted = False
-        self.transitions.append({
-            'step': self.step_count,
-            'action': 'error',
-            'stack': list(self.stack),
-            'input': list(self.input_buffer),
-            'error': message,
-            'position': self.current_position
-        })
+        self._error_step = self.step_count
+        self._record(ERROR, 0, -1)
+    
+    def run(self, cancel=None):
+        pasos = self._drive()
+        if cancel is None:
+            for _ in pasos:
+                pass
+            return self
+        # Con un plazo se avanza por tramos: comprobarlo en cada paso
+        # encarecería el bucle del driver.
+        while not self.finished:
+            for _ in islice(pasos, CANCEL_CHECK_STEPS):
+                pass
+            cancel.check()
+        return self
+    
+    def steps(self):
+        # El símbolo de cada desplazamiento llega con el paso: con un lexer y
+        # record=False el driver no guarda los tokens ya consumidos.
+        runtime = self.runtime
+        for code, pops, state, token in self._drive():
+            step = {
+                'step': self.step_count,
+                'pops': pops,
+                'push': state,
+                'position': self.current_position
+            }
+            if code > 0:
+                step['action'] = f'shift {state}'
+                step['symbol'] = token
+            elif code == ACCEPT:
+                step['action'] = 'accept'
+            elif code < 0:
+                rule_number = -code - 1
+                step['action'] = f'reduce {rule_number} ({runtime.reglas[rule_number]})'
+                step['rule_number'] = rule_number
+            elif state >= 0:
+                step['action'] = 'recover'
+            else:
+                step['action'] = 'error'
+                step['error'] = self.error_message
+            yield step
+    
+    def _token_at(self, position):
+        if position < len(self.tokens):
+            return self.tokens[position]
+        return None
+    
+    def _remaining_input(self, position):
+        return self.tokens[position:] + [END_MARKER]
+    
+    def iter_transitions(self):
+        runtime = self.runtime
+        stack = [0]
+        
+        for i, code in enumerate(self._codes):
+            position = self._positions[i]
+            
+            if code > 0:
+                stack.append(self._states[i])
+                yield {
+                    'step': i + 1,
+                    'action': f'shift {self._states[i]}',
+                    'stack': list(stack),
+                    'input': self._remaining_input(position),
+                    'symbol': self._token_at(position - 1),
+                    'position': position
+                }
+            elif code == ACCEPT:
+                yield {
+                    'step': i + 1,
+                    'action': 'accept',
+                    'stack': list(stack),
+                    'input': self._remaining_input(position),
+                    'message': 'Cadena aceptada',
+                    'position': position
+                }
+            elif code < 0:
+                rule_number = -code - 1
+                rule = runtime.reglas[rule_number]
+                if self._pops[i]:
+                    del stack[-self._pops[i]:]
+                stack.append(self._states[i])
+                yield {
+                    'step': i + 1,
+                    'action': f'reduce {rule_number} ({rule})',
+                    'stack': list(stack),
+                    'input': self._remaining_input(position),
+                    'rule': rule,
+                    'rule_number': rule_number,
+                    'position': position
+                }
+            elif self._states[i] >= 0:
+                if self._pops[i]:
+                    del stack[-self._pops[i]:]
+                stack.append(self._states[i])
+                yield {
+                    'step': i + 1,
+                    'action': 'recover',
+                    'stack': list(stack),
+                    'input': self._remaining_input(position),
+                    'position': position
+                }
+            else:
+                yield {
+                    'step': self._error_step,
+                    'action': 'error',
+                    'stack': list(self.stack),
+                    'input': self._remaining_input(position),
+                    'error': self.error_message,
+                    'position': position
+                }
+    
+    @property
+    def transitions(self):
+        if self._transitions is None:
+            self._transitions = list(self.iter_transitions())
+        return self._transitions
+    
+    @property
+    def input_buffer(self):
+        return self._remaining_input(self.current_position)
     
     def is_accepted(self):
         return self.accepted
     
     def get_summary(self):
-        return {
+        summary = {
             'accepted': self.accepted,
             'steps': self.step_count,
             'error': self.error_message,
@@ -132,6 +432,9 @@ class TransitionTable:
             'remaining_input': self.input_buffer,
             'current_position': self.current_position
         }
+        if self.recover:
+            summary['errors'] = self.errors
+        return summary
     
     def to_dict(self):
         return {
@@ -141,5 +444,6 @@ class TransitionTable:
             'error_message': self.error_message,
             'step_count': self.step_count,
             'transitions': self.transitions,
-            'summary': self.get_summary()
+            'summary': self.get_summary(),
+            'parse_tree': self.tree.to_dict() if self.tree is not None else None
         }
\ No newline at end of file
@@ -0,0 +1,173 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .comp.cancel import BuildCancelled, CancelToken
+
+THREAD = "thread"
+PROCESS = "process"
+EXECUTOR_MODES = (THREAD, PROCESS)
+
+# Margen para que una tarea que no coopera no deje colgado al cliente.
+WAIT_GRACE = 1.0
+
+
+class ExecutorBusy(Exception):
+    pass
+
+
+class TaskTimeout(Exception):
+    pass
+
+
+def _child_main(conn, fn, args, deadline):
+    try:
+        resultado = (True, fn(*args, cancel=CancelToken(deadline)))
+    except BaseException as e:
+        resultado = (False, e)
+    try:
+        conn.send(resultado)
+    except Exception as e:
+        conn.send((False, RuntimeError(f"No se pudo devolver el resultado: {e}")))
+    finally:
+        conn.close()
+
+
+class BoundedExecutor:
+    
+    def __init__(self, mode=THREAD, max_workers=2, max_queue=8, timeout=30.0, preload=()):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Modo de ejecución desconocido: '{mode}'")
+        
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.submitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="lr-worker")
+        self._context = None
+        
+        if mode == PROCESS:
+            metodos = multiprocessing.get_all_start_methods()
+            self._context = multiprocessing.get_context(
+                "forkserver" if "forkserver" in metodos else "spawn"
+            )
+            if preload and "forkserver" in metodos:
+                self._context.set_forkserver_preload(list(preload))
+    
+    def submit(self, fn, *args, timeout=None, local=False):
+        # `local` ejecuta la tarea en el hilo del pool también en modo
+        # proceso: sirve para las que parten de objetos grandes que ya están
+        # en memoria y costaría más serializar que calcular. Ocupa plaza y
+        # cola igual que las demás, pero el plazo solo se cumple si la tarea
+        # coopera con el token de cancelación.
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorBusy("Servidor ocupado: la cola de construcción está llena")
+            self._in_flight += 1
+            self.submitted += 1
+        
+        token = CancelToken.with_timeout(timeout or self.timeout)
+        try:
+            future = self._pool.submit(self._execute, fn, args, token, local)
+        except BaseException:
+            self._release(None)
+            raise
+        future.cancel_token = token
+        future.add_done_callback(self._release)
+        return future
+    
+    def _release(self, future):
+        with self._lock:
+            self._in_flight -= 1
+            if future is not None and not future.cancelled() and isinstance(future.exception(), TaskTimeout):
+                self.timeouts += 1
+    
+    def _execute(self, fn, args, token, local):
+        try:
+            token.check()
+            if self.mode == PROCESS and not local:
+                return self._run_process(fn, args, token)
+            return fn(*args, cancel=token)
+        except BuildCancelled:
+            raise TaskTimeout("La tarea superó el tiempo límite")
+    
+    def _run_process(self, fn, args, token):
+        padre, hijo = self._context.Pipe(duplex=False)
+        proceso = self._context.Process(
+            target=_child_main, args=(hijo, fn, args, token.deadline), daemon=True
+        )
+        proceso.start()
+        hijo.close()
+        
+        try:
+            if not padre.poll(token.remaining()):
+                raise BuildCancelled()
+            ok, valor = padre.recv()
+        except EOFError:
+            ok, valor = False, None
+        finally:
+            padre.close()
+            if proceso.is_alive():
+                proceso.terminate()
+                proceso.join(1)
+                if proceso.is_alive():
+                    proceso.kill()
+            proceso.join()
+        
+        if not ok:
+            if valor is None:
+                raise RuntimeError(f"El proceso de trabajo terminó inesperadamente (código {proceso.exitcode})")
+            raise valor
+        return valor
+    
+    def _wait_timeout(self, future):
+        token = getattr(future, "cancel_token", None)
+        restante = token.remaining() if token is not None else None
+        return None if restante is None else restante + WAIT_GRACE
+    
+    def _cancel(self, future):
+        token = getattr(future, "cancel_token", None)
+        if token is not None:
+            token.cancel()
+    
+    def result(self, future):
+        try:
+            return future.result(self._wait_timeout(future))
+        except TimeoutError:
+            self._cancel(future)
+            raise TaskTimeout("La tarea superó el tiempo límite")
+    
+    async def wait(self, future):
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)), self._wait_timeout(future)
+            )
+        except asyncio.TimeoutError:
+            self._cancel(future)
+            raise TaskTimeout("La tarea superó el tiempo límite")
+    
+    async def run(self, fn, *args, timeout=None, local=False):
+        return await self.wait(self.submit(fn, *args, timeout=timeout, local=local))
+    
+    def stats(self):
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "timeout": self.timeout,
+                "in_flight": self._in_flight,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts
+            }
+    
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
\ No newline at end of file
@@ -1,31 +1,233 @@
-from fastapi import APIRouter, HTTPException
+import io
+import json
+import os
+import time
+from concurrent.futures import Future
+
+from fastapi import APIRouter, File, Form, HTTPException, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from .comp import LR1Parser
+from .comp.afd import LALR1, LR1
+from .comp.artifact import load_directory
+from .comp.batch import parse_batch, read_inputs
+from .comp.cache import ParserCache, grammar_fingerprint, normalize_grammar
+from .comp.lexer import compile_lexer, lexer_fingerprint
+from .comp.parser import AUTOMATON_KINDS, build_parser, export_graph, parse_request, rebuild_parser, render_automaton
+from .comp.visualizer import IMAGE_FORMATS, images_available
+from .executor import BoundedExecutor, ExecutorBusy, TaskTimeout
 
 router = APIRouter()
 
+parser_cache = ParserCache(
+    max_entries=int(os.getenv("PARSER_CACHE_MAX_ENTRIES", "64")),
+    max_bytes=int(os.getenv("PARSER_CACHE_MAX_MB", "256")) * 1024 * 1024,
+    size_of=lambda parser: parser.estimate_memory()
+)
+
+grammar_sources = ParserCache(
+    max_entries=int(os.getenv("GRAMMAR_SOURCES_MAX_ENTRIES", "4096")),
+    max_bytes=int(os.getenv("GRAMMAR_SOURCES_MAX_MB", "32")) * 1024 * 1024,
+    size_of=lambda source: len(source[0]) + 64
+)
+
+image_cache = ParserCache(
+    max_entries=int(os.getenv("IMAGE_CACHE_MAX_ENTRIES", "256")),
+    max_bytes=int(os.getenv("IMAGE_CACHE_MAX_MB", "128")) * 1024 * 1024,
+    size_of=len
+)
+
+graph_cache = ParserCache(
+    max_entries=int(os.getenv("GRAPH_CACHE_MAX_ENTRIES", "64")),
+    max_bytes=int(os.getenv("GRAPH_CACHE_MAX_MB", "128")) * 1024 * 1024,
+    size_of=lambda graph: graph.nbytes()
+)
+
+lexer_cache = ParserCache(
+    max_entries=int(os.getenv("LEXER_CACHE_MAX_ENTRIES", "256")),
+    max_bytes=int(os.getenv("LEXER_CACHE_MAX_MB", "16")) * 1024 * 1024,
+    size_of=lambda lexer: lexer.nbytes()
+)
+
+IMAGE_CACHE_CONTROL = "public, max-age=86400, immutable"
+
+build_executor = BoundedExecutor(
+    mode=os.getenv("BUILD_EXECUTOR_MODE", "process"),
+    max_workers=int(os.getenv("BUILD_EXECUTOR_WORKERS", "2")),
+    max_queue=int(os.getenv("BUILD_EXECUTOR_QUEUE", "8")),
+    timeout=float(os.getenv("BUILD_TIMEOUT_SECONDS", "30")),
+    preload=[LR1Parser.__module__]
+)
+
+PRECOMPILED_GRAMMARS_DIR = os.getenv("PRECOMPILED_GRAMMARS_DIR")
+
+precompiled_parsers = load_directory(PRECOMPILED_GRAMMARS_DIR) if PRECOMPILED_GRAMMARS_DIR else {}
+
+STREAM_CHUNK_STEPS = int(os.getenv("PARSE_STREAM_CHUNK_STEPS", "64"))
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "0")) or None
+BATCH_MAX_INPUTS = int(os.getenv("BATCH_MAX_INPUTS", "100000"))
+GLR_MAX_STEPS = int(os.getenv("GLR_MAX_STEPS", "5000000"))
+# Sin graphviz o sin el ejecutable dot no hay imágenes; los grafos JSON sí.
+IMAGES_AVAILABLE = images_available()
+
 class GrammarRequest(BaseModel):
     grammar_text: str
     input_string: str
+    mode: str = LR1
+    include_afn: bool = True
+    base_fingerprint: str | None = None
+    lexer_text: str | None = None
+    build_tree: bool = False
+    include_trace: bool = True
+    recover: bool = False
+    glr: bool = False
+    max_steps: int | None = None
+
+class BatchRequest(BaseModel):
+    grammar_text: str
+    inputs: list[str]
+    mode: str = LR1
+    include_traces: bool = False
+    lexer_text: str | None = None
+    recover: bool = False
 
 @router.get("/health")
 def health():
     return {"status": "ok"}
 
+@router.get("/api/lr1/cache/stats")
+def cache_stats():
+    return {
+        **parser_cache.stats(),
+        "images": image_cache.stats(),
+        "graphs": graph_cache.stats(),
+        "lexers": lexer_cache.stats(),
+        "grammar_sources": grammar_sources.stats(),
+        "precompiled": len(precompiled_parsers)
+    }
+
+@router.get("/api/lr1/executor/stats")
+def executor_stats():
+    return build_executor.stats()
+
+def _precompiled_future(parser):
+    future = Future()
+    future.set_result(parser)
+    return future
+
+def _submit_build(grammar_text, mode, base_fingerprint=None):
+    # Si el cliente indica la gramática de la que parte la edición y ese parser
+    # sigue en caché, se reconstruye reutilizando sus estados y filas. La
+    # reconstrucción corre en este proceso aunque el ejecutor use procesos:
+    # enviar el parser anterior a un hijo cuesta tanto como lo que se ahorra.
+    # Las construcciones sí cooperan con el plazo, así que sigue acotada.
+    # LALR(1) no reutiliza nada (ver LR1Parser) y va por el camino normal.
+    previous = parser_cache.get(base_fingerprint) if base_fingerprint else None
+    if previous is not None and previous.is_built and previous.mode == mode and mode != LALR1:
+        return build_executor.submit(rebuild_parser, previous, grammar_text, mode, local=True)
+    return build_executor.submit(build_parser, grammar_text, mode)
+
+def _parser_future(grammar_text, mode, base_fingerprint=None):
+    key = grammar_fingerprint(grammar_text, mode)
+    if key in precompiled_parsers:
+        return _precompiled_future(precompiled_parsers[key])
+    if key not in grammar_sources:
+        grammar_sources.put(key, (normalize_grammar(grammar_text), mode))
+    return parser_cache.get_or_submit(
+        key, lambda: _submit_build(normalize_grammar(grammar_text), mode, base_fingerprint)
+    )
+
+def get_parser(grammar_text, mode=LR1):
+    return build_executor.result(_parser_future(grammar_text, mode))
+
+async def get_parser_async(grammar_text, mode=LR1, base_fingerprint=None):
+    return await build_executor.wait(_parser_future(grammar_text, mode, base_fingerprint))
+
+def get_lexer(parser, lexer_text):
+    if not lexer_text:
+        return None
+    # El lexer compilado se cachea con la huella de su gramática: cambiar solo
+    # las expresiones no reconstruye la tabla, y repetirlas no recompila nada.
+    key = f"{grammar_fingerprint(parser.grammar_content, parser.mode)}:{lexer_fingerprint(lexer_text)}"
+    try:
+        return lexer_cache.get_or_build(
+            key, lambda: compile_lexer(lexer_text, parser.get_grammar_data()['terminals'])
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Error en la definición del lexer: {e}")
+
+def _automaton_url(fingerprint, kind, *extra):
+    return "/".join(("/api/lr1/automaton", fingerprint, kind) + extra)
+
+async def _parser_for_fingerprint(fingerprint, kind):
+    if kind not in AUTOMATON_KINDS:
+        raise HTTPException(status_code=404, detail=f"Autómata desconocido: '{kind}'")
+    
+    if fingerprint in precompiled_parsers:
+        return precompiled_parsers[fingerprint]
+    
+    source = grammar_sources.get(fingerprint)
+    if source is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Autómata desconocido o expirado; vuelva a enviar la gramática"
+        )
+    
+    parser = await get_parser_async(*source)
+    if not parser.is_built:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Error al construir el parser: {parser.build_errors}"
+        )
+    return parser
+
+async def get_graph(fingerprint, kind):
+    key = f"{fingerprint}:{kind}"
+    graph = graph_cache.get(key)
+    if graph is None:
+        parser = await _parser_for_fingerprint(fingerprint, kind)
+        graph = await build_executor.wait(graph_cache.get_or_submit(
+            key, lambda: build_executor.submit(export_graph, parser, kind, local=True)
+        ))
+    return graph
+
+def _executor_error(e):
+    if isinstance(e, ExecutorBusy):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    return HTTPException(status_code=504, detail=str(e))
+
+def _max_steps(max_steps, glr=False):
+    # Límite de pasos del driver. Sin él, el LR usa su cota lineal
+    # ((posición + 1) * (reglas + 4)) y GLR la del servidor, que el cliente
+    # puede bajar pero no subir.
+    if max_steps is not None and max_steps <= 0:
+        raise HTTPException(status_code=400, detail="max_steps debe ser un entero positivo")
+    if glr:
+        return min(max_steps or GLR_MAX_STEPS, GLR_MAX_STEPS)
+    return max_steps
+
 @router.post("/api/lr1/parse-string")
 async def parse_string_lr1(request: GrammarRequest):
     try:
-        parser = LR1Parser(request.grammar_text, request.input_string)
+        max_steps = _max_steps(request.max_steps, request.glr)
+        parser = await get_parser_async(request.grammar_text, request.mode, request.base_fingerprint)
         
-        if not parser.build():
+        if not parser.is_built:
             raise HTTPException(
                 status_code=400, 
                 detail=f"Error al construir el parser: {parser.build_errors}"
             )
         
-        visualizations = parser.generate_visualizations()
-        summary = parser.get_summary()
-        parse_result = parser.parse()
+        fingerprint = grammar_fingerprint(request.grammar_text, request.mode)
+        lexer = get_lexer(parser, request.lexer_text) if request.input_string else None
+        # Como las reconstrucciones, el trabajo sobre un parser ya construido
+        # corre en este proceso: enviarlo a un hijo cuesta más que el análisis
+        # y las tablas y el resumen que calcula no volverían a la caché. El
+        # driver comprueba el plazo, así que sigue acotado.
+        summary, parse_result = await build_executor.run(
+            parse_request, parser, request.input_string, lexer, request.include_trace, request.build_tree,
+            request.recover, request.glr, max_steps, local=True
+        )
         
         result = {
             "success": True,
@@ -37,14 +239,22 @@ async def parse_string_lr1(request: GrammarRequest):
             "statistics": {
                 "num_states_afn": summary['afn']['states'],
                 "num_states_afd": summary['afd']['states'],
+                "num_states_before_merge": summary['afd']['states_before_merge'],
+                "mode": summary['afd']['mode'],
+                "merge_conflicts": summary['afd']['merge_conflicts'],
                 "num_productions": summary['grammar']['rules'],
                 "is_lr1": summary['table']['is_lr1'],
+                "grammar_class": summary['table']['grammar_class'],
                 "conflicts": summary['table']['conflicts']
             },
+            "automaton_fingerprint": fingerprint,
             "visualizations": {
-                "images_available": len(visualizations) > 0,
-                "afn_image": visualizations.get('afn'),
-                "afd_image": visualizations.get('afd'),
+                "images_available": IMAGES_AVAILABLE,
+                "formats": list(IMAGE_FORMATS),
+                "afn_image_url": _automaton_url(fingerprint, "afn") if request.include_afn else None,
+                "afd_image_url": _automaton_url(fingerprint, "afd"),
+                "afn_graph_url": _automaton_url(fingerprint, "afn", "graph") if request.include_afn else None,
+                "afd_graph_url": _automaton_url(fingerprint, "afd", "graph"),
                 "table_data": parse_result['table'] if parse_result else None
             }
         }
@@ -54,6 +264,12 @@ async def parse_string_lr1(request: GrammarRequest):
                 "input_string": parse_result['transition_table']['input_string'],
                 "accepted": parse_result['transition_table']['accepted'],
                 "transitions": parse_result['transition_table']['transitions'],
+                "error": parse_result['transition_table']['error'],
+                "errors": parse_result['transition_table']['errors'],
+                "parse_tree": parse_result['transition_table']['parse_tree'],
+                "forest": parse_result['transition_table']['forest'],
+                "ambiguous": parse_result['transition_table']['ambiguous'],
+                "trees": parse_result['transition_table']['trees'],
                 "final_state": {
                     "stack": parse_result['transition_table']['final_stack'],
                     "position": parse_result['transition_table']['current_position']
@@ -62,5 +278,232 @@ async def parse_string_lr1(request: GrammarRequest):
         
         return result
         
+    except HTTPException:
+        raise
+    except (ExecutorBusy, TaskTimeout) as e:
+        raise _executor_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
+
+def _ndjson(data):
+    return json.dumps(data, ensure_ascii=False) + "\n"
+
+def _stream_trace(parser, transition_table):
+    yield _ndjson({
+        "type": "table",
+        "mode": parser.mode,
+        "grammar_class": parser.table.grammar_class(),
+        "conflicts": len(parser.table.conflicts),
+        "table": parser.get_table_data()
+    })
+    
+    lineas = []
+    for step in transition_table.steps():
+        lineas.append(_ndjson({"type": "step", **step}))
+        if len(lineas) >= STREAM_CHUNK_STEPS:
+            yield "".join(lineas)
+            lineas = []
+    if lineas:
+        yield "".join(lineas)
+    
+    yield _ndjson({"type": "summary", **transition_table.get_summary()})
+
+@router.post("/api/lr1/parse-string/stream")
+async def parse_string_lr1_stream(request: GrammarRequest):
+    try:
+        max_steps = _max_steps(request.max_steps)
+        parser = await get_parser_async(request.grammar_text, request.mode, request.base_fingerprint)
+        
+        if not parser.is_built:
+            raise HTTPException(
+                status_code=400, 
+                detail=f"Error al construir el parser: {parser.build_errors}"
+            )
+        
+        lexer = get_lexer(parser, request.lexer_text)
+        transition_table = parser.stream_input(request.input_string, lexer, recover=request.recover, max_steps=max_steps)
+        return StreamingResponse(
+            _stream_trace(parser, transition_table),
+            media_type="application/x-ndjson"
+        )
+        
+    except HTTPException:
+        raise
+    except (ExecutorBusy, TaskTimeout) as e:
+        raise _executor_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
+
+def _run_batch(grammar_text, mode, inputs, include_traces, lexer_text=None, recover=False):
+    if len(inputs) > BATCH_MAX_INPUTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Demasiadas cadenas en el lote: {len(inputs)} (máximo {BATCH_MAX_INPUTS})"
+        )
+    
+    inicio = time.perf_counter()
+    parser = get_parser(grammar_text, mode)
+    build_ms = (time.perf_counter() - inicio) * 1000
+    
+    if not parser.is_built:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Error al construir el parser: {parser.build_errors}"
+        )
+    
+    lexer = get_lexer(parser, lexer_text)
+    resultado = parse_batch(
+        parser.table, inputs, include_traces, max_workers=BATCH_MAX_WORKERS, lexer=lexer, recover=recover,
+        executor=build_executor
+    )
+    resultado["timing"]["build_ms"] = build_ms
+    return {
+        "success": True,
+        "mode": parser.mode,
+        "grammar_class": parser.table.grammar_class(),
+        **resultado
+    }
+
+@router.post("/api/lr1/parse-batch")
+def parse_batch_lr1(request: BatchRequest):
+    try:
+        return _run_batch(
+            request.grammar_text, request.mode, request.inputs, request.include_traces,
+            request.lexer_text, request.recover
+        )
+    except HTTPException:
+        raise
+    except (ExecutorBusy, TaskTimeout) as e:
+        raise _executor_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
+
+@router.post("/api/lr1/parse-batch/upload")
+def parse_batch_upload_lr1(
+    grammar_text: str = Form(...),
+    file: UploadFile = File(...),
+    mode: str = Form(LR1),
+    include_traces: bool = Form(False),
+    lexer_text: str | None = Form(None),
+    recover: bool = Form(False)
+):
+    try:
+        inputs = read_inputs(file.file.read().decode("utf-8"))
+        return _run_batch(grammar_text, mode, inputs, include_traces, lexer_text, recover)
+    except HTTPException:
+        raise
+    except (ExecutorBusy, TaskTimeout) as e:
+        raise _executor_error(e)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="El archivo debe estar codificado en UTF-8")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
+
+@router.post("/api/lr1/parse-file")
+def parse_file_lr1(
+    grammar_text: str = Form(...),
+    lexer_text: str = Form(...),
+    file: UploadFile = File(...),
+    mode: str = Form(LR1),
+    recover: bool = Form(True)
+):
+    try:
+        inicio = time.perf_counter()
+        parser = get_parser(grammar_text, mode)
+        build_ms = (time.perf_counter() - inicio) * 1000
+        
+        if not parser.is_built:
+            raise HTTPException(
+                status_code=400, 
+                detail=f"Error al construir el parser: {parser.build_errors}"
+            )
+        
+        lexer = get_lexer(parser, lexer_text)
+        if lexer is None:
+            raise HTTPException(status_code=400, detail="Falta la definición del lexer")
+        
+        inicio = time.perf_counter()
+        transition_table = parser.parse_stream(io.TextIOWrapper(file.file, encoding="utf-8"), lexer, recover=recover)
+        return {
+            "success": True,
+            "mode": parser.mode,
+            "filename": file.filename,
+            **transition_table.get_summary(),
+            "timing": {
+                "build_ms": build_ms,
+                "parse_ms": (time.perf_counter() - inicio) * 1000
+            }
+        }
+    except HTTPException:
+        raise
+    except (ExecutorBusy, TaskTimeout) as e:
+        raise _executor_error(e)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="El archivo debe estar codificado en UTF-8")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
+
+@router.get("/api/lr1/automaton/{fingerprint}/{kind}")
+async def automaton_image(fingerprint: str, kind: str, request: Request, format: str = "png"):
+    if kind not in AUTOMATON_KINDS:
+        raise HTTPException(status_code=404, detail=f"Autómata desconocido: '{kind}'")
+    if format not in IMAGE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato de imagen no soportado: '{format}'")
+    if not IMAGES_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Graphviz no está disponible en el servidor")
+    
+    etag = f'"{fingerprint}-{kind}-{format}"'
+    headers = {"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    
+    try:
+        key = f"{fingerprint}:{kind}:{format}"
+        image = image_cache.get(key)
+        if image is None:
+            parser = await _parser_for_fingerprint(fingerprint, kind)
+            image = await build_executor.wait(image_cache.get_or_submit(
+                key, lambda: build_executor.submit(render_automaton, parser, kind, format, local=True)
+            ))
+        
+        return Response(content=image, media_type=IMAGE_FORMATS[format], headers=headers)
+        
+    except HTTPException:
+        raise
+    except (ExecutorBusy, TaskTimeout) as e:
+        raise _executor_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al renderizar el autómata: {str(e)}")
+
+@router.get("/api/lr1/automaton/{fingerprint}/{kind}/graph")
+async def automaton_graph_page(fingerprint: str, kind: str, start: int = 0, limit: int = 100):
+    try:
+        graph = await get_graph(fingerprint, kind)
+        return graph.page(start, limit)
+    except HTTPException:
+        raise
+    except (ExecutorBusy, TaskTimeout) as e:
+        raise _executor_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al exportar el autómata: {str(e)}")
+
+@router.get("/api/lr1/automaton/{fingerprint}/{kind}/graph/{state}")
+async def automaton_graph_neighborhood(
+    fingerprint: str,
+    kind: str,
+    state: int,
+    depth: int = 1,
+    direction: str = "both",
+    limit: int = 200
+):
+    try:
+        graph = await get_graph(fingerprint, kind)
+        return graph.neighborhood(state, depth, direction, limit)
+    except HTTPException:
+        raise
+    except (ExecutorBusy, TaskTimeout) as e:
+        raise _executor_error(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error al exportar el autómata: {str(e)}")
\ No newline at end of file
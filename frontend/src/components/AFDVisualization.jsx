@@ -15,6 +15,7 @@ import {
   ZoomIn as ZoomIcon
 } from '@mui/icons-material';
 import ImageModal from './ImageModal';
+import { automatonImageUrl } from '../utils/api';
 import './AutomatonVisualization.css';
 
 const AFDVisualization = ({ data, statistics }) => {
@@ -24,8 +25,10 @@ const AFDVisualization = ({ data, statistics }) => {
     return null;
   }
 
+  const imageSrc = automatonImageUrl(data.afd_image_url);
+
   const handleImageClick = () => {
-    if (data.afd_image) {
+    if (imageSrc) {
       setModalOpen(true);
     }
   };
@@ -54,14 +57,15 @@ const AFDVisualization = ({ data, statistics }) => {
             </Typography>
           </Box>
 
-          {data.afd_image ? (
+          {imageSrc ? (
             <Box className="automaton-image-container">
               <Box className="image-wrapper" onClick={handleImageClick}>
                 <CardMedia
                   component="img"
-                  image={data.afd_image}
+                  image={imageSrc}
                   alt="AFD - Autómata Finito Determinístico"
                   className="automaton-image clickable-image"
+                  loading="lazy"
                 />
                 <Box className="image-overlay">
                   <Tooltip title="Click para ampliar">
@@ -85,7 +89,7 @@ const AFDVisualization = ({ data, statistics }) => {
       <ImageModal
         open={modalOpen}
         onClose={() => setModalOpen(false)}
-        imageData={data.afd_image}
+        imageData={imageSrc}
         title="AFD - Autómata Finito Determinístico"
         altText="Visualización del AFD generado a partir del AFN"
       />
@@ -15,6 +15,7 @@ import {
   ZoomIn as ZoomIcon
 } from '@mui/icons-material';
 import ImageModal from './ImageModal';
+import { automatonImageUrl } from '../utils/api';
 import './AutomatonVisualization.css';
 
 const AFNVisualization = ({ data, statistics }) => {
@@ -24,8 +25,10 @@ const AFNVisualization = ({ data, statistics }) => {
     return null;
   }
 
+  const imageSrc = automatonImageUrl(data.afn_image_url);
+
   const handleImageClick = () => {
-    if (data.afn_image) {
+    if (imageSrc) {
       setModalOpen(true);
     }
   };
@@ -40,11 +43,13 @@ const AFNVisualization = ({ data, statistics }) => {
               <Typography variant="h5" component="h3" className="automaton-title">
                 AFN (Autómata Finito No-determinístico)
               </Typography>
-              <Chip 
-                label={`${statistics.num_states_afn} estados`} 
-                size="small" 
-                className="automaton-chip"
-              />
+              {statistics.num_states_afn != null && (
+                <Chip 
+                  label={`${statistics.num_states_afn} estados`} 
+                  size="small" 
+                  className="automaton-chip"
+                />
+              )}
             </Stack>
           </Box>
 
@@ -54,14 +59,15 @@ const AFNVisualization = ({ data, statistics }) => {
             </Typography>
           </Box>
 
-          {data.afn_image ? (
+          {imageSrc ? (
             <Box className="automaton-image-container">
               <Box className="image-wrapper" onClick={handleImageClick}>
                 <CardMedia
                   component="img"
-                  image={data.afn_image}
+                  image={imageSrc}
                   alt="AFN - Autómata Finito No-determinístico"
                   className="automaton-image clickable-image"
+                  loading="lazy"
                 />
                 <Box className="image-overlay">
                   <Tooltip title="Click para ampliar">
@@ -85,7 +91,7 @@ const AFNVisualization = ({ data, statistics }) => {
       <ImageModal
         open={modalOpen}
         onClose={() => setModalOpen(false)}
-        imageData={data.afn_image}
+        imageData={imageSrc}
         title="AFN - Autómata Finito No-determinístico"
         altText="Visualización del AFN generado a partir de la gramática"
       />
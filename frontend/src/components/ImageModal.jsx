@@ -37,15 +37,18 @@ const ImageModal = ({ open, onClose, imageData, title, altText }) => {
     setPosition({ x: 0, y: 0 });
   };
 
-  const handleDownload = () => {
+  const handleDownload = async () => {
     if (!imageData) return;
     
+    const response = await fetch(imageData);
+    const blobUrl = URL.createObjectURL(await response.blob());
     const link = document.createElement('a');
-    link.href = imageData;
+    link.href = blobUrl;
     link.download = `${title || 'automaton'}.png`;
     document.body.appendChild(link);
     link.click();
     document.body.removeChild(link);
+    URL.revokeObjectURL(blobUrl);
   };
 
   const handleMouseDown = (e) => {
@@ -65,7 +65,9 @@ const ParsingResults = ({ result, statistics }) => {
             </ListItemIcon>
             <ListItemText
               primary="Estados AFN generados"
-              secondary={`${statistics.num_states_afn} estados en el autómata no-determinístico`}
+              secondary={statistics.num_states_afn != null
+                ? `${statistics.num_states_afn} estados en el autómata no-determinístico`
+                : 'En LR(0) y SLR(1) se cuenta al construir el AFN'}
             />
           </ListItem>
 
@@ -13,4 +13,9 @@ export async function parseStringLR1(grammarText, inputString) {
 		input_string: inputString
 	});
 	return response.data;
+}
+
+export function automatonImageUrl(path, format = "png") {
+	if (!path) return null;
+	return `${API_BASE_URL}${path}?format=${format}`;
 }
\ No newline at end of file